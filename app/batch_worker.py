@@ -0,0 +1,47 @@
+# app/batch_worker.py
+import logging
+from typing import List, Dict, Any, Optional
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from core import batch_processor
+from core.processing_journal import ProcessingJournal, default_journal_path
+
+logger = logging.getLogger(__name__)
+
+
+class BatchGenerationWorker(QObject):
+    """在后台线程中运行批量生成，通过信号向界面报告进度和结果。"""
+    progress = pyqtSignal(int, int, dict)  # 已完成数, 总数, 单个任务结果
+    finished = pyqtSignal(list)  # 全部任务结果
+
+    def __init__(self, file_paths: List[str], output_path: str, header_presets: List[Dict[str, str]],
+                 fallback_header: Optional[Dict[str, str]], mode: str, force: bool = False,
+                 resume: bool = False):
+        super().__init__()
+        self.file_paths = list(file_paths)
+        self.output_path = output_path
+        self.header_presets = [p.copy() for p in header_presets]
+        self.fallback_header = fallback_header.copy() if fallback_header else None
+        self.mode = mode
+        self.force = force
+        self.resume = resume
+
+    def run(self):
+        results: List[Dict[str, Any]] = []
+        journal = None
+        try:
+            if self.resume:
+                journal = ProcessingJournal(default_journal_path("batch", self.output_path))
+            results = batch_processor.run_batch_generation(
+                self.file_paths, self.output_path, self.header_presets, self.fallback_header, self.mode,
+                generation_options=batch_processor.build_generation_options(force=self.force),
+                progress_callback=lambda done, total, result: self.progress.emit(done, total, result),
+                journal=journal)
+        except Exception as e:
+            logger.critical(f"批量生成线程发生严重错误: {e}", exc_info=True)
+            results = [{"source_files": self.file_paths, "header": None, "success": False, "output_file": "",
+                        "parameter_count": 0, "duration": 0.0, "message": f"批量生成失败: {e}"}]
+        finally:
+            if journal is not None:
+                journal.close()
+        self.finished.emit(results)
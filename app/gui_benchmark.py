@@ -0,0 +1,199 @@
+# app/gui_benchmark.py
+# 界面性能测试：在无显示环境 (QT_QPA_PLATFORM=offscreen) 中创建 MainWindow，注入规模递增的合成参数与抬头预设，
+# 测量预览树填充、参数搜索过滤、参数移动与抬头下拉框刷新的耗时，以及每次操作后事件循环的延迟
+# (操作返回后到下一个 0 毫秒定时器触发的时间，即排队的布局/绘制等工作)、峰值内存与控件数量。
+# 结果格式与 core/benchmark_suite.py 相同，可用 python bench_main.py compare 对比。
+import copy
+import datetime
+import gc
+import logging
+import platform
+import statistics
+import time
+from typing import List, Dict, Any, Callable, Optional
+
+from PyQt6.QtCore import QTimer, QEventLoop, QT_VERSION_STR
+from PyQt6.QtWidgets import QApplication, QMessageBox, QTreeWidgetItemIterator
+
+from app.main_window import MainWindow
+from core import benchmark_data, benchmark_suite, excel_processor
+
+try:
+    import resource
+except ImportError:  # Windows 下没有 resource 模块，不记录峰值内存
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+PRESETS = {
+    "quick": {"Parameters": [100, 1000], "HeaderPresets": [10, 100, 1000]},
+    "full": {"Parameters": [100, 500, 1000, 2000, 5000], "HeaderPresets": [10, 100, 1000, 10000]},
+}
+# 搜索过滤用例的关键字 (合成参数名中约 1/14 含有该前缀)
+SEARCH_TERM = "diameter"
+
+
+def peak_rss_mb() -> Optional[float]:
+    """本进程的峰值常驻内存 (MB)，无法获取时为 None。"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return round(peak / (1024 * 1024 if platform.system() == "Darwin" else 1024), 1)
+
+
+def event_loop_latency(app: QApplication) -> float:
+    """从现在起到下一个 0 毫秒定时器触发的时间 (秒)：期间事件循环处理的是已排队的布局、绘制等事件。"""
+    loop = QEventLoop()
+    started_at = time.perf_counter()
+    QTimer.singleShot(0, loop.quit)
+    loop.exec()
+    return time.perf_counter() - started_at
+
+
+def time_ui_call(app: QApplication, func: Callable[[], Any], repeat: int,
+                 setup: Optional[Callable[[], Any]] = None) -> Dict[str, Any]:
+    """与 benchmark_suite.time_call 相同 (最快/中位数/每次耗时)，另记录每次操作后的事件循环延迟。"""
+    runs, latencies = [], []
+    for _ in range(max(1, repeat)):
+        if setup is not None:
+            setup()
+        app.processEvents()
+        gc.collect()
+        started_at = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - started_at)
+        latencies.append(event_loop_latency(app))
+    return {"seconds": min(runs), "median": statistics.median(runs), "runs": [round(r, 6) for r in runs],
+            "event_loop_latency": min(latencies), "event_loop_latency_median": statistics.median(latencies)}
+
+
+def tree_item_count(window: MainWindow) -> int:
+    count = 0
+    iterator = QTreeWidgetItemIterator(window.ui.tree_preview)
+    while iterator.value():
+        count += 1
+        iterator += 1
+    return count
+
+
+def _parameter_group(window: MainWindow):
+    return window._find_preview_group("parameter_group")
+
+
+class GuiBenchmark:
+    """持有一个离屏的 MainWindow，按规模依次注入数据并测量各操作。"""
+
+    def __init__(self, app: QApplication, repeat: int = benchmark_suite.DEFAULT_REPEAT,
+                 seed: int = benchmark_data.DEFAULT_SEED):
+        self.app = app
+        self.repeat = repeat
+        self.seed = seed
+        self.cases: Dict[str, Dict[str, Any]] = {}
+        self.window = MainWindow()
+        # 不允许模态对话框阻塞测试
+        self._patch_message_boxes()
+        self.window.show()
+        self.app.processEvents()
+
+    @staticmethod
+    def _patch_message_boxes():
+        for name in ("information", "warning", "critical"):
+            setattr(QMessageBox, name, staticmethod(lambda *args, **kwargs: QMessageBox.StandardButton.Ok))
+        QMessageBox.question = staticmethod(lambda *args, **kwargs: QMessageBox.StandardButton.No)
+
+    def close(self):
+        # 不调用 close()：closeEvent 会写回 config.json
+        self.window.write_behind_timer.stop()
+        self.window.write_behind_queue.shutdown(wait=False)
+        self.window.hide()
+        self.window.deleteLater()
+        self.app.processEvents()
+
+    def _record(self, name: str, timing: Dict[str, Any], **details):
+        timing.update(details)
+        timing["widgets"] = len(self.app.allWidgets())
+        timing["tree_items"] = tree_item_count(self.window)
+        timing["peak_rss_mb"] = peak_rss_mb()
+        self.cases[name] = timing
+        logger.info(f"{name}: {timing['seconds']:.4f}s (中位数 {timing['median']:.4f}s)，"
+                    f"事件循环延迟 {timing['event_loop_latency'] * 1000:.1f}ms，控件 {timing['widgets']}，"
+                    f"树节点 {timing['tree_items']}，峰值内存 {timing['peak_rss_mb']} MB")
+
+    def run_parameter_cases(self, parameter_count: int):
+        parameters = excel_processor.deduplicate_parameters(
+            benchmark_data.build_parameter_fixture(parameter_count, self.seed))
+        window = self.window
+        window.current_header_data = benchmark_suite.BENCH_HEADER.copy()
+        window.txt_param_search.blockSignals(True)
+        window.txt_param_search.clear()
+        window.txt_param_search.blockSignals(False)
+
+        def load_parameters():
+            window.current_parameters_data = copy.deepcopy(parameters)
+
+        self._record(f"gui/populate_preview_tree/{parameter_count}p",
+                     time_ui_call(self.app, window.populate_preview_tree, self.repeat, setup=load_parameters),
+                     parameters=len(parameters))
+
+        def clear_search():
+            window.txt_param_search.blockSignals(True)
+            window.txt_param_search.clear()
+            window.txt_param_search.blockSignals(False)
+            window.filter_preview_parameters()
+
+        # 与输入搜索词相同：textChanged 信号触发过滤
+        self._record(f"gui/filter_preview_parameters/{parameter_count}p",
+                     time_ui_call(self.app, lambda: window.txt_param_search.setText(SEARCH_TERM), self.repeat,
+                                  setup=clear_search), parameters=len(parameters))
+        clear_search()
+
+        def select_middle_parameter():
+            group = _parameter_group(window)
+            window.ui.tree_preview.setCurrentItem(group.child(group.childCount() // 2))
+
+        self._record(f"gui/move_selected_parameter_in_tree/{parameter_count}p",
+                     time_ui_call(self.app, lambda: window.move_selected_parameter_in_tree(1), self.repeat,
+                                  setup=select_middle_parameter), parameters=len(parameters))
+
+    def run_header_cases(self, preset_count: int):
+        presets = benchmark_data.build_header_presets(preset_count, self.seed)
+        window = self.window
+
+        def load_presets():
+            window.all_header_presets = presets
+            window.current_header_data = presets[preset_count // 2].copy()
+
+        self._record(f"gui/refresh_header_combobox/{preset_count}presets",
+                     time_ui_call(self.app, window.refresh_header_combobox, self.repeat, setup=load_presets),
+                     header_presets=preset_count)
+
+    def run(self, parameter_counts: List[int], preset_counts: List[int]) -> Dict[str, Any]:
+        started_at = time.perf_counter()
+        for parameter_count in parameter_counts:
+            self.run_parameter_cases(parameter_count)
+        for preset_count in preset_counts:
+            self.run_header_cases(preset_count)
+        return {
+            "format_version": benchmark_suite.RESULTS_FORMAT_VERSION,
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "environment": dict(benchmark_suite.environment_info(), qt=QT_VERSION_STR,
+                                qpa_platform=self.app.platformName()),
+            "settings": {"parameters": parameter_counts, "header_presets": preset_counts, "repeat": self.repeat,
+                         "seed": self.seed, "generator_version": benchmark_data.GENERATOR_VERSION},
+            "total_seconds": round(time.perf_counter() - started_at, 3),
+            "peak_rss_mb": peak_rss_mb(),
+            "cases": self.cases,
+        }
+
+
+def run_gui_benchmark(parameter_counts: List[int], preset_counts: List[int],
+                      repeat: int = benchmark_suite.DEFAULT_REPEAT,
+                      seed: int = benchmark_data.DEFAULT_SEED) -> Dict[str, Any]:
+    """在离屏平台上运行界面性能测试 (调用前需已设置 QT_QPA_PLATFORM，见 bench_main.py gui)。"""
+    app = QApplication.instance() or QApplication([])
+    benchmark = GuiBenchmark(app, repeat, seed)
+    try:
+        return benchmark.run(parameter_counts, preset_counts)
+    finally:
+        benchmark.close()
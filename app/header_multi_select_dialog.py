@@ -0,0 +1,51 @@
+# app/header_multi_select_dialog.py
+from PyQt6.QtWidgets import QDialog, QMessageBox, QListWidgetItem
+from PyQt6.QtCore import Qt
+from ui.header_multi_select_dialog_ui import UiHeaderMultiSelectDialog
+from typing import List, Dict
+
+
+class HeaderMultiSelectDialog(QDialog):
+    def __init__(self, header_presets: List[Dict[str, str]], parent=None):
+        super().__init__(parent)
+        self.ui = UiHeaderMultiSelectDialog()
+        self.ui.setupUi(self)
+
+        self.header_presets = header_presets
+        self.populate_list()
+
+        self.ui.btn_select_all.clicked.connect(lambda: self.set_all_checked(True))
+        self.ui.btn_select_none.clicked.connect(lambda: self.set_all_checked(False))
+        self.ui.button_box.accepted.connect(self.accept_if_selected)
+        self.ui.button_box.rejected.connect(self.reject)
+
+    def populate_list(self):
+        self.ui.list_headers.clear()
+        for idx, setting in enumerate(self.header_presets):
+            display_text = (f"零件: {setting.get('K1001', '无')} / {setting.get('K1002', '无')} | "
+                            f"工站: {setting.get('K1086', '无')} | 产线: {setting.get('K1091', '无')} | "
+                            f"SPC数: {setting.get('K1004', '无')}")
+            item = QListWidgetItem(display_text)
+            item.setData(Qt.ItemDataRole.UserRole, idx)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Unchecked)
+            self.ui.list_headers.addItem(item)
+
+    def set_all_checked(self, checked: bool):
+        state = Qt.CheckState.Checked if checked else Qt.CheckState.Unchecked
+        for i in range(self.ui.list_headers.count()):
+            self.ui.list_headers.item(i).setCheckState(state)
+
+    def selected_headers(self) -> List[Dict[str, str]]:
+        selected = []
+        for i in range(self.ui.list_headers.count()):
+            item = self.ui.list_headers.item(i)
+            if item.checkState() == Qt.CheckState.Checked:
+                selected.append(self.header_presets[item.data(Qt.ItemDataRole.UserRole)].copy())
+        return selected
+
+    def accept_if_selected(self):
+        if not self.selected_headers():
+            QMessageBox.information(self, "无选择", "请至少勾选一个抬头预设。")
+            return
+        self.accept()
@@ -4,63 +4,25 @@ from PyQt6.QtWidgets import (QMainWindow, QFileDialog, QMessageBox, QTreeWidgetI
                              QStyledItemDelegate, QLineEdit, QComboBox, QCheckBox, QAbstractItemView,
                              QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
                              QSizePolicy, QListWidgetItem, QTreeWidget, QStyleOptionViewItem)
-from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QModelIndex
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QModelIndex, QThread
 from PyQt6.QtGui import QPalette, QColor
 
 from ui.main_window_ui import UiMainWindow
 from app.settings_dialog import SettingsDialog
-from core import config_manager, excel_processor, dfq_writer
+from app.batch_worker import BatchGenerationWorker
+from app.header_multi_select_dialog import HeaderMultiSelectDialog
+from core.write_behind import WriteBehindQueue, JOB_STATUS_DONE
+from core import config_manager, excel_processor, dfq_writer, batch_processor, output_manifest, output_index, \
+    parameter_validation, edit_memory, parameter_diff, dfq_reader, dfq_lint, export_formats
+from core.k_codes import K2005_OPTIONS_MAP, K2009_OPTIONS
 import os
+import time
 from typing import List, Dict, Any, Tuple
 
 logger = logging.getLogger(__name__)
 
-# K2005 选项
-K2005_OPTIONS_MAP = {"0": "次要的", "1": "略重要的", "2": "重要的", "3": "很重要的", "4": "关键的"}
 K2005_VALUE_TO_DISPLAY = K2005_OPTIONS_MAP
 K2005_DISPLAY_TO_VALUE = {v: k for k, v in K2005_OPTIONS_MAP.items()}
-
-# K2009 选项 - (请确保此字典内容完整)
-K2009_OPTIONS = {
-    "0": "未定义", "100": "直线度", "101": "平面度", "102": "圆度", "103": "圆柱度",
-    "104": "线轮廓度", "105": "面轮廓度", "106": "倾斜度", "107": "垂直度", "108": "平行度",
-    "109": "位置度", "110": "同心度", "111": "对称度", "112": "跳动度", "113": "全跳动度",
-    "114": "复合一同轴度", "115": "复合一图案位置度", "117": "坐标", "118": "曲面跳动",
-    "120": "X坐标", "121": "Y坐标", "122": "Z坐标", "125": "偏移量", "132": "椭圆度",
-    "140": "角度区域的评定值", "145": "表面光洁度", "149": "凹坑深度",
-    "150": "最大轮廓高度 Rz", "151": "轮廓总高度 Rt", "152": "算术平均偏差 Ra",
-    "153": "最大原始轮廓高度 Pt", "154": "轮廓峰高 Rk", "155": "缩减波峰高度",
-    "156": "缩减波谷深度", "157": "轮廓波纹深度 Wt", "158": "最大波纹深度 Wz",
-    "159": "基本粗糙度深度 Rmax", "160": "材料承载率 Pmr", "161": "材料比例 Mr1",
-    "162": "材料比例 Mr2", "170": "油槽深度", "171": "油槽角度", "172": "油槽节距",
-    "180": "平均主波纹度", "181": "最大主波纹度", "182": "主波纹长度",
-    "190": "粗糙单元平均深度", "191": "轮廓不规则性最大深度", "192": "粗糙单元平均宽度",
-    "193": "材料承载率 Rmr", "194": "材料比例 tp", "200": "距离", "201": "半径",
-    "202": "直径", "203": "角度", "204": "椭圆短轴", "205": "椭圆长轴", "206": "锥角",
-    "207": "内径", "208": "外径", "210": "球面测量杆", "211": "齿高/齿深",
-    "212": "参考圆柱上的齿厚", "214": "齿厚偏差（参考圆柱处）", "215": "齿厚变动量",
-    "216": "跨（k个）齿公法线长度", "220": "弹簧刚度", "230": "宽度",
-    "231": "垂直度（方形度）", "232": "最大直径", "233": "最小直径", "234": "平均直径",
-    "250": "温度 [°C]", "251": "温度 [F]", "255": "压力 [bar]", "260": "涂层厚度",
-    "270": "体积", "280": "质量", "282": "力", "285": "硬度", "290": "粘度",
-    "300": "不平衡量", "301": "扭矩", "302": "拧紧扭矩", "303": "附加扭矩",
-    "310": "二维坐标系（注释）", "311": "三维坐标系（注释）", "320": "旋转角度",
-    "350": "转速", "360": "角度误差", "362": "轮廓误差", "364": "速度误差",
-    "370": "形状偏差", "372": "形状增量", "380": "凸轮高度", "501": "电阻",
-    "502": "电容", "503": "电感", "504": "相位移", "505": "频率", "506": "电流强度",
-    "507": "电压", "508": "功率", "509": "场强", "601": "节距", "602": "节距误差",
-    "604": "累积节距偏差", "605": "累积节距误差", "606": "节距波动",
-    "607": "总节距误差", "608": "基节偏差", "609": "轴向节距偏差",
-    "610": "齿顶圆直径", "612": "齿根圆直径", "617": "参考圆柱上的槽宽",
-    "620": "齿向（线）", "621": "齿向形状误差", "630": "齿廓", "631": "齿廓形状误差",
-    "632": "齿廓角度偏差", "633": "齿廓扭曲", "640": "齿顶修缘", "641": "齿廓修鼓",
-    "642": "修鼓量", "643": "鼓形高度", "651": "齿线角度偏差", "652": "齿线扭曲",
-    "660": "径向跳动偏差", "661": "偏心量", "662": "摆差", "663": "同轴度",
-    "670": "双面啮合综合偏差", "671": "双面啮合一齿综合径向偏差",
-    "672": "接触跳动偏差", "673": "径向双球（柱）距", "674": "径向双滚柱距",
-    "675": "径向单球（柱）距", "676": "径向单滚柱距", "800": "时间", "805": "数量",
-    "820": "噪音", "910": "泄漏率", "950": "零件清洁度", "955": "残留粒子"
-}
 K2009_VALUE_TO_DISPLAY = K2009_OPTIONS
 K2009_DISPLAY_TO_VALUE = {v: k for k, v in K2009_OPTIONS.items()}
 
@@ -107,6 +69,22 @@ class MainWindow(QMainWindow):
         self.all_header_presets: List[Dict[str, str]] = []
         self.current_parameters_data: List[Dict[str, Any]] = []
         self.current_header_data: Dict[str, str] | None = None
+        # 参数下标 -> 数值校验问题列表 (见 core/parameter_validation.py)
+        self.parameter_issues: Dict[int, List[Dict[str, Any]]] = {}
+        # 与基准DFQ的对比 (见 core/parameter_diff.py)：基准文件、基准参数、参数下标 -> 对比结果、已删除的参数
+        self.diff_baseline_file: str | None = None
+        self.diff_baseline_parameters: List[Dict[str, Any]] = []
+        self.parameter_diff: Dict[int, Dict[str, Any]] = {}
+        self.removed_parameter_entries: List[Dict[str, Any]] = []
+        self.batch_thread: QThread | None = None
+        self.batch_worker: BatchGenerationWorker | None = None
+
+        write_behind_settings = config_manager.get_write_behind_settings()
+        self.write_behind_queue = WriteBehindQueue(
+            max_retries=int(write_behind_settings["MaxRetries"]),
+            initial_backoff=float(write_behind_settings["InitialBackoffSeconds"]),
+            max_backoff=float(write_behind_settings["MaxBackoffSeconds"]),
+            max_manual_retries=int(write_behind_settings["MaxManualRetries"]))
 
         self.tree_item_delegate = ReadOnlyColumnDelegate(self.ui.tree_preview)
         self.ui.tree_preview.setItemDelegate(self.tree_item_delegate)
@@ -122,6 +100,7 @@ class MainWindow(QMainWindow):
 
         self.setup_parameter_search_ui()
         self.setup_parameter_reorder_buttons()
+        self.setup_write_behind_status_ui()
 
         self.load_initial_config()
         self.connect_signals()
@@ -140,6 +119,19 @@ class MainWindow(QMainWindow):
         self.txt_param_search.setPlaceholderText("输入关键词...")
         self.txt_param_search.textChanged.connect(self.filter_preview_parameters)
         search_container_layout.addWidget(self.txt_param_search)
+        self.cmb_diff_filter = QComboBox()
+        self.cmb_diff_filter.addItem("全部参数", "")
+        for status in (parameter_diff.STATUS_ADDED, parameter_diff.STATUS_CHANGED, parameter_diff.STATUS_UNCHANGED,
+                       parameter_diff.STATUS_REMOVED):
+            self.cmb_diff_filter.addItem(parameter_diff.STATUS_LABELS[status], status)
+        self.cmb_diff_filter.setToolTip("按与基准DFQ的对比结果过滤参数")
+        self.cmb_diff_filter.setEnabled(False)
+        self.cmb_diff_filter.currentIndexChanged.connect(self.filter_preview_parameters)
+        search_container_layout.addWidget(self.cmb_diff_filter)
+        self.btn_compare_dfq = QPushButton("对比上次DFQ")
+        self.btn_compare_dfq.setToolTip("与输出目录中该零件/工站上次生成的DFQ对比 (找不到时手动选择DFQ文件)")
+        self.btn_compare_dfq.clicked.connect(self.compare_with_last_dfq)
+        search_container_layout.addWidget(self.btn_compare_dfq)
         if hasattr(self.ui, 'right_layout') and isinstance(self.ui.right_layout, QVBoxLayout):
             self.ui.right_layout.insertWidget(1, self.search_container_widget)
         else:
@@ -147,18 +139,18 @@ class MainWindow(QMainWindow):
 
     def filter_preview_parameters(self):
         search_term = self.txt_param_search.text().strip().lower()
-        logger.debug(f"filter_preview_parameters: 搜索词 '{search_term}'")
+        diff_filter = self.cmb_diff_filter.currentData() if self.diff_baseline_file else ""
+        logger.debug(f"filter_preview_parameters: 搜索词 '{search_term}'，对比过滤 '{diff_filter}'")
         if not self.ui.tree_preview.topLevelItemCount(): return
         root_item = self.ui.tree_preview.topLevelItem(0)
         if not root_item: return
-        params_root_node = None
-        for i in range(root_item.childCount()):
-            child = root_item.child(i)
-            if not child: continue
-            data = child.data(0, Qt.ItemDataRole.UserRole)
-            if data and data.get("type") == "parameter_group":
-                params_root_node = child
-                break
+        params_root_node = self._find_preview_group("parameter_group")
+        removed_root_node = self._find_preview_group("removed_parameter_group")
+        if removed_root_node:
+            removed_root_node.setHidden(diff_filter not in ("", parameter_diff.STATUS_REMOVED))
+            for i in range(removed_root_node.childCount()):
+                removed_node = removed_root_node.child(i)
+                removed_node.setHidden(bool(search_term) and search_term not in removed_node.text(0).lower())
         if not params_root_node:
             logger.debug("  未找到参数组节点。")
             return
@@ -174,7 +166,9 @@ class MainWindow(QMainWindow):
                 param_dict = self.current_parameters_data[param_list_idx]
                 k2001 = param_dict.get("K2001_val", "").lower()
                 k2002 = param_dict.get("K2002_val", "").lower()
-                if not search_term or search_term in k2001 or search_term in k2002:
+                diff_entry = self.parameter_diff.get(param_list_idx)
+                diff_matched = not diff_filter or (diff_entry is not None and diff_entry["status"] == diff_filter)
+                if diff_matched and (not search_term or search_term in k2001 or search_term in k2002):
                     param_main_node.setHidden(False)
                 else:
                     param_main_node.setHidden(True)
@@ -184,6 +178,16 @@ class MainWindow(QMainWindow):
                     f"搜索时，UI参数节点 {param_main_node.text(0)} 的 param_list_index ({param_list_idx}) 无效。")
         logger.debug("参数过滤完成。")
 
+    def _find_preview_group(self, group_type: str) -> QTreeWidgetItem | None:
+        if not self.ui.tree_preview.topLevelItemCount(): return None
+        root_item = self.ui.tree_preview.topLevelItem(0)
+        for i in range(root_item.childCount()):
+            child = root_item.child(i)
+            data = child.data(0, Qt.ItemDataRole.UserRole) if child else None
+            if data and data.get("type") == group_type:
+                return child
+        return None
+
     def setup_parameter_reorder_buttons(self):
         logger.debug("setup_parameter_reorder_buttons 调用")
         self.reorder_buttons_widget = QWidget()
@@ -259,6 +263,62 @@ class MainWindow(QMainWindow):
                     logger.debug(f"重新选中并滚动到移动后的参数: {moved_item_in_tree.text(0)}")
         self.update_status(f"参数已{'上移' if direction == -1 else '下移'}。")
 
+    def setup_write_behind_status_ui(self):
+        logger.debug("setup_write_behind_status_ui 调用")
+        self.lbl_write_behind_status = QLabel("")
+        self.ui.statusbar.addPermanentWidget(self.lbl_write_behind_status)
+        self.btn_retry_failed_writes = QPushButton("重试失败写入")
+        self.btn_retry_failed_writes.setVisible(False)
+        self.btn_retry_failed_writes.clicked.connect(self.retry_failed_writes)
+        self.ui.statusbar.addPermanentWidget(self.btn_retry_failed_writes)
+        self.write_behind_timer = QTimer(self)
+        self.write_behind_timer.setInterval(500)
+        self.write_behind_timer.timeout.connect(self.poll_write_behind_queue)
+        self.write_behind_timer.start()
+
+    def poll_write_behind_queue(self):
+        finished_jobs = self.write_behind_queue.pop_finished()
+        for job in finished_jobs:
+            context = job.get("context", {})
+            if job["status"] == JOB_STATUS_DONE:
+                output_manifest.append_manifest_records(job["output_path"], [output_manifest.build_manifest_record(
+                    output_manifest.new_batch_id(), job["output_path"], job["output_file"],
+                    context.get("source_files", []), job["header"], context.get("parameter_count", 0),
+                    context.get("bytes", 0), context.get("sha256", ""),
+                    time.perf_counter() - context.get("started_at", time.perf_counter()))])
+                lint_result = job.get("lint")
+                if job.get("export_errors"):
+                    self.update_status(f"DFQ文件已生成: {os.path.basename(job['output_file'])}，"
+                                       f"{'；'.join(job['export_errors'])}", is_error=True)
+                elif lint_result and lint_result["issues"]:
+                    self.update_status(f"DFQ文件已生成: {os.path.basename(job['output_file'])}，"
+                                       f"校验发现问题: {dfq_lint.describe_result(lint_result)}",
+                                       is_error=bool(lint_result["error_count"]))
+                else:
+                    self.update_status(f"DFQ文件已生成: {os.path.basename(job['output_file'])}")
+            else:
+                self.update_status(f"DFQ写入失败 (任务 {job['job_id']}): {job['error']}", is_error=True)
+                hint = "可点击状态栏中的“重试失败写入”再次尝试。" if job.get("retryable") else \
+                    "已达到手动重试次数上限，请检查输出目录后重新生成。"
+                QMessageBox.critical(self, "生成DFQ错误",
+                                     f"DFQ文件在重试 {job['attempts']} 次后仍写入失败:\n{job['error']}\n{hint}")
+        if finished_jobs:
+            self.update_write_behind_status()
+
+    def update_write_behind_status(self):
+        pending_count = self.write_behind_queue.pending_count()
+        failed_count = len(self.write_behind_queue.failed_jobs())
+        if pending_count or failed_count:
+            self.lbl_write_behind_status.setText(f"待写入: {pending_count} | 写入失败: {failed_count}")
+        else:
+            self.lbl_write_behind_status.setText("")
+        self.btn_retry_failed_writes.setVisible(self.write_behind_queue.has_retryable_failures())
+
+    def retry_failed_writes(self):
+        retried_count = self.write_behind_queue.retry_failed()
+        self.update_status(f"已重新提交 {retried_count} 个失败的写入任务。")
+        self.update_write_behind_status()
+
     def load_initial_config(self):
         logger.debug("load_initial_config 调用。")
         self.ui.txt_output_path.setText(self.current_config.get("OutputPath", ""))
@@ -285,6 +345,7 @@ class MainWindow(QMainWindow):
             self.ui.btn_manage_settings.clicked.connect(self.open_settings_dialog)
             self.ui.btn_preview.clicked.connect(self.preview_dfq)
             self.ui.btn_generate_dfq.clicked.connect(self.generate_dfq)
+            self.ui.btn_generate_multi_header.clicked.connect(self.generate_dfq_multi_header)
             self.ui.txt_header_search.textChanged.connect(self.filter_header_combobox)
             self.ui.btn_header_search_reset.clicked.connect(self.reset_header_search)
             self.ui.cmb_header_select.currentIndexChanged.connect(self.on_header_selection_changed)
@@ -411,7 +472,9 @@ class MainWindow(QMainWindow):
         try:
             start_path = self.current_config.get("LastExcelImportPath", "") or os.path.expanduser("~")
             file_paths, _ = QFileDialog.getOpenFileNames(
-                self, "选择 Excel 文件", start_path, "Excel 文件 (*.xlsx *.xls)"
+                self, "选择 Excel 文件", start_path,
+                "测量数据文件 (*.xlsx *.xls *.csv *.tsv *.dfq);;Excel 文件 (*.xlsx *.xls);;CSV/TSV 文件 (*.csv *.tsv);;"
+                "DFQ 文件 (重新导入编辑) (*.dfq)"
             )
             logger.debug(f"QFileDialog.getOpenFileNames 返回的原始 file_paths: {file_paths}")
         except Exception as e:
@@ -497,6 +560,7 @@ class MainWindow(QMainWindow):
             logger.info("预览树和当前参数数据已清除 (抬头数据保留)。")
         if hasattr(self, 'txt_param_search'):
             self.txt_param_search.clear()
+        self.clear_parameter_diff()
         self.update_status("预览数据已清除。")
 
     def browse_output_path(self):
@@ -575,7 +639,15 @@ class MainWindow(QMainWindow):
                     (not self.imported_excel_files and self.current_parameters_data):
                 if not self.imported_excel_files and self.current_parameters_data: self.current_parameters_data = []
                 if self.imported_excel_files:
-                    parameters, errors = excel_processor.read_excel_files(self.imported_excel_files)
+                    parameters, errors = excel_processor.read_excel_files(
+                        self.imported_excel_files,
+                        isolation_settings=config_manager.get_parse_isolation_settings(),
+                        source_cache_settings=config_manager.get_source_cache_settings(),
+                        sheet_selection=config_manager.get_sheet_selection_settings(),
+                        reader_backend=config_manager.get_reader_backend(),
+                        layout_settings=config_manager.get_table_layout_settings(),
+                        classification_settings=config_manager.get_classification_settings(),
+                        measurement_settings=config_manager.get_measured_values_settings())
                     if errors: QMessageBox.critical(self, "Excel 处理错误",
                                                     "Excel 处理过程中遇到以下错误:\n" + "\n".join(errors))
                     processed_parameters = []
@@ -583,6 +655,10 @@ class MainWindow(QMainWindow):
                         for p_data in parameters:
                             if 'selected_for_output' not in p_data: p_data['selected_for_output'] = True
                             processed_parameters.append(p_data)
+                    processed_parameters, remembered_count = edit_memory.apply_edit_memory(
+                        processed_parameters, self.current_header_data, config_manager.get_edit_memory_settings())
+                    if remembered_count:
+                        logger.info(f"按编辑记忆恢复了 {remembered_count}/{len(processed_parameters)} 个参数的设置。")
                     self.current_parameters_data = processed_parameters
                     self.update_status(
                         f"已加载 {len(self.current_parameters_data)} 个参数。" if self.current_parameters_data else "未找到参数或处理失败。",
@@ -634,6 +710,8 @@ class MainWindow(QMainWindow):
                 else:
                     item.setFlags(current_flags & ~Qt.ItemFlag.ItemIsEditable)
 
+            self.parameter_issues = parameter_validation.group_issues_by_index(
+                parameter_validation.validate_parameters(self.current_parameters_data))
             if self.current_parameters_data:
                 params_root_node_text = "参数列表"
                 params_root_node = QTreeWidgetItem(root_item, [params_root_node_text, ""])
@@ -745,9 +823,22 @@ class MainWindow(QMainWindow):
                             f"      populate_preview_tree: NL {nl_k_key} for param {i}, tol='{corresponding_tol_value_in_data}', "
                             f"enabled={cb.isEnabled()}, checked={cb.isChecked()}, model_NL_val='{param_data[nl_k_key]}'"
                         )
+                    self.apply_validation_marks(param_node, i)
+
+            if self.diff_baseline_file:
+                removed_root_node = QTreeWidgetItem(root_item, ["已删除的参数", ""])
+                removed_root_node.setData(0, Qt.ItemDataRole.UserRole, {"type": "removed_parameter_group"})
+                removed_root_node.setFlags(removed_root_node.flags() & ~Qt.ItemFlag.ItemIsEditable)
+                self.refresh_parameter_diff()
 
             self.ui.tree_preview.expandAll()
-            self.update_status("DFQ 结构预览已填充/更新。")
+            error_count, warning_count = parameter_validation.count_issues(
+                [issue for issues in self.parameter_issues.values() for issue in issues])
+            if error_count or warning_count:
+                self.update_status(f"DFQ 结构预览已填充/更新。数值校验: {error_count} 个错误，{warning_count} 个警告 "
+                                   f"(已标记在对应参数上)。", is_error=bool(error_count))
+            else:
+                self.update_status("DFQ 结构预览已填充/更新。")
         except Exception as e:
             logger.critical(f"populate_preview_tree 执行期间发生错误: {e}", exc_info=True)
             QMessageBox.critical(self, "预览错误", f"生成预览树时发生错误: {e}")
@@ -777,6 +868,8 @@ class MainWindow(QMainWindow):
             update_message = f"参数 {param_list_index + 1} 的 {k_value_key.replace('_val', '')} 更新为 '{selected_value_idx_str}' ({display_text})"
             logger.info(update_message)
             self.update_status(update_message)
+            if self.diff_baseline_file:
+                self.refresh_parameter_diff()
         else:
             logger.debug("  Combobox 值未改变。")
 
@@ -839,6 +932,8 @@ class MainWindow(QMainWindow):
                     self.update_status(
                         f"参数 {param_list_idx + 1} 输出状态: {'选中' if is_selected_new_ui_state else '未选中'}")
                     self.update_k0100_in_tree()
+                    if self.diff_baseline_file:
+                        self.refresh_parameter_diff()
 
     def update_k0100_in_tree(self):
         logger.debug("update_k0100_in_tree 调用。")
@@ -903,12 +998,148 @@ class MainWindow(QMainWindow):
                                                                                          f"参数 {p_idx + 1}: {new_value_str}")
                         if (k_key == "K2113_val" or k_key == "K2112_val") and item.parent():
                             self.refresh_natural_limit_checkbox_state_for_param(item.parent(), p_idx)
+                        if k_key in ("K2101_val", "K2113_val", "K2112_val") and item.parent():
+                            self.revalidate_parameter(item.parent(), p_idx)
+                        if self.diff_baseline_file and \
+                                (k_key == "K2001_val" or any(k_key == f for f, _ in parameter_diff.DIFF_FIELDS)):
+                            self.refresh_parameter_diff()
             if update_message: self.update_status(update_message); logger.info(f"数据更新: {update_message}")
         except Exception as e:
             logger.critical(f"handle_tree_item_changed error: {e}", exc_info=True)
         finally:
             self.ui.tree_preview.blockSignals(False)
 
+    def compare_with_last_dfq(self):
+        """与该零件/工站上次生成的DFQ (按输出目录清单查找，找不到时由用户选择) 对比，在预览中标记新增/删除/变化的参数。"""
+        logger.info("compare_with_last_dfq 调用。")
+        if not self._ensure_data_loaded_for_action() or not self.current_parameters_data:
+            QMessageBox.information(self, "无参数数据", "请先导入并处理Excel文件。")
+            return
+        output_dir = self.ui.txt_output_path.text()
+        baseline_file = parameter_diff.find_baseline_for(output_dir, self.current_header_data)
+        if not baseline_file:
+            baseline_file, _ = QFileDialog.getOpenFileName(
+                self, "输出目录中没有该零件/工站已生成的DFQ，请选择基准DFQ文件", output_dir or os.path.expanduser("~"),
+                "DFQ 文件 (*.dfq);;所有文件 (*)")
+            if not baseline_file:
+                return
+        _, baseline_parameters, errors = dfq_reader.read_dfq_file(baseline_file)
+        if errors:
+            QMessageBox.warning(self, "读取基准DFQ", "读取基准DFQ时遇到以下问题:\n" + "\n".join(errors[:20]))
+        if not baseline_parameters:
+            self.update_status(f"基准DFQ中没有参数: {os.path.basename(baseline_file)}", is_error=True)
+            return
+        self.diff_baseline_file = baseline_file
+        self.diff_baseline_parameters = baseline_parameters
+        self.cmb_diff_filter.setEnabled(True)
+        self.populate_preview_tree()
+        diff_entries = list(self.parameter_diff.values()) + self.removed_parameter_entries
+        self.update_status(f"与 {os.path.basename(baseline_file)} 对比: {parameter_diff.summarize_diff(diff_entries)}",
+                           duration=10000)
+
+    def clear_parameter_diff(self):
+        self.diff_baseline_file = None
+        self.diff_baseline_parameters = []
+        self.parameter_diff = {}
+        self.removed_parameter_entries = []
+        if hasattr(self, 'cmb_diff_filter'):
+            self.cmb_diff_filter.setCurrentIndex(0)
+            self.cmb_diff_filter.setEnabled(False)
+
+    def refresh_parameter_diff(self):
+        """重新对比选中输出的参数与基准 (O(n))，并更新预览中的标记与已删除参数列表。"""
+        selected_indices = [i for i, p in enumerate(self.current_parameters_data) if p.get('selected_for_output', True)]
+        entries = parameter_diff.diff_parameters([self.current_parameters_data[i] for i in selected_indices],
+                                                 self.diff_baseline_parameters)
+        self.parameter_diff = {selected_indices[e["index"]]: e for e in entries if e["index"] is not None}
+        self.removed_parameter_entries = [e for e in entries if e["status"] == parameter_diff.STATUS_REMOVED]
+
+        params_root_node = self._find_preview_group("parameter_group")
+        if params_root_node:
+            for i in range(params_root_node.childCount()):
+                param_main_node = params_root_node.child(i)
+                item_data = param_main_node.data(0, Qt.ItemDataRole.UserRole)
+                if item_data and item_data.get("type") == "parameter_main":
+                    self.apply_diff_mark(param_main_node, self.parameter_diff.get(item_data.get("param_list_index")))
+        removed_root_node = self._find_preview_group("removed_parameter_group")
+        if removed_root_node:
+            removed_root_node.takeChildren()
+            removed_root_node.setText(0, f"已删除的参数 ({len(self.removed_parameter_entries)}，"
+                                         f"相对 {os.path.basename(self.diff_baseline_file)})")
+            for entry in self.removed_parameter_entries:
+                baseline_param = self.diff_baseline_parameters[entry["baseline_index"]]
+                removed_node = QTreeWidgetItem(removed_root_node, [entry["name"], parameter_diff.STATUS_LABELS[
+                    parameter_diff.STATUS_REMOVED]])
+                removed_node.setData(0, Qt.ItemDataRole.UserRole, {"type": "removed_parameter"})
+                removed_node.setFlags(removed_node.flags() & ~Qt.ItemFlag.ItemIsEditable)
+                removed_node.setToolTip(0, "；".join(f"{label}: {baseline_param.get(k_key, '')}"
+                                                     for k_key, label in parameter_diff.DIFF_FIELDS))
+                removed_node.setData(1, Qt.ItemDataRole.ForegroundRole, QColor("gray"))
+        self.filter_preview_parameters()
+
+    def apply_diff_mark(self, param_main_node: QTreeWidgetItem, entry: Dict[str, Any] | None):
+        """在参数节点的值列显示对比结果 (新增为绿色，变化为蓝色并提示变化的K值)。"""
+        status = entry["status"] if entry else None
+        text = parameter_diff.STATUS_LABELS[status] if status and status != parameter_diff.STATUS_UNCHANGED else ""
+        color = {parameter_diff.STATUS_ADDED: QColor("green"), parameter_diff.STATUS_CHANGED: QColor("blue")}.get(status)
+        param_main_node.setText(1, text)
+        param_main_node.setData(1, Qt.ItemDataRole.ForegroundRole, color)
+        param_main_node.setToolTip(1, parameter_diff.describe_changes(entry) if entry else "")
+
+    def apply_validation_marks(self, param_main_node: QTreeWidgetItem, param_list_index: int):
+        """按数值校验结果为参数节点及对应的K值项设置颜色和提示 (错误为红色，警告为橙色)。"""
+        issues = self.parameter_issues.get(param_list_index, [])
+        has_error = any(issue["severity"] == parameter_validation.SEVERITY_ERROR for issue in issues)
+        color = QColor("red") if has_error else QColor("darkorange") if issues else None
+        param_main_node.setData(0, Qt.ItemDataRole.ForegroundRole, color)
+        param_main_node.setToolTip(0, "\n".join(issue["message"] for issue in issues))
+        for i in range(param_main_node.childCount()):
+            child_item = param_main_node.child(i)
+            child_item_data = child_item.data(0, Qt.ItemDataRole.UserRole) if child_item else None
+            if not (child_item_data and child_item_data.get("type") == "parameter_k_value"):
+                continue
+            field_issues = [issue for issue in issues if issue["k_key"] == child_item_data.get("k_key")]
+            field_has_error = any(issue["severity"] == parameter_validation.SEVERITY_ERROR for issue in field_issues)
+            child_item.setData(1, Qt.ItemDataRole.ForegroundRole,
+                               QColor("red") if field_has_error else QColor("darkorange") if field_issues else None)
+            child_item.setToolTip(1, "\n".join(issue["message"] for issue in field_issues))
+
+    def revalidate_parameter(self, param_main_node: QTreeWidgetItem, param_list_index: int):
+        """只重新校验被编辑的参数。"""
+        issues = parameter_validation.validate_parameter(self.current_parameters_data[param_list_index],
+                                                         param_list_index)
+        if issues:
+            self.parameter_issues[param_list_index] = issues
+            self.update_status(f"参数 {param_list_index + 1}: " + "；".join(issue["message"] for issue in issues),
+                               is_error=any(issue["severity"] == parameter_validation.SEVERITY_ERROR
+                                            for issue in issues), duration=8000)
+        else:
+            self.parameter_issues.pop(param_list_index, None)
+        self.apply_validation_marks(param_main_node, param_list_index)
+
+    def confirm_parameter_validation(self, parameters_to_output: List[Dict[str, Any]]) -> bool:
+        """生成前校验所有要输出的参数：有错误时按配置阻止生成或询问是否继续，只有警告时记录后继续。"""
+        issues = parameter_validation.validate_parameters(parameters_to_output)
+        if not issues:
+            return True
+        error_count, warning_count = parameter_validation.count_issues(issues)
+        lines = [f"参数 '{parameters_to_output[issue['index']].get('K2001_val', '')}': {issue['message']}"
+                 for issue in issues]
+        for line in lines:
+            logger.warning(f"数值校验: {line}")
+        if not error_count:
+            self.update_status(f"数值校验: {warning_count} 个警告，详见日志。")
+            return True
+        details = "\n".join(lines[:20]) + (f"\n... 共 {len(lines)} 项" if len(lines) > 20 else "")
+        summary = f"发现 {error_count} 个错误、{warning_count} 个警告，qs-STAT 可能无法导入生成的DFQ文件:\n\n{details}"
+        if config_manager.get_parameter_validation_settings()["OnError"] == "block":
+            QMessageBox.critical(self, "参数数值校验失败", summary + "\n\n请修正后再生成。")
+            return False
+        answer = QMessageBox.question(self, "参数数值校验", summary + "\n\n仍要生成吗？",
+                                      QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                                      QMessageBox.StandardButton.No)
+        return answer == QMessageBox.StandardButton.Yes
+
     def refresh_natural_limit_checkbox_state_for_param(self, param_main_node: QTreeWidgetItem, param_list_index: int):
         logger.info(f"refresh_natural_limit_checkbox_state_for_param: 参数索引 {param_list_index}")
         if not (param_main_node and 0 <= param_list_index < len(self.current_parameters_data)):
@@ -1002,6 +1233,10 @@ class MainWindow(QMainWindow):
         logger.info("generate_dfq: 开始生成DFQ文件操作。")
         try:
             if not self._validate_inputs(for_generation=True): return
+            generation_mode = self.ui.cmb_generation_mode.currentData()
+            if generation_mode in (batch_processor.BATCH_MODE_PER_FILE, batch_processor.BATCH_MODE_PER_HEADER):
+                self.start_batch_generation(generation_mode)
+                return
             if not self._ensure_data_loaded_for_action():
                 self.update_status("DFQ 生成取消，数据准备失败。", is_error=True);
                 return
@@ -1016,24 +1251,229 @@ class MainWindow(QMainWindow):
             elif not parameters_to_output and not self.imported_excel_files:
                 QMessageBox.information(self, "无参数数据", "请先导入并处理Excel文件。");
                 return
+            if not self.confirm_parameter_validation(parameters_to_output):
+                self.update_status("DFQ 生成取消，参数数值校验未通过。", is_error=True)
+                return
+            self.remember_parameter_edits([self.current_header_data])
 
-            dfq_content = dfq_writer.generate_dfq_content(parameters_to_output, self.current_header_data)
+            started_at = time.perf_counter()
+            # DFQ 与配置的附加格式在一次参数遍历中同时生成
+            export_outputs, content_hash = export_formats.export_parameters(
+                parameters_to_output, self.current_header_data, config_manager.get_export_formats())
+            dfq_bytes = export_outputs[export_formats.FORMAT_DFQ]
             output_dir = self.ui.txt_output_path.text()
-            success, message_or_filepath = dfq_writer.write_dfq_file(output_dir, dfq_content,
-                                                                     self.current_header_data)
-
-            if success:
-                QMessageBox.information(self, "成功", f"DFQ文件已成功生成:\n{message_or_filepath}")
-                self.update_status(f"DFQ文件已生成: {os.path.basename(message_or_filepath)}")
-            else:
-                QMessageBox.critical(self, "生成DFQ错误", f"生成DFQ文件失败:\n{message_or_filepath}")
-                self.update_status(f"DFQ生成失败: {message_or_filepath}", is_error=True)
+            if not self.ui.chk_force_regenerate.isChecked() and \
+                    self.handle_duplicate_output(output_dir, content_hash, parameters_to_output, dfq_bytes, started_at):
+                return
+            job_context = self._build_write_job_context(len(parameters_to_output), dfq_bytes, content_hash,
+                                                        started_at)
+            job_id = self.write_behind_queue.submit(output_dir, dfq_bytes, self.current_header_data, job_context,
+                                                    export_outputs)
+            self.update_status(f"DFQ文件已提交后台写入 (任务 {job_id})。")
+            self.update_write_behind_status()
         except Exception as e:
             logger.critical(f"generate_dfq 执行期间发生严重错误: {e}", exc_info=True)
             QMessageBox.critical(self, "生成错误", f"生成DFQ文件时发生未知错误: {e}")
 
+    def remember_parameter_edits(self, header_infos: List[Dict[str, str]]):
+        """将当前参数的最终设置记入编辑记忆，下次导入同一零件/工站的文件时自动恢复。"""
+        if not config_manager.get_edit_memory_settings().get("Enabled", True):
+            return
+        for header_info in header_infos:
+            edit_memory.record_edits(header_info, self.current_parameters_data)
+
+    def handle_duplicate_output(self, output_dir: str, content_hash: str, parameters_to_output: List[Dict[str, Any]],
+                                dfq_bytes: bytes, started_at: float) -> bool:
+        """内容与近期输出相同时询问用户。返回 True 表示已处理 (跳过或硬链接)，无需再写入。"""
+        if self._is_output_pending(output_dir, content_hash):
+            self.update_status("内容相同的DFQ文件正在等待后台写入，已跳过本次生成。")
+            return True
+        existing_file = output_index.find_recent_output(output_dir, content_hash)
+        if not existing_file:
+            return False
+        duplicate_action = config_manager.get_duplicate_output_action()
+        action_text = "创建硬链接" if duplicate_action == "link" else "跳过本次生成"
+        reply = QMessageBox.question(self, "内容重复",
+                                     f"输出目录中已有内容完全相同的DFQ文件:\n{os.path.basename(existing_file)}\n\n"
+                                     f"选择“是”强制重新生成，选择“否”{action_text}。",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                                     QMessageBox.StandardButton.No)
+        if reply == QMessageBox.StandardButton.Yes:
+            logger.info(f"用户选择强制重新生成，忽略已有文件 {existing_file}")
+            return False
+        self.update_status(self._apply_duplicate_output_action(
+            output_dir, existing_file, self.current_header_data, content_hash, len(parameters_to_output),
+            dfq_bytes, started_at))
+        return True
+
+    def _is_output_pending(self, output_dir: str, content_hash: str) -> bool:
+        return any(job["output_path"] == output_dir and job["context"].get("content_hash") == content_hash
+                   for job in self.write_behind_queue.pending_jobs())
+
+    def _build_write_job_context(self, parameter_count: int, dfq_bytes: bytes, content_hash: str,
+                                 started_at: float) -> Dict[str, Any]:
+        """后台写入任务的上下文 (清单记录字段及写入时使用的校验、输出目录布局设置)。"""
+        return {
+            "source_files": list(self.imported_excel_files), "parameter_count": parameter_count,
+            "bytes": len(dfq_bytes), "sha256": output_manifest.sha256_of_bytes(dfq_bytes),
+            "content_hash": content_hash, "started_at": started_at,
+            "DfqLint": config_manager.get_dfq_lint_settings(),
+            "OutputLayout": config_manager.get_output_layout_settings()
+        }
+
+    def _apply_duplicate_output_action(self, output_dir: str, existing_file: str, header_info: Dict[str, str],
+                                       content_hash: str, parameter_count: int, dfq_bytes: bytes,
+                                       started_at: float) -> str:
+        """按配置对重复内容执行跳过或硬链接，返回状态栏提示信息。"""
+        if config_manager.get_duplicate_output_action() == "link":
+            success, message_or_filepath = dfq_writer.link_existing_dfq(
+                output_dir, existing_file, header_info, config_manager.get_output_layout_settings()["Subdirectory"])
+            if success:
+                output_index.record_output(output_dir, content_hash, message_or_filepath)
+                output_manifest.append_manifest_records(output_dir, [output_manifest.build_manifest_record(
+                    output_manifest.new_batch_id(), output_dir, message_or_filepath, self.imported_excel_files,
+                    header_info, parameter_count, len(dfq_bytes), output_manifest.sha256_of_bytes(dfq_bytes),
+                    time.perf_counter() - started_at)])
+                return f"内容重复，已创建硬链接: {os.path.basename(message_or_filepath)}"
+            logger.warning(f"硬链接失败，改为跳过: {message_or_filepath}")
+        return f"内容重复，已跳过生成 (已有文件: {os.path.basename(existing_file)})。"
+
+    def generate_dfq_multi_header(self):
+        logger.info("generate_dfq_multi_header: 开始多抬头生成操作。")
+        try:
+            if not self._validate_inputs(for_generation=True): return
+            if not self._ensure_data_loaded_for_action():
+                self.update_status("DFQ 生成取消，数据准备失败。", is_error=True)
+                return
+            parameters_to_output = [p for p in self.current_parameters_data if p.get('selected_for_output', True)]
+            if not parameters_to_output:
+                QMessageBox.information(self, "无参数选中", "没有参数被选中输出，无法生成DFQ文件。")
+                return
+            if not self.confirm_parameter_validation(parameters_to_output):
+                self.update_status("DFQ 生成取消，参数数值校验未通过。", is_error=True)
+                return
+            if not self.all_header_presets:
+                self.all_header_presets = config_manager.get_system_settings()
+            dialog = HeaderMultiSelectDialog(self.all_header_presets, self)
+            if not dialog.exec():
+                logger.info("多抬头选择对话框被取消。")
+                return
+            selected_headers = dialog.selected_headers()
+            self.remember_parameter_edits(selected_headers)
+
+            started_at = time.perf_counter()
+            output_dir = self.ui.txt_output_path.text()
+            force = self.ui.chk_force_regenerate.isChecked()
+            submitted_count = 0
+            duplicate_messages = []
+            # DFQ 参数部分只编码一次；附加格式含各自的抬头，所有抬头的写出器在一次参数遍历中同时生成
+            extra_formats = [f for f in config_manager.get_export_formats() if f != export_formats.FORMAT_DFQ]
+            extra_outputs = export_formats.export_parameters_for_headers(
+                parameters_to_output, selected_headers, extra_formats) if extra_formats else None
+            for header_index, (header_info, dfq_bytes, content_hash) in enumerate(
+                    dfq_writer.generate_dfq_fanout(parameters_to_output, selected_headers)):
+                if not force and self._is_output_pending(output_dir, content_hash):
+                    duplicate_messages.append(f"{header_info.get('K1001', '')}: 内容相同的文件正在等待写入，已跳过。")
+                    continue
+                existing_file = None if force else output_index.find_recent_output(output_dir, content_hash)
+                if existing_file:
+                    duplicate_messages.append(self._apply_duplicate_output_action(
+                        output_dir, existing_file, header_info, content_hash, len(parameters_to_output),
+                        dfq_bytes, started_at))
+                    continue
+                job_context = self._build_write_job_context(len(parameters_to_output), dfq_bytes, content_hash,
+                                                            started_at)
+                export_outputs = extra_outputs[header_index] if extra_outputs else None
+                self.write_behind_queue.submit(output_dir, dfq_bytes, header_info, job_context, export_outputs)
+                submitted_count += 1
+            for message in duplicate_messages:
+                logger.info(f"多抬头生成: {message}")
+            self.update_status(f"多抬头生成: 已提交 {submitted_count} 个DFQ文件后台写入，"
+                               f"{len(duplicate_messages)} 个内容重复未重新写入。")
+            self.update_write_behind_status()
+        except Exception as e:
+            logger.critical(f"generate_dfq_multi_header 执行期间发生严重错误: {e}", exc_info=True)
+            QMessageBox.critical(self, "生成错误", f"多抬头生成DFQ文件时发生未知错误: {e}")
+
+    def start_batch_generation(self, generation_mode: str):
+        logger.info(f"start_batch_generation: 模式 {generation_mode}，文件数 {len(self.imported_excel_files)}")
+        if self.batch_thread is not None:
+            QMessageBox.information(self, "批量生成中", "已有批量生成任务正在运行，请等待其完成。")
+            return
+        if not self.all_header_presets:
+            self.all_header_presets = config_manager.get_system_settings()
+        fallback_header = self.current_header_data or self._get_selected_header_info_from_combobox()
+
+        self.batch_thread = QThread(self)
+        self.batch_worker = BatchGenerationWorker(self.imported_excel_files, self.ui.txt_output_path.text(),
+                                                  self.all_header_presets, fallback_header, generation_mode,
+                                                  force=self.ui.chk_force_regenerate.isChecked(),
+                                                  resume=self.ui.chk_resume_batch.isChecked())
+        self.batch_worker.moveToThread(self.batch_thread)
+        self.batch_thread.started.connect(self.batch_worker.run)
+        self.batch_worker.progress.connect(self.on_batch_generation_progress)
+        self.batch_worker.finished.connect(self.on_batch_generation_finished)
+        self.batch_worker.finished.connect(self.batch_thread.quit)
+
+        self.ui.progress_batch.setRange(0, 0)
+        self.ui.progress_batch.setValue(0)
+        self.ui.progress_batch.setVisible(True)
+        self.ui.btn_generate_dfq.setEnabled(False)
+        self.update_status("批量生成已开始...", duration=0)
+        self.batch_thread.start()
+
+    def on_batch_generation_progress(self, done: int, total: int, result: dict):
+        self.ui.progress_batch.setRange(0, total)
+        self.ui.progress_batch.setValue(done)
+        source_name = os.path.basename(result["source_files"][0]) if result.get("source_files") else ""
+        self.update_status(f"批量生成进度 {done}/{total}: {source_name} {'成功' if result.get('success') else '失败'}",
+                           duration=0)
+
+    def on_batch_generation_finished(self, results: list):
+        logger.info(f"on_batch_generation_finished: 共 {len(results)} 个任务结果。")
+        self.ui.progress_batch.setVisible(False)
+        self.ui.btn_generate_dfq.setEnabled(True)
+        if self.batch_thread is not None:
+            self.batch_thread.wait()
+            self.batch_thread.deleteLater()
+        self.batch_thread = None
+        self.batch_worker = None
+
+        success_count = sum(1 for r in results if r.get("success"))
+        failed_count = len(results) - success_count
+        report_lines = []
+        for r in results:
+            sources = ", ".join(os.path.basename(f) for f in r.get("source_files", []))
+            if r.get("skipped"):
+                report_lines.append(f"[跳过] {sources}: {r.get('message', '')}")
+            elif r.get("success"):
+                report_lines.append(f"[成功] {sources} -> {os.path.basename(r.get('output_file', ''))} "
+                                    f"({r.get('parameter_count', 0)} 个参数, {r.get('duration', 0.0):.2f}s)")
+            else:
+                report_lines.append(f"[失败] {sources}: {r.get('message', '')}")
+        msg_box = QMessageBox(self)
+        msg_box.setIcon(QMessageBox.Icon.Information if failed_count == 0 else QMessageBox.Icon.Warning)
+        msg_box.setWindowTitle("批量生成完成")
+        msg_box.setText(f"批量生成完成：成功 {success_count} 个，失败 {failed_count} 个。")
+        msg_box.setDetailedText("\n".join(report_lines))
+        msg_box.exec()
+        self.update_status(f"批量生成完成：成功 {success_count}，失败 {failed_count}。", is_error=failed_count > 0)
+
     def closeEvent(self, event):
         logger.info("closeEvent: 应用程序正在关闭...")
+        if self.batch_thread is not None:
+            logger.info("等待批量生成线程结束...")
+            self.batch_thread.wait()
+        pending_count = self.write_behind_queue.pending_count()
+        if pending_count:
+            reply = QMessageBox.question(self, "仍有待写入文件",
+                                         f"仍有 {pending_count} 个DFQ文件等待写入输出目录。\n"
+                                         f"是否等待写入完成后再退出？(选择“否”将放弃这些文件)",
+                                         QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                                         QMessageBox.StandardButton.Yes)
+            self.write_behind_queue.shutdown(wait=(reply == QMessageBox.StandardButton.Yes))
+        else:
+            self.write_behind_queue.shutdown(wait=False)
         try:
             config_to_save = config_manager.load_config()
             config_to_save["LastExcelImportPath"] = self.current_config.get("LastExcelImportPath", "")
@@ -0,0 +1,73 @@
+# backend_main.py
+# 读取后端工具 (无界面)：
+#   python backend_main.py list                          列出已安装的读取后端
+#   python backend_main.py conformance [文件或目录...]    检查各后端提取的参数记录是否与参考实现 (pandas) 一致
+#   python backend_main.py benchmark <文件或目录...>      测速并保存排名，ReaderBackend 为 "auto" 时据此选择最快的后端
+import argparse
+import logging
+import sys
+import tempfile
+
+from core import config_manager, excel_processor, reader_backends, reader_conformance
+from core.cli_support import setup_cli_logging, collect_source_files
+
+LOG_FILENAME = 'backend_trace.log'
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="工作簿读取后端的一致性检查与测速。")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="列出已安装的读取后端")
+    conformance_parser = subparsers.add_parser("conformance", help="检查各后端与参考实现的一致性")
+    conformance_parser.add_argument("paths", nargs="*", help="额外的样本文件或目录 (内置边界样本总会参与检查)")
+    benchmark_parser = subparsers.add_parser("benchmark", help="测速并保存后端排名")
+    benchmark_parser.add_argument("paths", nargs="+", help="用于测速的样本文件或目录")
+    benchmark_parser.add_argument("--repeat", type=int, default=3, help="每个后端重复读取的次数 (取最快一次)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    setup_cli_logging(LOG_FILENAME)
+    sheet_selection = config_manager.get_sheet_selection_settings()
+    layout_settings = config_manager.get_table_layout_settings()
+
+    if args.command == "list":
+        for backend in reader_backends.available_backends():
+            logging.info(f"可用读取后端: {backend.name} ({', '.join(backend.extensions)})")
+        return 0
+
+    file_paths = collect_source_files(args.paths, excel_processor.SUPPORTED_EXTENSIONS)
+    if args.command == "conformance":
+        with tempfile.TemporaryDirectory() as sample_dir:
+            sample_paths = reader_conformance.build_conformance_workbooks(sample_dir)
+            differences = reader_conformance.check_conformance(sample_paths + file_paths, sheet_selection,
+                                                               layout_settings=layout_settings)
+            # 内置样本中包含多工作表文件，额外按 "全部工作表" 检查一次
+            for name, diffs in reader_conformance.check_conformance(sample_paths, {"Mode": "all"},
+                                                                          layout_settings=layout_settings).items():
+                differences.setdefault(name, []).extend(diffs)
+        if not differences:
+            logging.info("除参考实现外没有其他可用的读取后端，无需检查。")
+        failed = False
+        for name, diffs in differences.items():
+            if diffs:
+                failed = True
+                logging.error(f"读取后端 '{name}' 与参考实现不一致 ({len(diffs)} 处):\n  " + "\n  ".join(diffs))
+            else:
+                logging.info(f"读取后端 '{name}' 与参考实现一致。")
+        return 1 if failed else 0
+
+    if not file_paths:
+        logging.error("未找到任何样本文件。")
+        return 2
+    results = reader_conformance.benchmark_backends(file_paths, sheet_selection, repeat=args.repeat,
+                                                    layout_settings=layout_settings)
+    for extension, timings in results.items():
+        logging.info(f"{extension}: " + " < ".join(f"{t['name']} ({t['seconds']:.3f}s)" for t in timings))
+    logging.info(f"排名已保存到 {reader_backends.BACKEND_RANKING_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+# batch_main.py
+# 批量转换模式 (无界面)：python batch_main.py <文件或目录...> [--output <输出目录>] [--resume]
+# 使用 --resume 时每个源文件的结果写入处理日志，中断后再次运行只处理未完成或已变化的文件。
+import argparse
+import logging
+import sys
+
+from core import batch_processor, config_manager, excel_processor
+from core.cli_support import setup_cli_logging, collect_source_files
+from core.processing_journal import ProcessingJournal, default_journal_path
+
+LOG_FILENAME = 'batch_trace.log'
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="批量将检测文件转换为 DFQ 文件 (每个文件或每组抬头一个 DFQ)。")
+    parser.add_argument("paths", nargs="+", help="源文件或目录 (目录会递归查找 .xls/.xlsx/.csv/.tsv 文件)")
+    parser.add_argument("--output", default=config_manager.get_output_path(), help="DFQ 输出目录 (默认取 OutputPath)")
+    parser.add_argument("--mode", choices=[batch_processor.BATCH_MODE_PER_FILE, batch_processor.BATCH_MODE_PER_HEADER],
+                        default=batch_processor.BATCH_MODE_PER_FILE, help="逐文件生成或按抬头分组生成")
+    parser.add_argument("--workers", type=int, default=None, help="转换工作进程数 (默认取 CPU 核数)")
+    parser.add_argument("--resume", action="store_true", help="断点续传：跳过之前已成功转换且未变化的文件")
+    parser.add_argument("--journal", default="", help="处理日志文件路径 (默认按输出目录保存在 cache/journal 下)")
+    parser.add_argument("--force", action="store_true", help="忽略重复内容检查，总是写入新文件")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    setup_cli_logging(LOG_FILENAME)
+    if not args.output:
+        logging.error("必须指定输出目录 (--output) 或在 config.json 中设置 OutputPath。")
+        return 2
+    file_paths = collect_source_files(args.paths, excel_processor.SUPPORTED_EXTENSIONS)
+    if not file_paths:
+        logging.error("未找到任何源文件。")
+        return 2
+
+    generation_options = batch_processor.build_generation_options(force=args.force)
+    journal = None
+    if args.resume or args.journal:
+        journal = ProcessingJournal(args.journal or default_journal_path("batch", args.output))
+    try:
+        results = batch_processor.run_batch_generation(
+            file_paths, args.output, config_manager.get_system_settings(), None, args.mode,
+            max_workers=args.workers, generation_options=generation_options,
+            progress_callback=lambda done, total, result: logging.info(
+                f"[{done}/{total}] {'成功' if result['success'] else '失败'}: "
+                f"{', '.join(result['source_files'])} -> {result.get('output_file') or result.get('message', '')}"),
+            journal=journal)
+    finally:
+        if journal is not None:
+            journal.close()
+    failed_count = sum(1 for r in results if not r["success"])
+    logging.info(f"批量转换结束: 共 {len(results)} 个任务，失败 {failed_count} 个。")
+    return 1 if failed_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
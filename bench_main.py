@@ -0,0 +1,152 @@
+# bench_main.py
+# 性能测试 (无界面)：
+#   python bench_main.py run [--preset quick|full] [--params 1000,10000] [--files 1,50] [--output results.json]
+#                            [--baseline 基准.json]          运行测试并保存结果，指定基准时同时对比
+#   python bench_main.py compare <基准.json> <结果.json> [--threshold 0.25]   对比两次结果，有用例变慢超过阈值时返回 1
+#   python bench_main.py generate <目录> --format xlsx --params 10000 --files 50   生成合成样本文件 (例如供 backend_main.py benchmark 使用)
+#   python bench_main.py gui [--preset quick|full] [--output gui_results.json] [--baseline 基准.json]
+#                            离屏 (QT_QPA_PLATFORM=offscreen) 测量预览树、参数过滤/移动与抬头下拉框的耗时、事件循环延迟、内存与控件数
+import argparse
+import logging
+import os
+import sys
+
+from core import benchmark_data, benchmark_suite
+from core.cli_support import setup_cli_logging
+
+LOG_FILENAME = 'bench_trace.log'
+
+
+def _int_list(text):
+    try:
+        return [int(part) for part in text.split(",") if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"应为以逗号分隔的整数: {text}")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="导入、去重、DFQ 编码与写入的性能测试。")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="运行性能测试并保存结果 (JSON)")
+    run_parser.add_argument("--preset", choices=sorted(benchmark_suite.PRESETS), default="quick",
+                            help="预设规模 (quick: 1千/1万参数 × 1/50 个文件；full: 1千~100万参数 × 1/50/500 个文件)")
+    run_parser.add_argument("--params", type=_int_list, default=None, help="参数数量列表，覆盖预设，例如 1000,10000")
+    run_parser.add_argument("--files", type=_int_list, default=None, help="文件数列表，覆盖预设，例如 1,50")
+    run_parser.add_argument("--formats", default=",".join(benchmark_data.SOURCE_FORMATS),
+                            help="导入测试的源文件格式 (xlsx,xls,csv)")
+    run_parser.add_argument("--repeat", type=int, default=benchmark_suite.DEFAULT_REPEAT, help="每个用例的重复次数 (取最快一次)")
+    run_parser.add_argument("--seed", type=int, default=benchmark_data.DEFAULT_SEED, help="合成数据的随机种子")
+    run_parser.add_argument("--data-dir", default=None, help="合成样本文件的缓存目录 (默认 cache/benchmark_data)")
+    run_parser.add_argument("--skip-ingest", action="store_true", help="只测去重、编码与写入，不生成和读取样本文件")
+    run_parser.add_argument("--output", default="benchmark_results.json", help="结果文件路径")
+    run_parser.add_argument("--baseline", default="", help="与此基准结果对比，有用例变慢超过阈值时返回 1")
+    _add_compare_options(run_parser)
+    compare_parser = subparsers.add_parser("compare", help="对比两次性能测试结果")
+    compare_parser.add_argument("baseline", help="基准结果文件")
+    compare_parser.add_argument("current", help="当前结果文件")
+    _add_compare_options(compare_parser)
+    generate_parser = subparsers.add_parser("generate", help="生成合成样本文件")
+    generate_parser.add_argument("directory", help="输出目录")
+    generate_parser.add_argument("--format", choices=benchmark_data.SOURCE_FORMATS, default="xlsx", help="文件格式")
+    generate_parser.add_argument("--params", type=int, default=1000, help="参数总数")
+    generate_parser.add_argument("--files", type=int, default=1, help="文件数")
+    generate_parser.add_argument("--seed", type=int, default=benchmark_data.DEFAULT_SEED, help="随机种子")
+    gui_parser = subparsers.add_parser("gui", help="离屏运行主窗口，测量界面操作的耗时 (无需显示器)")
+    gui_parser.add_argument("--preset", choices=["quick", "full"], default="quick",
+                            help="预设规模 (quick: 100/1000 个参数、10~1000 个抬头预设；full: 最多 5000 个参数、1 万个抬头预设)")
+    gui_parser.add_argument("--params", type=_int_list, default=None, help="参数数量列表，覆盖预设")
+    gui_parser.add_argument("--presets", type=_int_list, default=None, help="抬头预设数量列表，覆盖预设")
+    gui_parser.add_argument("--repeat", type=int, default=benchmark_suite.DEFAULT_REPEAT, help="每个用例的重复次数 (取最快一次)")
+    gui_parser.add_argument("--seed", type=int, default=benchmark_data.DEFAULT_SEED, help="合成数据的随机种子")
+    gui_parser.add_argument("--output", default="gui_benchmark_results.json", help="结果文件路径")
+    gui_parser.add_argument("--baseline", default="", help="与此基准结果对比，有用例变慢超过阈值时返回 1")
+    _add_compare_options(gui_parser)
+    return parser.parse_args(argv)
+
+
+def _add_compare_options(parser):
+    parser.add_argument("--threshold", type=float, default=benchmark_suite.DEFAULT_REGRESSION_THRESHOLD,
+                        help="判定变慢的阈值 (0.25 表示慢 25%% 以上)")
+    parser.add_argument("--min-seconds", type=float, default=benchmark_suite.DEFAULT_MIN_SECONDS,
+                        help="基准耗时低于此值 (秒) 的用例不判定变慢")
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    setup_cli_logging(LOG_FILENAME)
+    if args.command == "generate":
+        if not benchmark_data.can_generate(args.format, args.params, args.files):
+            logging.error(f"无法生成 {args.format} 样本 (.xls 每个工作表最多 {benchmark_data.XLS_MAX_ROWS} 行且需要 xlwt)。")
+            return 2
+        paths = benchmark_data.generate_source_files(args.directory, args.format, args.params, args.files, args.seed)
+        logging.info(f"已生成 {len(paths)} 个 {args.format} 文件到 {args.directory}")
+        return 0
+    if args.command == "compare":
+        try:
+            baseline, current = benchmark_suite.load_results(args.baseline), benchmark_suite.load_results(args.current)
+        except (OSError, ValueError) as e:
+            logging.error(f"读取结果文件失败: {e}")
+            return 2
+        return report_comparison(baseline, current, args)
+    if args.command == "gui":
+        return run_gui_benchmarks(args)
+    return run_benchmarks(args)
+
+
+def run_benchmarks(args):
+    preset = benchmark_suite.PRESETS[args.preset]
+    source_formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    unknown_formats = [f for f in source_formats if f not in benchmark_data.SOURCE_FORMATS]
+    if unknown_formats:
+        logging.error(f"不支持的格式: {unknown_formats}")
+        return 2
+    baseline = None
+    if args.baseline:
+        try:
+            baseline = benchmark_suite.load_results(args.baseline)
+        except (OSError, ValueError) as e:
+            logging.error(f"读取基准结果失败: {e}")
+            return 2
+    results = benchmark_suite.run_suite(args.params or preset["Parameters"], args.files or preset["Files"],
+                                        source_formats, args.repeat, args.seed, args.data_dir,
+                                        include_ingest=not args.skip_ingest)
+    benchmark_suite.save_results(args.output, results)
+    logging.info(f"性能测试完成: {len(results['cases'])} 个用例，用时 {results['total_seconds']:.1f}s，结果已保存到 {args.output}")
+    return report_comparison(baseline, results, args) if baseline is not None else 0
+
+
+def run_gui_benchmarks(args):
+    # 必须在导入 PyQt 之前设置，未显式指定时使用离屏平台
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from app import gui_benchmark
+    preset = gui_benchmark.PRESETS[args.preset]
+    baseline = None
+    if args.baseline:
+        try:
+            baseline = benchmark_suite.load_results(args.baseline)
+        except (OSError, ValueError) as e:
+            logging.error(f"读取基准结果失败: {e}")
+            return 2
+    results = gui_benchmark.run_gui_benchmark(args.params or preset["Parameters"],
+                                              args.presets or preset["HeaderPresets"], args.repeat, args.seed)
+    benchmark_suite.save_results(args.output, results)
+    logging.info(f"界面性能测试完成: {len(results['cases'])} 个用例，用时 {results['total_seconds']:.1f}s，"
+                 f"峰值内存 {results['peak_rss_mb']} MB，结果已保存到 {args.output}")
+    return report_comparison(baseline, results, args) if baseline is not None else 0
+
+
+def report_comparison(baseline, current, args):
+    comparisons = benchmark_suite.compare_results(baseline, current, args.threshold, args.min_seconds)
+    regressions = [c for c in comparisons if c["status"] == benchmark_suite.STATUS_REGRESSION]
+    for comparison in comparisons:
+        message = benchmark_suite.describe_comparison(comparison)
+        if comparison["status"] == benchmark_suite.STATUS_REGRESSION:
+            logging.error(message)
+        else:
+            logging.info(message)
+    logging.info(f"对比结束: {len(comparisons)} 个用例，{len(regressions)} 个变慢超过 {args.threshold:.0%}。")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,381 @@
+# core/batch_processor.py
+# 批量生成：每个源文件（或按抬头分组的一组文件）各生成一个DFQ文件。
+# 每个任务在独立的工作进程中完成 解析 → 转换 → 写入，互不影响。
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Any, Tuple, Callable, Optional
+
+from core import config_manager, excel_processor, dfq_writer, output_manifest, output_index, parse_scheduler, \
+    edit_memory, parameter_diff, dfq_lint, export_formats, output_archive, parse_isolation
+from core.processing_journal import ProcessingJournal, STATUS_DONE, STATUS_FAILED
+
+logger = logging.getLogger(__name__)
+
+BATCH_MODE_PER_FILE = "per_file"
+BATCH_MODE_PER_HEADER = "per_header"
+
+# 源文件名中各字段的分隔符，例如 "P507AC-100$Carrier01 Turning01$1039$...xls"
+SOURCE_FILENAME_SEPARATOR = "$"
+
+
+def resolve_header_for_file(file_path: str, header_presets: List[Dict[str, str]],
+                            fallback_header: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+    """根据源文件名 (第一段为K1001，第二段为K1002) 匹配抬头预设，匹配不到时返回 fallback_header。"""
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    name_parts = [part.strip() for part in stem.split(SOURCE_FILENAME_SEPARATOR)]
+    if len(name_parts) < 2 or not name_parts[0]:
+        return fallback_header.copy() if fallback_header else None
+
+    k1001_from_name, k1002_from_name = name_parts[0], name_parts[1]
+    k1001_matches = [p for p in header_presets if p.get("K1001", "").strip() == k1001_from_name]
+    for preset in k1001_matches:
+        if preset.get("K1002", "").strip() == k1002_from_name:
+            return preset.copy()
+    if k1001_matches:
+        return k1001_matches[0].copy()
+    return fallback_header.copy() if fallback_header else None
+
+
+def _header_group_key(header_info: Dict[str, str]) -> Tuple[str, ...]:
+    return tuple(header_info.get(k, "") for k in ("K1001", "K1002", "K1004", "K1086", "K1091"))
+
+
+def build_batch_jobs(file_paths: List[str], mode: str, header_presets: List[Dict[str, str]],
+                     fallback_header: Optional[Dict[str, str]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """将文件列表拆分为生成任务。返回 (任务列表, 无法解析抬头的文件结果列表)。"""
+    jobs: List[Dict[str, Any]] = []
+    unresolved_results: List[Dict[str, Any]] = []
+    jobs_by_header: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+
+    for file_path in file_paths:
+        header_info = resolve_header_for_file(file_path, header_presets, fallback_header)
+        if not header_info:
+            unresolved_results.append({
+                "source_files": [file_path], "header": None, "success": False, "output_file": "",
+                "parameter_count": 0, "duration": 0.0,
+                "message": "无法确定抬头信息：文件名未匹配任何预设，且当前未选择抬头。"
+            })
+            continue
+        if mode == BATCH_MODE_PER_HEADER:
+            group_key = _header_group_key(header_info)
+            if group_key not in jobs_by_header:
+                jobs_by_header[group_key] = {"source_files": [], "header": header_info}
+                jobs.append(jobs_by_header[group_key])
+            jobs_by_header[group_key]["source_files"].append(file_path)
+        else:
+            jobs.append({"source_files": [file_path], "header": header_info})
+    return jobs, unresolved_results
+
+
+def build_generation_options(force: bool = False) -> Dict[str, Any]:
+    """从配置构建传给每个生成任务的选项 (写入重试、重复内容处理、隔离解析、源文件缓存、工作表选择、读取后端、参数表布局、自动分类规则、编辑记忆、写入后校验、测量值)。"""
+    generation_options: Dict[str, Any] = dict(config_manager.get_write_behind_settings())
+    generation_options["Force"] = force
+    generation_options["DuplicateOutputAction"] = config_manager.get_duplicate_output_action()
+    generation_options["ParseIsolation"] = config_manager.get_parse_isolation_settings()
+    generation_options["SourceCache"] = config_manager.get_source_cache_settings()
+    generation_options["SheetSelection"] = config_manager.get_sheet_selection_settings()
+    generation_options["ReaderBackend"] = config_manager.get_reader_backend()
+    generation_options["TableLayout"] = config_manager.get_table_layout_settings()
+    generation_options["ClassificationRules"] = config_manager.get_classification_settings()
+    generation_options["EditMemory"] = config_manager.get_edit_memory_settings()
+    generation_options["DfqLint"] = config_manager.get_dfq_lint_settings()
+    generation_options["MeasuredValues"] = config_manager.get_measured_values_settings()
+    generation_options["ExportFormats"] = config_manager.get_export_formats()
+    generation_options["OutputLayout"] = config_manager.get_output_layout_settings()
+    return generation_options
+
+
+def prepare_parameters_for_output(parameters: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """转换阶段：去除未选中输出的参数。"""
+    return [p for p in parameters if p.get('selected_for_output', True)]
+
+
+def pool_worker_initializer(generation_options: Optional[Dict[str, Any]] = None):
+    """工作进程池的初始化函数：启用隔离解析时，为工作进程本身设置内存上限。"""
+    isolation_settings = (generation_options or {}).get("ParseIsolation") or {}
+    if isolation_settings.get("Enabled", False):
+        parse_isolation.apply_memory_limit(int(isolation_settings.get("MemoryLimitMB", 2048)))
+
+
+def _read_job_parameters(source_files: List[str],
+                         generation_options: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    # 任务已在独立的工作进程中运行 (内存上限见 pool_worker_initializer)，不再为每个文件启动隔离解析进程
+    return excel_processor.read_excel_files(
+        source_files, source_cache_settings=generation_options.get("SourceCache"),
+        sheet_selection=generation_options.get("SheetSelection"),
+        reader_backend=generation_options.get("ReaderBackend", "auto"),
+        layout_settings=generation_options.get("TableLayout"),
+        classification_settings=generation_options.get("ClassificationRules"),
+        measurement_settings=generation_options.get("MeasuredValues"))
+
+
+def run_generation_job(job: Dict[str, Any], output_path: str,
+                       generation_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """在工作进程中执行单个任务：解析 → 恢复编辑记忆 → 转换 → 写入。必须为模块级函数以便多进程序列化。"""
+    generation_options = generation_options or {}
+    started_at = time.perf_counter()
+    source_files = job["source_files"]
+    header_info = job["header"]
+    result: Dict[str, Any] = {
+        "source_files": source_files, "header": header_info, "success": False, "output_file": "",
+        "parameter_count": 0, "duration": 0.0, "message": ""
+    }
+    parameters, errors = _read_job_parameters(source_files, generation_options)
+    # 与界面导入相同，恢复该零件/工站记忆的分类、自然界限、顺序与取舍
+    parameters, _ = edit_memory.apply_edit_memory(parameters, header_info, generation_options.get("EditMemory"))
+    parameters_to_output = prepare_parameters_for_output(parameters)
+    if not parameters_to_output:
+        result["message"] = "；".join(errors) if errors else "未找到可输出的参数。"
+        result["duration"] = time.perf_counter() - started_at
+        return result
+
+    # DFQ 与配置的附加格式 (CSV/JSON Lines/xlsx) 在一次参数遍历中同时生成
+    export_outputs, content_hash = export_formats.export_parameters(
+        parameters_to_output, header_info, generation_options.get("ExportFormats") or [export_formats.FORMAT_DFQ])
+    dfq_bytes = export_outputs[export_formats.FORMAT_DFQ]
+    result["parameter_count"] = len(parameters_to_output)
+    result["content_hash"] = content_hash
+
+    subdirectory_template = (generation_options.get("OutputLayout") or {}).get("Subdirectory", "")
+    existing_file = None if generation_options.get("Force", False) else \
+        output_index.find_recent_output(output_path, content_hash)
+    if existing_file:
+        if generation_options.get("DuplicateOutputAction", "skip") == "link":
+            success, message_or_filepath = dfq_writer.link_existing_dfq(output_path, existing_file, header_info,
+                                                                        subdirectory_template)
+        else:
+            success, message_or_filepath = False, ""
+        if not success:
+            result["success"] = True
+            result["skipped"] = True
+            result["output_file"] = existing_file
+            result["message"] = f"内容与已有文件相同，已跳过: {os.path.basename(existing_file)}"
+            result["duration"] = time.perf_counter() - started_at
+            return result
+    else:
+        success, message_or_filepath = dfq_writer.write_dfq_bytes_with_retry(
+            output_path, dfq_bytes, header_info,
+            max_retries=generation_options.get("MaxRetries", 0),
+            initial_backoff=generation_options.get("InitialBackoffSeconds", 1.0),
+            max_backoff=generation_options.get("MaxBackoffSeconds", 30.0), subdirectory_template=subdirectory_template)
+    result["success"] = success
+    if success:
+        result["output_file"] = message_or_filepath
+        result["bytes"] = len(dfq_bytes)
+        result["sha256"] = output_manifest.sha256_of_bytes(dfq_bytes)
+        if existing_file:
+            result["message"] = f"内容与已有文件相同，已创建硬链接: {os.path.basename(existing_file)}"
+        else:
+            result["message"] = "；".join(errors) if errors else "成功"
+            export_files, export_errors = export_formats.write_export_files(message_or_filepath, export_outputs)
+            if export_files:
+                result["export_files"] = export_files
+            if export_errors:
+                result["message"] += "；" + "；".join(export_errors)
+            lint_result = dfq_lint.check_after_write(message_or_filepath, generation_options.get("DfqLint"))
+            if lint_result and lint_result["issues"]:
+                result["lint"] = lint_result
+                result["message"] += f"；DFQ校验: {dfq_lint.describe_result(lint_result)}"
+    else:
+        result["message"] = message_or_filepath
+    result["duration"] = time.perf_counter() - started_at
+    return result
+
+
+def run_diff_job(job: Dict[str, Any], output_path: str,
+                 generation_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """在工作进程中将单个任务的源文件与输出目录中该零件/工站上次生成的DFQ对比 (不写入任何文件)。
+    按编辑记忆恢复上次的分类与取舍后再对比，结果只反映源文件本身的变化。"""
+    generation_options = generation_options or {}
+    started_at = time.perf_counter()
+    header_info = job["header"]
+    result: Dict[str, Any] = {
+        "source_files": job["source_files"], "header": header_info, "success": False, "baseline_file": None,
+        "entries": [], "duration": 0.0, "message": ""
+    }
+    baseline_file = parameter_diff.find_baseline_for(output_path, header_info)
+    if not baseline_file:
+        result["message"] = "输出目录中没有该零件/工站已生成的DFQ文件，无法对比。"
+        result["duration"] = time.perf_counter() - started_at
+        return result
+    parameters, errors = _read_job_parameters(job["source_files"], generation_options)
+    parameters, _ = edit_memory.apply_edit_memory(parameters, header_info, generation_options.get("EditMemory"))
+    entries, baseline_errors = parameter_diff.diff_against_dfq(prepare_parameters_for_output(parameters),
+                                                               baseline_file)
+    # 基准DFQ无法读取时所有参数都会显示为新增，视为对比失败；只有个别行异常时仍给出结果
+    result["success"] = bool(parameters) and \
+        (not baseline_errors or any(e["baseline_index"] is not None for e in entries))
+    result["baseline_file"] = baseline_file
+    result["entries"] = entries
+    result["message"] = "；".join([parameter_diff.summarize_diff(entries)] + errors + baseline_errors)
+    result["duration"] = time.perf_counter() - started_at
+    return result
+
+
+def run_batch_diff(file_paths: List[str], output_path: str, header_presets: List[Dict[str, str]],
+                   fallback_header: Optional[Dict[str, str]], mode: str = BATCH_MODE_PER_HEADER,
+                   max_workers: Optional[int] = None,
+                   generation_options: Optional[Dict[str, Any]] = None,
+                   progress_callback: Optional[Callable[[int, int, Dict[str, Any]], None]] = None
+                   ) -> List[Dict[str, Any]]:
+    """批量对比：每个任务 (默认每组抬头) 与输出目录中上次生成的DFQ对比，返回每个任务的结果 (与任务顺序一致)。"""
+    logger.info(f"run_batch_diff: 模式 {mode}，共 {len(file_paths)} 个文件，基准目录 {output_path}")
+    jobs, unresolved_results = build_batch_jobs(file_paths, mode, header_presets, fallback_header)
+    total = len(jobs) + len(unresolved_results)
+    completed = 0
+    for result in unresolved_results:
+        completed += 1
+        if progress_callback: progress_callback(completed, total, result)
+
+    job_results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+    if jobs:
+        worker_count = max_workers or min(len(jobs), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=worker_count, initializer=pool_worker_initializer,
+                                 initargs=(generation_options,)) as executor:
+            future_to_index = {executor.submit(run_diff_job, jobs[idx], output_path, generation_options): idx
+                               for idx in _largest_first_job_order(jobs, generation_options)}
+            for future in as_completed(future_to_index):
+                idx = future_to_index[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"  对比任务 {jobs[idx]['source_files']} 执行失败: {e}", exc_info=True)
+                    result = {
+                        "source_files": jobs[idx]["source_files"], "header": jobs[idx]["header"], "success": False,
+                        "baseline_file": None, "entries": [], "duration": 0.0, "message": f"工作进程异常: {e}"
+                    }
+                job_results[idx] = result
+                completed += 1
+                if progress_callback: progress_callback(completed, total, result)
+    return unresolved_results + [r for r in job_results if r is not None]
+
+
+def record_job_result(output_path: str, batch_id: str, result: Dict[str, Any]):
+    """在主进程中登记成功写入的任务：更新近期输出索引并追加批次清单。"""
+    if not result["success"] or result.get("skipped"):
+        return
+    output_index.record_output(output_path, result["content_hash"], result["output_file"])
+    output_manifest.append_manifest_records(output_path, [output_manifest.build_manifest_record(
+        batch_id, output_path, result["output_file"], result["source_files"], result["header"],
+        result["parameter_count"], result["bytes"], result["sha256"], result["duration"])])
+
+
+def run_batch_generation(file_paths: List[str], output_path: str, header_presets: List[Dict[str, str]],
+                         fallback_header: Optional[Dict[str, str]], mode: str = BATCH_MODE_PER_FILE,
+                         max_workers: Optional[int] = None,
+                         generation_options: Optional[Dict[str, Any]] = None,
+                         progress_callback: Optional[Callable[[int, int, Dict[str, Any]], None]] = None,
+                         journal: Optional[ProcessingJournal] = None) -> List[Dict[str, Any]]:
+    """批量生成DFQ文件，返回每个任务的结果 (与任务顺序一致)。progress_callback(已完成数, 总数, 结果)。
+    generation_options 会原样传给每个任务，通常由 build_generation_options 构建。
+    传入 journal 时按断点续传方式运行：之前已成功且源文件未变化的任务直接跳过，每个源文件的结果写入日志。"""
+    batch_id = output_manifest.new_batch_id()
+    logger.info(f"run_batch_generation: 批次 {batch_id}，模式 {mode}，共 {len(file_paths)} 个文件，输出到 {output_path}")
+    jobs, unresolved_results = build_batch_jobs(file_paths, mode, header_presets, fallback_header)
+    resumed_results: List[Dict[str, Any]] = []
+    source_stats: Dict[str, Tuple[int, float]] = {}
+    if journal is not None:
+        journal.compact()
+        for file_path in file_paths:
+            try:
+                st = os.stat(file_path)
+                source_stats[file_path] = (st.st_size, st.st_mtime)
+            except OSError:
+                continue
+        jobs, resumed_results = _split_completed_jobs(jobs, journal, source_stats)
+        logger.info(f"  断点续传: {len(resumed_results)} 个任务在之前的运行中已完成，{len(jobs)} 个任务待处理。")
+
+    total = len(jobs) + len(unresolved_results) + len(resumed_results)
+    completed = 0
+    for result in unresolved_results + resumed_results:
+        completed += 1
+        if not result["success"]:
+            logger.warning(f"  文件 {result['source_files'][0]} 无法确定抬头，跳过。")
+            _record_in_journal(journal, source_stats, result)
+        if progress_callback: progress_callback(completed, total, result)
+
+    job_results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+    if jobs:
+        worker_count = max_workers or min(len(jobs), os.cpu_count() or 1)
+        logger.info(f"  共 {len(jobs)} 个生成任务，使用 {worker_count} 个工作进程。")
+        with ProcessPoolExecutor(max_workers=worker_count, initializer=pool_worker_initializer,
+                                 initargs=(generation_options,)) as executor:
+            future_to_index = {executor.submit(run_generation_job, jobs[idx], output_path, generation_options): idx
+                               for idx in _largest_first_job_order(jobs, generation_options)}
+            for future in as_completed(future_to_index):
+                idx = future_to_index[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"  任务 {jobs[idx]['source_files']} 执行失败: {e}", exc_info=True)
+                    result = {
+                        "source_files": jobs[idx]["source_files"], "header": jobs[idx]["header"],
+                        "success": False, "output_file": "", "parameter_count": 0, "duration": 0.0,
+                        "message": f"工作进程异常: {e}"
+                    }
+                job_results[idx] = result
+                record_job_result(output_path, batch_id, result)
+                _record_in_journal(journal, source_stats, result)
+                completed += 1
+                if progress_callback: progress_callback(completed, total, result)
+
+    if journal is not None:
+        journal.flush()
+    archive_after_days = ((generation_options or {}).get("OutputLayout") or {}).get("ArchiveAfterDays", 0)
+    if archive_after_days:
+        archive_summary = output_archive.archive_outputs(output_path, archive_after_days)
+        for error in archive_summary["errors"]:
+            logger.warning(f"  {error}")
+    success_count = sum(1 for r in job_results if r and r["success"]) + len(resumed_results)
+    logger.info(f"run_batch_generation 完成: 成功 {success_count}/{total}。")
+    return unresolved_results + resumed_results + [r for r in job_results if r is not None]
+
+
+def _largest_first_job_order(jobs: List[Dict[str, Any]], generation_options: Optional[Dict[str, Any]]) -> List[int]:
+    """按任务中源文件的预计解析耗时之和从大到小排列任务下标，大任务先提交给进程池。"""
+    if len(jobs) < 2:
+        return list(range(len(jobs)))
+    cost_model = ((generation_options or {}).get("ParseIsolation") or {}).get("CostModel", {})
+    job_costs = [sum(p["predicted_seconds"] for p in parse_scheduler.preflight_files(job["source_files"], cost_model))
+                 for job in jobs]
+    return sorted(range(len(jobs)), key=lambda i: -job_costs[i])
+
+
+def _split_completed_jobs(jobs: List[Dict[str, Any]], journal: ProcessingJournal,
+                          source_stats: Dict[str, Tuple[int, float]]
+                          ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """将所有源文件均已成功转换且未变化的任务分离出来。返回 (待处理任务, 已完成任务的结果)。"""
+    pending_jobs: List[Dict[str, Any]] = []
+    resumed_results: List[Dict[str, Any]] = []
+    for job in jobs:
+        records = []
+        for file_path in job["source_files"]:
+            stat = source_stats.get(file_path)
+            if stat is None or not journal.is_done(file_path, stat[0], stat[1]):
+                break
+            records.append(journal.get(file_path))
+        if len(records) != len(job["source_files"]):
+            pending_jobs.append(job)
+            continue
+        resumed_results.append({
+            "source_files": job["source_files"], "header": job["header"], "success": True, "skipped": True,
+            "resumed": True, "output_file": records[0].get("output_file", ""), "parameter_count": 0,
+            "duration": 0.0, "message": "之前的运行中已完成，源文件未变化，跳过。"
+        })
+    return pending_jobs, resumed_results
+
+
+def _record_in_journal(journal: Optional[ProcessingJournal], source_stats: Dict[str, Tuple[int, float]],
+                       result: Dict[str, Any]):
+    if journal is None:
+        return
+    status = STATUS_DONE if result["success"] else STATUS_FAILED
+    for file_path in result["source_files"]:
+        stat = source_stats.get(file_path)
+        if stat is None:
+            continue
+        journal.record(file_path, stat[0], stat[1], status, result.get("output_file", ""),
+                       result.get("message", ""), result.get("sha256", ""))
@@ -0,0 +1,172 @@
+# core/benchmark_data.py
+# 性能测试用的合成数据：按固定随机种子生成与现场检测文件相同布局的 .xlsx/.xls/.csv 源文件
+# (13 行抬头区，第14行起 A 参数名、B 单位、C 名义值、D 上公差、E 下公差)，以及与导入结果相同结构的参数记录与抬头预设。
+# 同样的参数 (数量、文件数、种子) 总是生成完全相同的内容，不同版本的测速结果可以直接比较。
+import csv
+import datetime
+import logging
+import os
+import random
+from typing import List, Dict, Any, Iterator, Optional
+
+from openpyxl import Workbook
+
+from core import excel_processor
+from core.config_manager import CACHE_DIR
+
+try:
+    import xlwt
+except ImportError:  # xlwt 仅用于生成 .xls 样本，缺失时不生成 .xls
+    xlwt = None
+
+logger = logging.getLogger(__name__)
+
+# 生成规则变化时递增，使缓存的样本文件失效
+GENERATOR_VERSION = 1
+DEFAULT_SEED = 20240506
+BENCHMARK_DATA_DIR = os.path.join(CACHE_DIR, "benchmark_data")
+SOURCE_FORMATS = ("xlsx", "xls", "csv")
+PREAMBLE_ROW_COUNT = 13
+# .xls 单个工作表的行数上限
+XLS_MAX_ROWS = 65536
+# 约有此比例的参数行与本文件前面的某一行重名，供去重处理
+DUPLICATE_RATIO = 0.05
+
+_NAME_PREFIXES = ["Diameter", "Length", "Angle", "Position", "Flatness", "Roughness", "Width", "Depth",
+                  "直径", "长度", "角度", "距离", "硬度", "扭矩"]
+_COMPLETE_MARKER = ".complete"
+
+
+def preamble_rows(file_index: int) -> List[List[Any]]:
+    """参数区之前的 13 行 (标题、零件号、日期与表头)。"""
+    rows: List[List[Any]] = [["检验报告"], [], ["零件号", None, f"P-BENCH-{file_index:04d}"],
+                             ["日期", None, datetime.datetime(2024, 5, 6, 7, 8, 9)]]
+    rows += [[] for _ in range(PREAMBLE_ROW_COUNT - 1 - len(rows))]
+    rows.append(["特性", "单位", "名义值", "上公差", "下公差"])
+    return rows
+
+
+def iter_parameter_rows(row_count: int, seed: int = DEFAULT_SEED, file_index: int = 0) -> Iterator[List[Any]]:
+    """一个文件的参数行 [参数名, 单位, 名义值, 上公差, 下公差]：名称在所有文件间唯一，少量行与本文件前面的行重名；
+    部分公差为空 (单边公差)。"""
+    rng = random.Random(seed * 1000003 + file_index)
+    names: List[str] = []
+    for i in range(row_count):
+        if names and rng.random() < DUPLICATE_RATIO:
+            name = rng.choice(names)
+        else:
+            name = f"{_NAME_PREFIXES[i % len(_NAME_PREFIXES)]}_{file_index:04d}_{i:07d}"
+            names.append(name)
+        decimals = rng.choice((0, 1, 2, 3))
+        nominal = round(rng.uniform(0.5, 500.0), decimals) if decimals else rng.randint(1, 500)
+        upper = round(rng.choice((0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5)), 3)
+        roll = rng.random()
+        lower = -upper if roll < 0.6 else (0 if roll < 0.8 else None)
+        if rng.random() < 0.05:
+            upper = None
+        yield [name, "mm", nominal, upper, lower]
+
+
+def _write_xlsx(path: str, rows: Iterator[List[Any]], file_index: int):
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet("Sheet1")
+    for row in preamble_rows(file_index):
+        worksheet.append(row)
+    for row in rows:
+        worksheet.append(row)
+    workbook.save(path)
+
+
+def _write_xls(path: str, rows: Iterator[List[Any]], file_index: int):
+    workbook = xlwt.Workbook()
+    worksheet = workbook.add_sheet("Sheet1")
+    date_style = xlwt.easyxf(num_format_str="yyyy-mm-dd hh:mm:ss")
+    for r, row in enumerate(list(preamble_rows(file_index)) + list(rows)):
+        for c, value in enumerate(row):
+            if value is None:
+                continue
+            if isinstance(value, datetime.datetime):
+                worksheet.write(r, c, value, date_style)
+            else:
+                worksheet.write(r, c, value)
+    workbook.save(path)
+
+
+def _write_csv(path: str, rows: Iterator[List[Any]], file_index: int):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        for row in preamble_rows(file_index):
+            writer.writerow(["" if v is None else v for v in row])
+        for row in rows:
+            writer.writerow(["" if v is None else v for v in row])
+
+
+_WRITERS = {"xlsx": _write_xlsx, "xls": _write_xls, "csv": _write_csv}
+
+
+def is_format_available(source_format: str) -> bool:
+    return source_format in _WRITERS and (source_format != "xls" or xlwt is not None)
+
+
+def rows_per_file(parameter_count: int, file_count: int) -> List[int]:
+    """将参数总数尽量均匀地分配到各文件 (每个文件至少一行)。"""
+    file_count = max(1, file_count)
+    base, extra = divmod(max(parameter_count, file_count), file_count)
+    return [base + (1 if i < extra else 0) for i in range(file_count)]
+
+
+def can_generate(source_format: str, parameter_count: int, file_count: int) -> bool:
+    """该格式能否生成这一规模的样本 (.xls 每个工作表最多 65536 行，且需要 xlwt)。"""
+    if not is_format_available(source_format):
+        return False
+    return source_format != "xls" or max(rows_per_file(parameter_count, file_count)) + PREAMBLE_ROW_COUNT <= XLS_MAX_ROWS
+
+
+def generate_source_files(directory: str, source_format: str, parameter_count: int, file_count: int,
+                          seed: int = DEFAULT_SEED) -> List[str]:
+    """在 directory 下生成 file_count 个源文件，共约 parameter_count 个参数行，返回文件路径 (按顺序)。"""
+    if not can_generate(source_format, parameter_count, file_count):
+        raise ValueError(f"无法生成 {source_format} 样本: {parameter_count} 个参数 / {file_count} 个文件")
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for file_index, row_count in enumerate(rows_per_file(parameter_count, file_count)):
+        path = os.path.join(directory, f"bench_{file_index:04d}.{source_format}")
+        _WRITERS[source_format](path, iter_parameter_rows(row_count, seed, file_index), file_index)
+        paths.append(path)
+    return paths
+
+
+def cached_source_files(source_format: str, parameter_count: int, file_count: int, seed: int = DEFAULT_SEED,
+                        data_dir: Optional[str] = None) -> List[str]:
+    """返回缓存目录中的样本文件，不存在或未生成完整时重新生成 (内容由参数唯一确定，可跨多次运行复用)。"""
+    directory = os.path.join(data_dir or BENCHMARK_DATA_DIR,
+                             f"v{GENERATOR_VERSION}_{source_format}_{parameter_count}p_{file_count}f_s{seed}")
+    marker = os.path.join(directory, _COMPLETE_MARKER)
+    if os.path.exists(marker):
+        paths = sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                       if name.endswith("." + source_format))
+        if len(paths) == file_count:
+            return paths
+    logger.info(f"生成样本: {source_format}，{parameter_count} 个参数，{file_count} 个文件 -> {directory}")
+    paths = generate_source_files(directory, source_format, parameter_count, file_count, seed)
+    with open(marker, 'w', encoding='utf-8') as f:
+        f.write(f"{len(paths)}\n")
+    return paths
+
+
+def build_parameter_fixture(parameter_count: int, seed: int = DEFAULT_SEED) -> List[Dict[str, Any]]:
+    """与导入结果结构相同的参数记录 (含重名参数，未去重)，按源文件的单元格文本规则构建，不经过文件读写。"""
+    parameters: List[Dict[str, Any]] = []
+    for row_idx, (name, _, nominal, upper, lower) in enumerate(iter_parameter_rows(parameter_count, seed)):
+        parameters.append(excel_processor.build_parameter_record(
+            name, str(nominal), "" if upper is None else str(upper), "" if lower is None else str(lower),
+            "bench_fixture.xlsx", "Sheet1", row_idx + PREAMBLE_ROW_COUNT))
+    return parameters
+
+
+def build_header_presets(preset_count: int, seed: int = DEFAULT_SEED) -> List[Dict[str, str]]:
+    """抬头预设列表 (与 config.json 的 SystemSettings 结构相同)。"""
+    rng = random.Random(seed)
+    return [{"K1001": f"P{i:05d}-BENCH", "K1002": f"Bench part {i}", "K1004": "5",
+             "K1086": f"OP{rng.randint(1, 99) * 10}", "K1091": f"Line{rng.randint(1, 20):02d}"}
+            for i in range(preset_count)]
@@ -0,0 +1,219 @@
+# core/benchmark_suite.py
+# 核心处理的性能测试：按 参数数量 × 文件数 测量各读取后端的导入 (read_excel_files)、去重、DFQ 内容编码与文件写入，
+# 结果保存为 JSON；与基准结果对比时，任一用例变慢超过阈值即判为性能回退。
+# 每个用例重复多次取最快一次 (受其他进程干扰最小)，同时记录中位数。
+import datetime
+import gc
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+from typing import List, Dict, Any, Callable, Optional
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from core import benchmark_data, config_manager, dfq_writer, excel_processor, reader_backends
+
+logger = logging.getLogger(__name__)
+
+RESULTS_FORMAT_VERSION = 1
+# 预设规模：quick 用于日常检查，full 为完整矩阵 (100 万参数的样本生成与读取需要较长时间)
+PRESETS = {
+    "quick": {"Parameters": [1000, 10000], "Files": [1, 50]},
+    "full": {"Parameters": [1000, 10000, 100000, 1000000], "Files": [1, 50, 500]},
+}
+DEFAULT_REPEAT = 3
+DEFAULT_REGRESSION_THRESHOLD = 0.25
+# 基准耗时低于此值 (秒) 的用例只作参考，不判定回退 (计时噪声占比过大)
+DEFAULT_MIN_SECONDS = 0.01
+CSV_ENGINE = "csv"
+BENCH_HEADER = {"K1001": "P-BENCH-0000", "K1002": "Bench part", "K1004": "5", "K1086": "OP10", "K1091": "Line01"}
+
+STATUS_REGRESSION = "regression"
+STATUS_IMPROVED = "improved"
+STATUS_UNCHANGED = "unchanged"
+STATUS_NEW = "new"
+STATUS_MISSING = "missing"
+STATUS_LABELS = {STATUS_REGRESSION: "变慢", STATUS_IMPROVED: "变快", STATUS_UNCHANGED: "持平",
+                 STATUS_NEW: "新增", STATUS_MISSING: "缺失"}
+
+
+def time_call(func: Callable[[], Any], repeat: int = DEFAULT_REPEAT,
+              setup: Optional[Callable[[], Any]] = None) -> Dict[str, Any]:
+    """重复执行 func 并计时 (setup 在每次计时之前执行，不计入)，返回 {"seconds": 最快, "median": 中位数, "runs": [...]}。"""
+    runs = []
+    for _ in range(max(1, repeat)):
+        if setup is not None:
+            setup()
+        gc.collect()
+        started_at = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - started_at)
+    return {"seconds": min(runs), "median": statistics.median(runs), "runs": [round(r, 6) for r in runs]}
+
+
+def ingest_engines(source_format: str, sample_path: str) -> List[str]:
+    """该格式可用的导入引擎：Excel 为各可用的读取后端，CSV 为内置的 CSV 读取。"""
+    if source_format == "csv":
+        return [CSV_ENGINE]
+    return [backend.name for backend in reader_backends.available_backends(sample_path)]
+
+
+def _case(results: Dict[str, Dict[str, Any]], name: str, timing: Dict[str, Any], **details):
+    timing.update(details)
+    if timing.get("parameters"):
+        timing["parameters_per_second"] = round(timing["parameters"] / timing["seconds"]) if timing["seconds"] else None
+    results[name] = timing
+    logger.info(f"{name}: {timing['seconds']:.4f}s (中位数 {timing['median']:.4f}s)")
+
+
+def run_ingest_cases(results: Dict[str, Dict[str, Any]], source_formats: List[str], parameter_counts: List[int],
+                     file_counts: List[int], repeat: int, seed: int, data_dir: Optional[str]):
+    # 分类规则取默认配置，结果不受本机 config.json 影响
+    classification_settings = config_manager.DEFAULT_CONFIG["ClassificationRules"]
+    for source_format in source_formats:
+        for parameter_count in parameter_counts:
+            for file_count in file_counts:
+                if not benchmark_data.can_generate(source_format, parameter_count, file_count):
+                    logger.info(f"跳过 {source_format} {parameter_count} 个参数 / {file_count} 个文件 (格式不支持该规模或缺少依赖)")
+                    continue
+                paths = benchmark_data.cached_source_files(source_format, parameter_count, file_count, seed, data_dir)
+                for engine in ingest_engines(source_format, paths[0]):
+                    backend_name = reader_backends.REFERENCE_BACKEND if engine == CSV_ENGINE else engine
+                    counts = {}
+
+                    def ingest():
+                        parameters, errors = excel_processor.read_excel_files(
+                            paths, reader_backend=backend_name, classification_settings=classification_settings)
+                        counts["parameters"], counts["errors"] = len(parameters), len(errors)
+
+                    timing = time_call(ingest, repeat)
+                    if counts["errors"]:
+                        logger.warning(f"导入 {source_format} 样本时有 {counts['errors']} 个错误，结果仅供参考。")
+                    _case(results, f"ingest/{engine}/{source_format}/{parameter_count}p/{file_count}f", timing,
+                          parameters=parameter_count, files=file_count, output_parameters=counts["parameters"])
+
+
+def run_model_cases(results: Dict[str, Dict[str, Any]], parameter_counts: List[int], repeat: int, seed: int,
+                    work_dir: str):
+    """与文件数无关的用例：去重、DFQ 内容编码、DFQ 文件写入。"""
+    for parameter_count in parameter_counts:
+        fixture = benchmark_data.build_parameter_fixture(parameter_count, seed)
+        _case(results, f"dedup/{parameter_count}p", time_call(lambda: excel_processor.deduplicate_parameters(fixture),
+                                                              repeat), parameters=parameter_count)
+
+        def encode():
+            dfq_lines = dfq_writer.generate_dfq_content(fixture, BENCH_HEADER)
+            return dfq_writer.encode_dfq_lines(dfq_lines), dfq_writer.compute_catalog_hash(dfq_lines)
+
+        _case(results, f"encode/{parameter_count}p", time_call(encode, repeat), parameters=parameter_count)
+
+        dfq_bytes = encode()[0]
+        output_dir = os.path.join(work_dir, "write")
+
+        def clear_output_dir():
+            shutil.rmtree(output_dir, ignore_errors=True)
+            os.makedirs(output_dir)
+
+        def write():
+            success, message_or_filepath = dfq_writer.write_dfq_bytes(output_dir, dfq_bytes, BENCH_HEADER)
+            if not success:
+                raise OSError(message_or_filepath)
+
+        _case(results, f"write/{parameter_count}p", time_call(write, repeat, setup=clear_output_dir),
+              parameters=parameter_count, bytes=len(dfq_bytes))
+        del fixture
+
+
+def environment_info() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(), "platform": platform.platform(), "machine": platform.machine(),
+        "cpu_count": os.cpu_count(), "pandas": pd.__version__, "numpy": np.__version__,
+        "openpyxl": openpyxl.__version__,
+        "reader_backends": [backend.name for backend in reader_backends.available_backends()],
+    }
+
+
+def run_suite(parameter_counts: List[int], file_counts: List[int], source_formats: Optional[List[str]] = None,
+              repeat: int = DEFAULT_REPEAT, seed: int = benchmark_data.DEFAULT_SEED,
+              data_dir: Optional[str] = None, include_ingest: bool = True) -> Dict[str, Any]:
+    """运行全部用例，返回结果 (可直接保存为 JSON)。"""
+    source_formats = source_formats or list(benchmark_data.SOURCE_FORMATS)
+    results: Dict[str, Dict[str, Any]] = {}
+    started_at = time.perf_counter()
+    # 写入用例使用本地临时目录，避免测到网络共享
+    with tempfile.TemporaryDirectory(prefix="dfq_bench_") as work_dir:
+        run_model_cases(results, parameter_counts, repeat, seed, work_dir)
+    if include_ingest:
+        run_ingest_cases(results, source_formats, parameter_counts, file_counts, repeat, seed, data_dir)
+    return {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "environment": environment_info(),
+        "settings": {"parameters": parameter_counts, "files": file_counts, "formats": source_formats,
+                     "repeat": repeat, "seed": seed, "generator_version": benchmark_data.GENERATOR_VERSION},
+        "total_seconds": round(time.perf_counter() - started_at, 3),
+        "cases": results,
+    }
+
+
+def save_results(path: str, results: Dict[str, Any]):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        results = json.load(f)
+    if not isinstance(results, dict) or not isinstance(results.get("cases"), dict):
+        raise ValueError(f"'{path}' 不是性能测试结果文件")
+    return results
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float = DEFAULT_REGRESSION_THRESHOLD,
+                    min_seconds: float = DEFAULT_MIN_SECONDS) -> List[Dict[str, Any]]:
+    """按用例名对比两次结果 (各取最快一次)，返回 [{"case", "status", "baseline", "current", "ratio"}]。
+    当前耗时超过基准 × (1 + threshold) 为变慢，低于基准 / (1 + threshold) 为变快；基准耗时低于 min_seconds 的不判定变慢。"""
+    baseline_cases, current_cases = baseline["cases"], current["cases"]
+    comparisons = []
+    for name in list(baseline_cases) + [n for n in current_cases if n not in baseline_cases]:
+        baseline_seconds = baseline_cases.get(name, {}).get("seconds")
+        current_seconds = current_cases.get(name, {}).get("seconds")
+        if current_seconds is None:
+            status, ratio = STATUS_MISSING, None
+        elif baseline_seconds is None:
+            status, ratio = STATUS_NEW, None
+        else:
+            ratio = current_seconds / baseline_seconds if baseline_seconds else None
+            if ratio is None:
+                status = STATUS_UNCHANGED
+            elif ratio > 1 + threshold and baseline_seconds >= min_seconds:
+                status = STATUS_REGRESSION
+            elif ratio < 1 / (1 + threshold):
+                status = STATUS_IMPROVED
+            else:
+                status = STATUS_UNCHANGED
+        comparisons.append({"case": name, "status": status, "baseline": baseline_seconds, "current": current_seconds,
+                            "ratio": ratio})
+    return comparisons
+
+
+def describe_comparison(comparison: Dict[str, Any]) -> str:
+    label = STATUS_LABELS[comparison["status"]]
+    if comparison["ratio"] is None:
+        seconds = comparison["current"] if comparison["current"] is not None else comparison["baseline"]
+        return f"{comparison['case']}: {label} ({seconds:.4f}s)"
+    return (f"{comparison['case']}: {label} {comparison['baseline']:.4f}s → {comparison['current']:.4f}s "
+            f"({comparison['ratio']:.2f}x)")
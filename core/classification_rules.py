@@ -0,0 +1,94 @@
+# core/classification_rules.py
+# 按参数名自动分类：规则 (关键字或正则表达式 → K2005/K2009/K2142 的值) 保存在 config.json 的 ClassificationRules 中。
+# 所有规则编译为一个组合正则表达式 (各规则的分支)，导入时对每个参数名只匹配一次。
+# 参数名中最先出现的匹配决定使用哪条规则，同一位置有多条规则匹配时取列表中靠前的规则。
+import logging
+import re
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# 规则可设置的K值
+RULE_K_KEYS = ("K2005", "K2009", "K2142")
+
+
+class RuleMatcher:
+    """由规则列表编译出的组合匹配器。每条规则: {"Keyword": 关键字 或 "Pattern": 正则表达式,
+    "CaseSensitive": 是否区分大小写 (默认否), "K2005"/"K2009"/"K2142": 匹配时设置的值}。"""
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.rules: List[Dict[str, Any]] = []
+        alternatives = []
+        # 组合表达式中每个规则占一个外层分组；lastindex 为匹配到的外层分组，据此找到规则
+        self._group_to_rule: Dict[int, int] = {}
+        group_index = 1
+        for rule in rules:
+            source = self._rule_source(rule)
+            if source is None:
+                continue
+            self._group_to_rule[group_index] = len(self.rules)
+            group_index += 1 + re.compile(source).groups
+            self.rules.append(rule)
+            alternatives.append(f"({source})")
+        self._pattern = re.compile("|".join(alternatives)) if alternatives else None
+
+    @staticmethod
+    def _rule_source(rule: Any) -> Optional[str]:
+        if not isinstance(rule, dict) or not any(rule.get(k) not in (None, "") for k in RULE_K_KEYS):
+            logger.warning(f"分类规则无效 (缺少要设置的K值)，已忽略: {rule}")
+            return None
+        if rule.get("Keyword"):
+            source = re.escape(str(rule["Keyword"]))
+        elif rule.get("Pattern"):
+            source = str(rule["Pattern"])
+        else:
+            logger.warning(f"分类规则无效 (缺少 Keyword 或 Pattern)，已忽略: {rule}")
+            return None
+        if not rule.get("CaseSensitive", False):
+            source = f"(?i:{source})"
+        try:
+            re.compile(source)
+        except re.error as e:
+            logger.warning(f"分类规则的正则表达式无效 '{source}': {e}，已忽略。")
+            return None
+        return source
+
+    def match_names(self, names: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """返回每个参数名匹配到的规则 (未匹配为 None)。"""
+        if self._pattern is None:
+            return [None] * len(names)
+        search = self._pattern.search
+        matched: List[Optional[Dict[str, Any]]] = []
+        for name in names:
+            match = search(str(name))
+            matched.append(self.rules[self._group_to_rule[match.lastindex]] if match else None)
+        return matched
+
+
+_matcher_cache: Dict[str, RuleMatcher] = {}
+
+
+def get_matcher(rules: List[Dict[str, Any]]) -> RuleMatcher:
+    """按规则内容缓存编译结果，同一组规则只编译一次。"""
+    key = repr(rules)
+    if key not in _matcher_cache:
+        _matcher_cache.clear()
+        _matcher_cache[key] = RuleMatcher(rules)
+    return _matcher_cache[key]
+
+
+def apply_classification_rules(parameters: List[Dict[str, Any]],
+                               classification_settings: Optional[Dict[str, Any]]) -> int:
+    """按参数名 (K2001) 为参数设置规则给出的 K2005/K2009/K2142 值，返回被分类的参数数量。"""
+    if not parameters or not classification_settings or not classification_settings.get("Enabled", False):
+        return 0
+    matcher = get_matcher(classification_settings.get("Rules") or [])
+    classified_count = 0
+    for param, rule in zip(parameters, matcher.match_names([p.get("K2001_val", "") for p in parameters])):
+        if rule is None:
+            continue
+        for k in RULE_K_KEYS:
+            if rule.get(k) not in (None, ""):
+                param[f"{k}_val"] = str(rule[k])
+        classified_count += 1
+    return classified_count
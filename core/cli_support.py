@@ -0,0 +1,41 @@
+# core/cli_support.py
+# 命令行入口 (watch_main.py、batch_main.py 等) 共用的日志设置与源文件收集。
+import logging
+import os
+import sys
+from typing import List, Tuple
+
+
+def setup_cli_logging(log_filename: str, level: int = logging.INFO):
+    log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(funcName)s:%(lineno)d - %(message)s')
+    file_handler = logging.FileHandler(log_filename, encoding='utf-8')
+    file_handler.setFormatter(log_formatter)
+    file_handler.setLevel(level)
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(log_formatter)
+    console_handler.setLevel(level)
+    root_logger = logging.getLogger()
+    root_logger.setLevel(level)
+    root_logger.addHandler(file_handler)
+    root_logger.addHandler(console_handler)
+
+
+def collect_source_files(paths: List[str], extensions: Tuple[str, ...]) -> List[str]:
+    """展开命令行给出的文件/目录 (目录递归查找)，按给出顺序返回去重后的文件列表。"""
+    collected: List[str] = []
+    seen = set()
+    for path in paths:
+        if os.path.isdir(path):
+            candidates = []
+            for dir_path, dir_names, file_names in os.walk(path):
+                dir_names.sort()
+                for file_name in sorted(file_names):
+                    if file_name.lower().endswith(extensions) and not file_name.startswith("~$"):
+                        candidates.append(os.path.join(dir_path, file_name))
+        else:
+            candidates = [path]
+        for candidate in candidates:
+            if candidate not in seen:
+                seen.add(candidate)
+                collected.append(candidate)
+    return collected
@@ -1,6 +1,7 @@
 # core/config_manager.py
 import json
 import os
+import re
 from typing import List, Dict, Any
 
 # 定义 config.json 的基本名称
@@ -15,6 +16,9 @@ PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # 构建 config.json 的绝对路径
 CONFIG_FILE_PATH_ABSOLUTE = os.path.join(PROJECT_ROOT, BASE_CONFIG_FILENAME)
 
+# 本地缓存目录 (索引、日志等仅在本机使用的数据)
+CACHE_DIR = os.path.join(PROJECT_ROOT, "cache")
+
 DEFAULT_CONFIG = {
     "OutputPath": "",
     "SystemSettings": [
@@ -25,7 +29,141 @@ DEFAULT_CONFIG = {
             "K1091": "DefaultLine",
             "K1004": "5"  # 默认SPC送检数量
         }
-    ]
+    ],
+    # 后台写入队列：写入网络共享失败时的重试次数与退避时间 (秒)；
+    # MaxManualRetries 为最终失败的任务可手动重试的轮数，用完后不再保留文件内容，只保留抬头与错误信息
+    "WriteBehind": {
+        "MaxRetries": 5,
+        "InitialBackoffSeconds": 1.0,
+        "MaxBackoffSeconds": 30.0,
+        "MaxManualRetries": 3
+    },
+    # 生成内容与近期输出完全相同时的处理方式: "skip" 跳过, "link" 以硬链接方式创建新文件
+    "DuplicateOutputAction": "skip",
+    # 监视文件夹模式：自动将新出现或变化的检测文件转换为DFQ
+    "WatchFolder": {
+        "Root": "",
+        "PollIntervalSeconds": 10,
+        "StableSeconds": 15,
+        "MaxWorkers": 2,
+        # 首次监视某目录时是否转换其中已有的文件；为 false 时已有文件只登记为基线，之后变化时才转换
+        "ProcessExisting": False,
+        # 修改时间早于 24 小时且未变化的"冷目录"每隔此时长 (秒) 才重新扫描其中的文件
+        "ColdRescanSeconds": 600,
+        # 转换失败 (例如文件被占用或尚未写完) 的文件在未变化时的重试次数上限与重试间隔 (秒)
+        "MaxFailedAttempts": 3,
+        "RetryFailedAfterSeconds": 60
+    },
+    # 隔离解析 (默认关闭)：界面导入时每个源文件在独立进程中解析，超过超时 (秒) 或内存上限 (MB，仅 POSIX 生效) 时终止该文件；
+    # 批量与监视文件夹模式的任务本身已在工作进程中运行，启用时只为这些工作进程设置内存上限。
+    # CostModel 为预计解析耗时的估算参数，用于将大文件优先分配给工作进程 (实际耗时记录在 cache/parse_cost_log.jsonl)
+    "ParseIsolation": {
+        "Enabled": False,
+        "TimeoutSeconds": 120,
+        "MemoryLimitMB": 2048,
+        "MaxWorkers": 2,
+        "CostModel": {
+            "BaseSeconds": 0.01,
+            "SecondsPerMillionCells": 18.0,
+            "SecondsPerMB": 1.0
+        }
+    },
+    # 源文件本地缓存：Mode 为 "auto" (仅网络共享上的文件)、"always" 或 "never"；
+    # 解析时并发预取后续 PrefetchCount 个文件，缓存总大小超过 MaxSizeMB 时按最近使用时间淘汰
+    "SourceCache": {
+        "Mode": "auto",
+        "MaxSizeMB": 2048,
+        "PrefetchCount": 4,
+        "ChunkSizeMB": 8
+    },
+    # 工作表选择：Mode 为 "first" (第一个)、"all" (全部)、"pattern" (名称匹配 Pattern 正则表达式) 或 "indices" (Indices 下标列表)
+    "SheetSelection": {
+        "Mode": "first",
+        "Pattern": "",
+        "Indices": [0]
+    },
+    # 工作簿读取后端："auto" (按 backend_main.py benchmark 的测速结果选择最快且通过一致性检查的后端，尚未测速时使用 pandas)、"pandas" 或 "calamine"
+    "ReaderBackend": "auto",
+    # 参数表布局 (行列下标均从 0 开始)：Mode 为 "fixed" (始终使用 Default，即第14行起 A、C、D、E 列) 或 "auto" (读取开头 SniffRows 行识别表头与各列，按模板缓存)；
+    # Presets 按抬头预设的 K1001 (源文件名第一段) 指定固定布局，例如 {"P507AC-100": {"FirstDataRow": 5, "NominalColumn": 1}}
+    "TableLayout": {
+        "Mode": "fixed",
+        "SniffRows": 40,
+        "Default": {"FirstDataRow": 13, "NameColumn": 0, "NominalColumn": 2, "UpperTolColumn": 3, "LowerTolColumn": 4},
+        "Presets": {}
+    },
+    # 参数数值校验 (公称值、上下公差)：生成DFQ时发现错误的处理方式，"warn" 提示后由用户决定是否继续，"block" 阻止生成
+    "ParameterValidation": {
+        "OnError": "warn"
+    },
+    # 按参数名自动分类：导入时按规则设置 K2005 (参数等级)、K2009 (公差类型)、K2142 的值。
+    # 每条规则为 Keyword (关键字) 或 Pattern (正则表达式)，CaseSensitive 默认为 false；
+    # 参数名中最先出现的匹配生效，同一位置有多条规则匹配时取靠前的规则
+    "ClassificationRules": {
+        "Enabled": True,
+        "Rules": [
+            {"Pattern": "(?<![A-Za-z])Ra(?![A-Za-z])", "CaseSensitive": True, "K2009": "152"},
+            {"Pattern": "(?<![A-Za-z])Rz(?![A-Za-z])", "CaseSensitive": True, "K2009": "150"},
+            {"Pattern": "(?<![A-Za-z])Rt(?![A-Za-z])", "CaseSensitive": True, "K2009": "151"},
+            {"Pattern": "粗糙度|光洁度|roughness", "K2009": "145"},
+            {"Pattern": "直线度|straightness", "K2009": "100"},
+            {"Pattern": "平面度|flatness", "K2009": "101"},
+            {"Keyword": "椭圆度", "K2009": "132"},
+            {"Pattern": "圆度|roundness|circularity", "K2009": "102"},
+            {"Pattern": "圆柱度|cylindricity", "K2009": "103"},
+            {"Keyword": "线轮廓度", "K2009": "104"},
+            {"Keyword": "面轮廓度", "K2009": "105"},
+            {"Pattern": "倾斜度|angularity", "K2009": "106"},
+            {"Pattern": "垂直度|perpendicularity", "K2009": "107"},
+            {"Pattern": "平行度|parallelism", "K2009": "108"},
+            {"Pattern": "位置度|position", "K2009": "109"},
+            {"Pattern": "同心度|concentricity", "K2009": "110"},
+            {"Keyword": "同轴度", "K2009": "663"},
+            {"Pattern": "对称度|symmetry", "K2009": "111"},
+            {"Pattern": "全跳动|total runout", "K2009": "113"},
+            {"Pattern": "跳动|runout", "K2009": "112"},
+            {"Keyword": "最大直径", "K2009": "232"},
+            {"Keyword": "最小直径", "K2009": "233"},
+            {"Keyword": "平均直径", "K2009": "234"},
+            {"Keyword": "内径", "K2009": "207"},
+            {"Keyword": "外径", "K2009": "208"},
+            {"Pattern": "直径|diameter|[Øø⌀]", "K2009": "202"},
+            {"Pattern": "半径|radius", "K2009": "201"},
+            {"Keyword": "锥角", "K2009": "206"},
+            {"Pattern": "角度|angle", "K2009": "203"},
+            {"Pattern": "距离|distance", "K2009": "200"},
+            {"Pattern": "宽度|width", "K2009": "230"},
+            {"Pattern": "硬度|hardness", "K2009": "285"},
+            {"Pattern": "扭矩|torque", "K2009": "301"}
+        ]
+    },
+    # 编辑记忆：生成DFQ时按 (K1001, K1086, 参数名) 记录最终的 K2002/K2003/K2005/K2009/K2142、自然界限、顺序与是否输出，
+    # 再次导入同一零件/工站的文件时自动恢复 (优先于按参数名的自动分类)
+    "EditMemory": {
+        "Enabled": True
+    },
+    # DFQ校验 (K0100、参数序号、自然界限、K2005/K2009 代码与数值)：AfterWrite 为 true 时每次写入DFQ后立即读回校验，
+    # 问题写入日志并在结果中提示；整个输出目录的校验见 python dfq_main.py lint
+    "DfqLint": {
+        "AfterWrite": False
+    },
+    # 测量值：Enabled 为 true 时读取参数表公差列右侧的测量值列 (每列一个零件，FirstValueColumn 为第一列的下标，
+    # null 表示紧接布局最后一列)，参数区上方以 日期/批次/检验员 等为标签的行作为每个零件的 K0004/K0006/K0008，
+    # 生成DFQ时在参数之后写入测量值行
+    "MeasuredValues": {
+        "Enabled": False,
+        "FirstValueColumn": None,
+        "MaxValueColumns": 1000
+    },
+    # 导出格式：除 "dfq" 外可加 "csv"、"jsonl"、"xlsx" (汇总)，与DFQ同名写在同一目录，参数只遍历一次同时生成
+    "ExportFormats": ["dfq"],
+    # 输出目录分层：Subdirectory 为DFQ文件所在子目录的模板，可用 {K1001} {K1002} {K1086} {K1091} {YYYY} {MM} {DD}，
+    # 例如 "{K1001}/{YYYY}/{MM}/{DD}"，空字符串表示直接写在输出目录下；ArchiveAfterDays 大于 0 时，
+    # 批量生成结束后将所有文件都已超过该天数的日期打包为 archive/<日期>.zip 并删除原文件 (也可运行 python dfq_main.py archive)
+    "OutputLayout": {
+        "Subdirectory": "",
+        "ArchiveAfterDays": 0
+    }
 }
 
 
@@ -112,4 +250,198 @@ def update_output_path(path: str):
     """更新输出路径并保存。"""
     config = load_config()
     config["OutputPath"] = path if isinstance(path, str) else DEFAULT_CONFIG["OutputPath"]
-    save_config(config)
\ No newline at end of file
+    save_config(config)
+
+
+def get_write_behind_settings() -> Dict[str, Any]:
+    """获取后台写入队列的重试设置，缺失项使用默认值。"""
+    config = load_config()
+    settings = DEFAULT_CONFIG["WriteBehind"].copy()
+    user_settings = config.get("WriteBehind")
+    if isinstance(user_settings, dict):
+        settings.update({k: v for k, v in user_settings.items() if k in settings})
+    return settings
+
+
+def get_duplicate_output_action() -> str:
+    """获取重复内容的处理方式 ("skip" 或 "link")。"""
+    config = load_config()
+    action = config.get("DuplicateOutputAction", DEFAULT_CONFIG["DuplicateOutputAction"])
+    return action if action in ("skip", "link") else DEFAULT_CONFIG["DuplicateOutputAction"]
+
+
+def get_watch_folder_settings() -> Dict[str, Any]:
+    """获取监视文件夹模式的设置，缺失项使用默认值。"""
+    config = load_config()
+    settings = DEFAULT_CONFIG["WatchFolder"].copy()
+    user_settings = config.get("WatchFolder")
+    if isinstance(user_settings, dict):
+        settings.update({k: v for k, v in user_settings.items() if k in settings})
+    return settings
+
+
+def get_parse_isolation_settings() -> Dict[str, Any]:
+    """获取隔离解析的超时与内存上限设置，缺失项使用默认值。"""
+    config = load_config()
+    settings = DEFAULT_CONFIG["ParseIsolation"].copy()
+    settings["CostModel"] = DEFAULT_CONFIG["ParseIsolation"]["CostModel"].copy()
+    user_settings = config.get("ParseIsolation")
+    if isinstance(user_settings, dict):
+        settings.update({k: v for k, v in user_settings.items() if k in settings and k != "CostModel"})
+        if isinstance(user_settings.get("CostModel"), dict):
+            settings["CostModel"].update({k: v for k, v in user_settings["CostModel"].items() if k in settings["CostModel"]})
+    return settings
+
+
+def get_source_cache_settings() -> Dict[str, Any]:
+    """获取源文件本地缓存的设置，缺失项使用默认值。"""
+    config = load_config()
+    settings = DEFAULT_CONFIG["SourceCache"].copy()
+    user_settings = config.get("SourceCache")
+    if isinstance(user_settings, dict):
+        settings.update({k: v for k, v in user_settings.items() if k in settings})
+    if settings["Mode"] not in ("auto", "always", "never"):
+        settings["Mode"] = DEFAULT_CONFIG["SourceCache"]["Mode"]
+    return settings
+
+
+def get_sheet_selection_settings() -> Dict[str, Any]:
+    """获取工作表选择设置，缺失或无效项使用默认值。"""
+    config = load_config()
+    settings = DEFAULT_CONFIG["SheetSelection"].copy()
+    user_settings = config.get("SheetSelection")
+    if isinstance(user_settings, dict):
+        settings.update({k: v for k, v in user_settings.items() if k in settings})
+    if settings["Mode"] not in ("first", "all", "pattern", "indices"):
+        settings["Mode"] = DEFAULT_CONFIG["SheetSelection"]["Mode"]
+    if not isinstance(settings["Indices"], list):
+        settings["Indices"] = list(DEFAULT_CONFIG["SheetSelection"]["Indices"])
+    if settings["Mode"] == "pattern":
+        try:
+            re.compile(settings["Pattern"])
+        except re.error as e:
+            print(f"工作表名称匹配表达式无效 '{settings['Pattern']}': {e}，改为读取第一个工作表。")
+            settings["Mode"] = DEFAULT_CONFIG["SheetSelection"]["Mode"]
+    return settings
+
+
+def get_reader_backend() -> str:
+    """获取工作簿读取后端名称。"""
+    config = load_config()
+    backend = config.get("ReaderBackend", DEFAULT_CONFIG["ReaderBackend"])
+    return backend if isinstance(backend, str) and backend else DEFAULT_CONFIG["ReaderBackend"]
+
+
+def get_table_layout_settings() -> Dict[str, Any]:
+    """获取参数表布局设置，缺失或无效项使用默认值。"""
+    config = load_config()
+    settings = DEFAULT_CONFIG["TableLayout"].copy()
+    settings["Default"] = DEFAULT_CONFIG["TableLayout"]["Default"].copy()
+    user_settings = config.get("TableLayout")
+    if isinstance(user_settings, dict):
+        settings.update({k: v for k, v in user_settings.items() if k in settings and k != "Default"})
+        if isinstance(user_settings.get("Default"), dict):
+            settings["Default"].update({k: v for k, v in user_settings["Default"].items() if k in settings["Default"]})
+    if settings["Mode"] not in ("auto", "fixed"):
+        settings["Mode"] = DEFAULT_CONFIG["TableLayout"]["Mode"]
+    if not isinstance(settings["SniffRows"], int) or settings["SniffRows"] <= 0:
+        settings["SniffRows"] = DEFAULT_CONFIG["TableLayout"]["SniffRows"]
+    if not isinstance(settings["Presets"], dict):
+        print("TableLayout.Presets 应为 {K1001: 布局} 的字典，已忽略。")
+        settings["Presets"] = {}
+    return settings
+
+
+def get_parameter_validation_settings() -> Dict[str, Any]:
+    """获取参数数值校验设置，缺失或无效项使用默认值。"""
+    config = load_config()
+    settings = DEFAULT_CONFIG["ParameterValidation"].copy()
+    user_settings = config.get("ParameterValidation")
+    if isinstance(user_settings, dict):
+        settings.update({k: v for k, v in user_settings.items() if k in settings})
+    if settings["OnError"] not in ("block", "warn"):
+        settings["OnError"] = DEFAULT_CONFIG["ParameterValidation"]["OnError"]
+    return settings
+
+
+def get_classification_settings() -> Dict[str, Any]:
+    """获取按参数名自动分类的设置；配置中的 Rules 为列表时整体替换默认规则。"""
+    config = load_config()
+    settings = {"Enabled": DEFAULT_CONFIG["ClassificationRules"]["Enabled"],
+                "Rules": list(DEFAULT_CONFIG["ClassificationRules"]["Rules"])}
+    user_settings = config.get("ClassificationRules")
+    if isinstance(user_settings, dict):
+        if isinstance(user_settings.get("Enabled"), bool):
+            settings["Enabled"] = user_settings["Enabled"]
+        if isinstance(user_settings.get("Rules"), list):
+            settings["Rules"] = user_settings["Rules"]
+        elif "Rules" in user_settings:
+            print("ClassificationRules.Rules 应为规则列表，已使用默认规则。")
+    return settings
+
+
+def get_edit_memory_settings() -> Dict[str, Any]:
+    """获取编辑记忆设置，缺失或无效项使用默认值。"""
+    config = load_config()
+    settings = DEFAULT_CONFIG["EditMemory"].copy()
+    user_settings = config.get("EditMemory")
+    if isinstance(user_settings, dict) and isinstance(user_settings.get("Enabled"), bool):
+        settings["Enabled"] = user_settings["Enabled"]
+    return settings
+
+
+def get_dfq_lint_settings() -> Dict[str, Any]:
+    """获取DFQ校验设置，缺失或无效项使用默认值。"""
+    config = load_config()
+    settings = DEFAULT_CONFIG["DfqLint"].copy()
+    user_settings = config.get("DfqLint")
+    if isinstance(user_settings, dict) and isinstance(user_settings.get("AfterWrite"), bool):
+        settings["AfterWrite"] = user_settings["AfterWrite"]
+    return settings
+
+
+def get_measured_values_settings() -> Dict[str, Any]:
+    """获取测量值设置，缺失或无效项使用默认值。"""
+    config = load_config()
+    settings = DEFAULT_CONFIG["MeasuredValues"].copy()
+    user_settings = config.get("MeasuredValues")
+    if isinstance(user_settings, dict):
+        if isinstance(user_settings.get("Enabled"), bool):
+            settings["Enabled"] = user_settings["Enabled"]
+        first_column = user_settings.get("FirstValueColumn")
+        if first_column is None or (isinstance(first_column, int) and not isinstance(first_column, bool)
+                                    and first_column >= 0):
+            settings["FirstValueColumn"] = first_column
+        max_columns = user_settings.get("MaxValueColumns")
+        if isinstance(max_columns, int) and not isinstance(max_columns, bool) and max_columns > 0:
+            settings["MaxValueColumns"] = max_columns
+    return settings
+
+
+EXPORT_FORMAT_NAMES = ("dfq", "csv", "jsonl", "xlsx")
+
+
+def get_export_formats() -> List[str]:
+    """获取导出格式列表 (去重，DFQ 始终在第一位)，未知格式忽略。"""
+    config = load_config()
+    user_formats = config.get("ExportFormats")
+    formats = ["dfq"]
+    if isinstance(user_formats, list):
+        formats.extend(f for f in dict.fromkeys(f for f in user_formats if isinstance(f, str))
+                       if f in EXPORT_FORMAT_NAMES and f != "dfq")
+    return formats
+
+
+def get_output_layout_settings() -> Dict[str, Any]:
+    """获取输出目录分层与归档设置，缺失或无效项使用默认值。"""
+    config = load_config()
+    settings = DEFAULT_CONFIG["OutputLayout"].copy()
+    user_settings = config.get("OutputLayout")
+    if isinstance(user_settings, dict):
+        if isinstance(user_settings.get("Subdirectory"), str):
+            settings["Subdirectory"] = user_settings["Subdirectory"].strip()
+        archive_after_days = user_settings.get("ArchiveAfterDays")
+        if isinstance(archive_after_days, (int, float)) and not isinstance(archive_after_days, bool) \
+                and archive_after_days >= 0:
+            settings["ArchiveAfterDays"] = archive_after_days
+    return settings
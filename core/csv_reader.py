@@ -0,0 +1,85 @@
+# core/csv_reader.py
+# CSV/TSV 测量导出文件的快速读取：不经过 Excel 引擎与 DataFrame，直接流式读取文本，
+# 只取布局需要的 A、C、D、E 列。自动识别编码 (UTF-8/UTF-16 BOM、UTF-8、GBK) 与分隔符。
+import codecs
+import csv
+import itertools
+import logging
+import os
+from typing import List, Tuple, Iterator, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+CSV_EXTENSIONS = ('.csv', '.tsv')
+# 用于识别编码与分隔符的文件开头字节数
+SNIFF_BYTES = 64 * 1024
+# 只用开头若干非空行识别分隔符，Sniffer 对大段文本较慢
+SNIFF_LINES = 50
+CANDIDATE_DELIMITERS = ",\t;|"
+# 布局使用的列下标：A 参数名、C 名义值、D 上公差、E 下公差
+LAYOUT_COLUMNS = (0, 2, 3, 4)
+
+_BOM_ENCODINGS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+
+def detect_encoding(sample: bytes) -> str:
+    """按 BOM 识别 UTF-8/UTF-16；没有 BOM 时能按 UTF-8 解码则为 UTF-8，否则按 GBK (gb18030) 处理。"""
+    for bom, encoding in _BOM_ENCODINGS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        # 增量解码器允许样本末尾截断的多字节字符
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'gb18030'
+
+
+def detect_delimiter(sample_text: str, file_path: str) -> str:
+    """识别分隔符：先用 csv.Sniffer，无法识别时取样本中出现最多的候选分隔符，都没有时 .tsv 使用制表符，其余使用逗号。"""
+    lines = [line for line in sample_text.splitlines() if line.strip()][:SNIFF_LINES]
+    try:
+        return csv.Sniffer().sniff("\n".join(lines), delimiters=CANDIDATE_DELIMITERS).delimiter
+    except csv.Error:
+        counts = {d: sum(line.count(d) for line in lines) for d in CANDIDATE_DELIMITERS}
+        best = max(counts, key=counts.get)
+        if counts[best] > 0:
+            return best
+        return '\t' if file_path.lower().endswith('.tsv') else ','
+
+
+def _detect_format(file_path: str) -> Tuple[str, str]:
+    with open(file_path, 'rb') as f:
+        sample = f.read(SNIFF_BYTES)
+    encoding = detect_encoding(sample)
+    delimiter = detect_delimiter(sample.decode(encoding, errors='ignore'), file_path)
+    logger.debug(f"    CSV 文件 '{os.path.basename(file_path)}': 编码 {encoding}，分隔符 {delimiter!r}")
+    return encoding, delimiter
+
+
+def read_head_rows(file_path: str, nrows: int) -> List[List[str]]:
+    """读取文件开头 nrows 行 (全部列的文本)，用于识别参数表布局。"""
+    encoding, delimiter = _detect_format(file_path)
+    with open(file_path, 'r', encoding=encoding, errors='replace', newline='') as f:
+        return list(itertools.islice(csv.reader(f, delimiter=delimiter), nrows))
+
+
+def iter_layout_rows(file_path: str, stop_at_blank_row: bool = True, first_data_row: int = 13,
+                     columns: Sequence[Optional[int]] = LAYOUT_COLUMNS) -> Iterator[Tuple[int, List[str]]]:
+    """逐行读取文件，返回 (行下标, columns 各列文本，列为 None 或不存在时为 "")。stop_at_blank_row 时参数区
+    (first_data_row 起) 在出现参数行之后遇到第一个完全空白的行即停止读取，不再读取其后的内容。"""
+    encoding, delimiter = _detect_format(file_path)
+    seen_parameter_row = False
+    with open(file_path, 'r', encoding=encoding, errors='replace', newline='') as f:
+        for row_index, row in enumerate(csv.reader(f, delimiter=delimiter)):
+            if row_index >= first_data_row:
+                if not any(cell.strip() for cell in row):
+                    if stop_at_blank_row and seen_parameter_row:
+                        return
+                else:
+                    seen_parameter_row = True
+            yield row_index, [row[i] if i is not None and i < len(row) else "" for i in columns]
@@ -0,0 +1,257 @@
+# core/dfq_lint.py
+# DFQ文件校验：逐个扫描文件中的 K 行 (复用 dfq_reader 的内存映射扫描，测量值行不解码)，检查
+# K0100 与参数数量是否一致、参数序号是否从1连续、K2120/K2121 是否为 0/1/2 且与上下公差是否存在一致、
+# K2005/K2009 代码是否合法，以及公称值与公差的数值问题。
+# 整个目录树按文件分块交给进程池并行校验 (每块的数值校验合并为一次)，结果按完成顺序逐个返回，可直接流式写入 JSON Lines 报告。
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Callable, Tuple
+
+from core import dfq_reader, parameter_validation
+from core.k_codes import K2005_OPTIONS_MAP, K2009_OPTIONS
+from core.parameter_validation import SEVERITY_ERROR, SEVERITY_WARNING
+
+logger = logging.getLogger(__name__)
+
+ISSUE_READ_FAILED = "read_failed"
+ISSUE_COUNT_MISSING = "count_missing"
+ISSUE_COUNT_MISMATCH = "count_mismatch"
+ISSUE_INVALID_NUMBER = "invalid_number"
+ISSUE_NUMBER_GAP = "number_gap"
+ISSUE_DUPLICATE_KEY = "duplicate_key"
+ISSUE_MISSING_NAME = "missing_name"
+ISSUE_INVALID_NATURAL_LIMIT = "invalid_natural_limit"
+ISSUE_LIMIT_WITHOUT_TOLERANCE = "limit_without_tolerance"
+ISSUE_TOLERANCE_WITHOUT_LIMIT = "tolerance_without_limit"
+ISSUE_INVALID_K2005 = "invalid_k2005"
+ISSUE_INVALID_K2009 = "invalid_k2009"
+
+NATURAL_LIMIT_VALUES = ("0", "1", "2")
+# 自然界限标志及其对应的公差 (与 edit_memory 一致)
+NATURAL_LIMIT_KEYS = (("K2121", "K2113", "上"), ("K2120", "K2112", "下"))
+
+# 每个进程池任务校验的文件数；同时在途的任务数为工作进程数的若干倍，避免一次提交整个目录树
+FILES_PER_TASK = 64
+TASKS_IN_FLIGHT_PER_WORKER = 4
+# 序号缺口在说明中最多列出的区间数
+MAX_LISTED_GAPS = 10
+
+
+def _issue(code: str, severity: str, message: str, parameter: Optional[int] = None,
+           k_key: str = "") -> Dict[str, Any]:
+    return {"parameter": parameter, "k_key": k_key, "code": code, "severity": severity, "message": message}
+
+
+def _describe_gaps(numbers: List[int]) -> str:
+    """已排序的参数序号中缺少的序号，例如 "3, 7-9"。"""
+    ranges = []
+    expected = 1
+    for number in numbers:
+        if number > expected:
+            ranges.append(str(expected) if number - 1 == expected else f"{expected}-{number - 1}")
+        expected = number + 1
+    text = ", ".join(ranges[:MAX_LISTED_GAPS])
+    return text + (f" 等 {len(ranges)} 处" if len(ranges) > MAX_LISTED_GAPS else "")
+
+
+def _check_parameter(number: int, values: Dict[str, str]) -> List[Dict[str, Any]]:
+    issues: List[Dict[str, Any]] = []
+    if not values.get("K2001", "").strip():
+        issues.append(_issue(ISSUE_MISSING_NAME, SEVERITY_ERROR, "缺少参数名 (K2001)", number, "K2001"))
+    for flag_key, tol_key, side in NATURAL_LIMIT_KEYS:
+        flag = values.get(flag_key, "0").strip()
+        tolerance_present = bool(values.get(tol_key, "").strip())
+        if flag not in NATURAL_LIMIT_VALUES:
+            issues.append(_issue(ISSUE_INVALID_NATURAL_LIMIT, SEVERITY_ERROR,
+                                 f"{flag_key} ({side}自然界限) 的值 '{flag}' 不是 0/1/2", number, flag_key))
+        elif flag != "0" and not tolerance_present:
+            issues.append(_issue(ISSUE_LIMIT_WITHOUT_TOLERANCE, SEVERITY_ERROR,
+                                 f"{tol_key} ({side}公差) 为空，{flag_key} 应为 0 (实际为 {flag})", number, flag_key))
+        elif flag == "0" and tolerance_present:
+            issues.append(_issue(ISSUE_TOLERANCE_WITHOUT_LIMIT, SEVERITY_WARNING,
+                                 f"{tol_key} ({side}公差) 有值，但 {flag_key} 为 0 (未定义界限类型)", number, flag_key))
+    k2005 = values.get("K2005", "0").strip()
+    if k2005 not in K2005_OPTIONS_MAP:
+        issues.append(_issue(ISSUE_INVALID_K2005, SEVERITY_ERROR, f"K2005 (参数等级) 代码 '{k2005}' 不合法",
+                             number, "K2005"))
+    k2009 = values.get("K2009", "0").strip()
+    if k2009 not in K2009_OPTIONS:
+        issues.append(_issue(ISSUE_INVALID_K2009, SEVERITY_ERROR, f"K2009 (公差类型) 代码 '{k2009}' 不合法",
+                             number, "K2009"))
+    return issues
+
+
+def _scan_dfq_file(file_path: str) -> Tuple[List[Dict[str, Any]], List[int], List[Dict[str, str]]]:
+    """扫描单个文件的结构问题与每个参数的K值，返回 (问题列表, 已排序的参数序号, 对应的参数K值)。"""
+    header: Dict[str, str] = {}
+    values_by_number: Dict[int, Dict[str, str]] = {}
+    issues: List[Dict[str, Any]] = []
+    try:
+        for offset, k_key, number_text, value in dfq_reader.iter_k_lines(file_path):
+            if number_text is None:
+                header[k_key] = value
+                continue
+            if k_key not in dfq_reader.PARAMETER_K_DEFAULTS:
+                continue
+            number = dfq_reader.parse_parameter_number(number_text)
+            if number is None:
+                issues.append(_issue(ISSUE_INVALID_NUMBER, SEVERITY_ERROR,
+                                     f"第 {dfq_reader.line_number_at(file_path, offset)} 行的参数序号无效: "
+                                     f"{k_key}/{number_text}", k_key=k_key))
+                continue
+            if number == 0:
+                continue  # /0 适用于所有参数，不是参数块
+            values = values_by_number.setdefault(number, {})
+            if k_key in values:
+                issues.append(_issue(ISSUE_DUPLICATE_KEY, SEVERITY_WARNING,
+                                     f"{k_key}/{number} 出现多次，以最后一次为准", number, k_key))
+            values[k_key] = value
+    except (OSError, ValueError) as e:
+        return [_issue(ISSUE_READ_FAILED, SEVERITY_ERROR, f"读取失败: {e}")], [], []
+
+    numbers = sorted(values_by_number)
+    declared_count = header.get("K0100", "").strip()
+    if not declared_count:
+        issues.append(_issue(ISSUE_COUNT_MISSING, SEVERITY_ERROR, "缺少 K0100 (参数数量)", k_key="K0100"))
+    elif not declared_count.isdigit() or int(declared_count) != len(numbers):
+        issues.append(_issue(ISSUE_COUNT_MISMATCH, SEVERITY_ERROR,
+                             f"K0100 声明 {declared_count} 个参数，实际有 {len(numbers)} 个参数块", k_key="K0100"))
+    if numbers and numbers[-1] != len(numbers):
+        issues.append(_issue(ISSUE_NUMBER_GAP, SEVERITY_ERROR,
+                             f"参数序号不连续 (最大序号 {numbers[-1]}，共 {len(numbers)} 个)，缺少: {_describe_gaps(numbers)}"))
+    for number in numbers:
+        issues.extend(_check_parameter(number, values_by_number[number]))
+    return issues, numbers, [values_by_number[n] for n in numbers]
+
+
+def lint_dfq_files(file_paths: List[str]) -> List[Dict[str, Any]]:
+    """校验一组DFQ文件，不抛出异常，返回与 file_paths 顺序一致的结果 (见 lint_dfq_file)。
+    各文件的公称值与公差合并后只做一次向量化数值校验，小文件很多时不必逐个文件构建数组。"""
+    scans = [_scan_dfq_file(file_path) for file_path in file_paths]
+    numeric_records: List[Dict[str, str]] = []
+    owners: List[Tuple[int, int]] = []  # 合并后每个参数所属的 (文件下标, 参数序号)
+    for file_index, (_, numbers, values_list) in enumerate(scans):
+        for number, values in zip(numbers, values_list):
+            numeric_records.append({f"{k}_val": values.get(k, "") for k in ("K2101", "K2113", "K2112")})
+            owners.append((file_index, number))
+    for issue in parameter_validation.validate_parameters(numeric_records):
+        file_index, number = owners[issue["index"]]
+        scans[file_index][0].append(_issue(issue["code"], issue["severity"], issue["message"], number,
+                                           issue["k_key"].replace("_val", "")))
+    results = []
+    for file_path, (issues, numbers, _) in zip(file_paths, scans):
+        # 文件级问题在前，其余按参数序号排列
+        issues.sort(key=lambda issue: -1 if issue["parameter"] is None else issue["parameter"])
+        error_count, warning_count = parameter_validation.count_issues(issues)
+        results.append({"file": file_path, "parameter_count": len(numbers), "error_count": error_count,
+                        "warning_count": warning_count, "issues": issues})
+    return results
+
+
+def lint_dfq_file(file_path: str) -> Dict[str, Any]:
+    """校验单个DFQ文件，不抛出异常。返回 {"file", "parameter_count", "error_count", "warning_count",
+    "issues": [{"parameter": 参数序号 (文件级问题为 None), "k_key", "code", "severity", "message"}]}。"""
+    return lint_dfq_files([file_path])[0]
+
+
+def iter_dfq_files(paths: Iterable[str]) -> Iterator[str]:
+    """展开文件与目录 (目录递归查找 .dfq 文件)，逐个返回，不预先收集整个目录树。"""
+    for path in paths:
+        if os.path.isdir(path):
+            for dir_path, dir_names, file_names in os.walk(path):
+                dir_names.sort()
+                for file_name in sorted(file_names):
+                    if file_name.lower().endswith(dfq_reader.DFQ_EXTENSIONS):
+                        yield os.path.join(dir_path, file_name)
+        else:
+            yield path
+
+
+def _chunked(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    chunk: List[str] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def lint_paths(paths: Iterable[str], max_workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """并行校验文件与目录树中的全部DFQ文件，按完成顺序逐个返回每个文件的结果 (见 lint_dfq_file)。
+    文件按 FILES_PER_TASK 个一组提交，同时在途的任务数有上限，数十万个文件也不会一次全部提交。"""
+    worker_count = max_workers or os.cpu_count() or 1
+    chunks = _chunked(iter_dfq_files(paths), FILES_PER_TASK)
+    if worker_count == 1:
+        for chunk in chunks:
+            yield from lint_dfq_files(chunk)
+        return
+    max_in_flight = worker_count * TASKS_IN_FLIGHT_PER_WORKER
+    with ProcessPoolExecutor(max_workers=worker_count) as executor:
+        in_flight = set()
+        for chunk in chunks:
+            in_flight.add(executor.submit(lint_dfq_files, chunk))
+            while len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+
+def write_lint_report(report_path: str, results: Iterable[Dict[str, Any]], include_clean: bool = False,
+                      progress_callback: Optional[Callable[[int, Dict[str, Any]], None]] = None
+                      ) -> Optional[Dict[str, int]]:
+    """将校验结果逐个写为 JSON Lines 报告 (每行一个文件的结果；默认只写有问题的文件)，返回汇总
+    {"files", "files_with_errors", "files_with_warnings", "errors", "warnings"}；写入失败返回 None。
+    progress_callback(已校验文件数, 结果)。"""
+    summary = new_summary()
+    try:
+        with open(report_path, 'w', encoding='utf-8', newline='\n') as f:
+            for result in results:
+                add_to_summary(summary, result)
+                if result["issues"] or include_clean:
+                    f.write(json.dumps(result, ensure_ascii=False) + "\n")
+                if progress_callback: progress_callback(summary["files"], result)
+    except OSError as e:
+        logger.error(f"写入校验报告 '{report_path}' 失败: {e}")
+        return None
+    return summary
+
+
+def new_summary() -> Dict[str, int]:
+    return {"files": 0, "files_with_errors": 0, "files_with_warnings": 0, "errors": 0, "warnings": 0}
+
+
+def add_to_summary(summary: Dict[str, int], result: Dict[str, Any]):
+    summary["files"] += 1
+    summary["errors"] += result["error_count"]
+    summary["warnings"] += result["warning_count"]
+    if result["error_count"]:
+        summary["files_with_errors"] += 1
+    elif result["warning_count"]:
+        summary["files_with_warnings"] += 1
+
+
+def describe_result(result: Dict[str, Any], max_issues: int = 3) -> str:
+    """单个文件校验结果的简短说明，例如 "2 个错误，0 个警告: 参数 3 K2120 …"。"""
+    head = f"{result['error_count']} 个错误，{result['warning_count']} 个警告"
+    details = [(f"参数 {i['parameter']} " if i["parameter"] is not None else "") + i["message"]
+               for i in result["issues"][:max_issues]]
+    return head + (": " + "；".join(details) if details else "") + \
+        (" …" if len(result["issues"]) > max_issues else "")
+
+
+def check_after_write(output_file: str, settings: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """生成后的校验钩子：配置 DfqLint.AfterWrite 开启时校验刚写入的文件并记录问题，返回校验结果；未开启返回 None。"""
+    if not settings or not settings.get("AfterWrite", False) or not output_file:
+        return None
+    result = lint_dfq_file(output_file)
+    if result["error_count"] or result["warning_count"]:
+        logger.warning(f"DFQ校验 '{os.path.basename(output_file)}': {describe_result(result)}")
+    return result
@@ -0,0 +1,296 @@
+# core/dfq_reader.py
+# 读取DFQ文件：将文件映射到内存 (mmap)，用正则表达式直接在字节上扫描 K 行，只有匹配到的 K 行才解码为字符串，
+# 测量值等其他行不会被拆分或复制，数百MB的文件也只占用很少的内存。
+# 在此基础上提供读取为参数列表 (与导入Excel得到的参数记录相同)、多个检验计划的合并与按参数数量拆分。
+import codecs
+import collections
+import logging
+import mmap
+import os
+import re
+from contextlib import contextmanager
+from typing import List, Dict, Any, Tuple, Iterator, Optional
+
+from core.csv_reader import detect_encoding, SNIFF_BYTES
+
+logger = logging.getLogger(__name__)
+
+DFQ_EXTENSIONS = ('.dfq',)
+
+# 参数K值的默认值 (与 excel_processor 构建的参数记录一致)
+PARAMETER_K_DEFAULTS = {
+    "K2001": "", "K2002": "", "K2003": "", "K2005": "0", "K2009": "0", "K2101": "",
+    "K2113": "", "K2112": "", "K2121": "0", "K2120": "0", "K2142": "",
+}
+
+# K 行: "K1001 值"、"K2001/3 值"；序号部分先宽松匹配，再检查是否为数字
+_K_LINE_BYTES = re.compile(rb"^(K\d{4})(?:/(\S*))?(?:[ \t]([^\r\n]*))?\r?$", re.MULTILINE)
+_K_LINE_TEXT = re.compile(r"^(K\d{4})(?:/(\S*))?(?:[ \t]([^\r\n]*))?\r?$", re.MULTILINE)
+
+# UTF-16 文件分块解码的块大小 (字节，须为偶数)
+UTF16_CHUNK_BYTES = 1024 * 1024
+
+# 拆分时同时打开的输出文件数上限 (参数行不按序号分组的文件会在多个输出文件之间来回写入)
+MAX_OPEN_SPLIT_FILES = 32
+
+
+@contextmanager
+def _mapped(file_path: str):
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+
+def _utf16_line_end(data, start: int, end: int, newline: bytes) -> int:
+    """[start, end) 内最后一个换行 (位于偶数字节偏移，即完整的 UTF-16 码元) 之后的位置；
+    块内没有换行时向后找到下一个换行 (单行超过块大小)，到文件末尾仍没有时返回文件长度。"""
+    position = data.rfind(newline, start, end)
+    while position >= start:
+        if (position - start) % 2 == 0:
+            return position + len(newline)
+        position = data.rfind(newline, start, position + 1)
+    position = data.find(newline, end)
+    while position != -1 and (position - start) % 2:
+        position = data.find(newline, position + 1)
+    return len(data) if position == -1 else position + len(newline)
+
+
+def _iter_utf16_k_lines(data) -> Iterator[Tuple[int, str, Optional[str], str]]:
+    """UTF-16 无法在字节上直接匹配：按固定大小分块 (在块内最后一个完整行处截断，不完整的行并入下一块) 解码后扫描，
+    内存占用只与块大小有关。偏移为行首的字节偏移。"""
+    codec = 'utf-16-le' if data[:2] == codecs.BOM_UTF16_LE else 'utf-16-be'
+    newline = "\n".encode(codec)
+    start = len(codecs.BOM_UTF16_LE) if data[:2] in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE) else 0
+    while start < len(data):
+        end = len(data) if start + UTF16_CHUNK_BYTES >= len(data) else \
+            _utf16_line_end(data, start, start + UTF16_CHUNK_BYTES, newline)
+        text = bytes(data[start:end]).decode(codec, errors='replace')
+        # 字符偏移换算为字节偏移：逐段编码两次匹配之间的文本 (代理对占 4 字节)
+        byte_offset, char_offset = start, 0
+        for match in _K_LINE_TEXT.finditer(text):
+            byte_offset += len(text[char_offset:match.start()].encode(codec, errors='replace'))
+            char_offset = match.start()
+            yield byte_offset, match.group(1), match.group(2), match.group(3) or ""
+        start = end
+
+
+def iter_k_lines(file_path: str) -> Iterator[Tuple[int, str, Optional[str], str]]:
+    """逐个返回文件中的 K 行 (行首字节偏移, K键, 序号文本 (抬头行为 None), 值)，其他行 (测量值等) 跳过。"""
+    with _mapped(file_path) as data:
+        encoding = detect_encoding(bytes(data[:SNIFF_BYTES]))
+        if encoding == 'utf-16':
+            # qs-STAT 导出的DFQ通常不是 UTF-16，分块解码后扫描
+            yield from _iter_utf16_k_lines(data)
+            return
+        for match in _K_LINE_BYTES.finditer(data):
+            number = match.group(2)
+            yield (match.start(), match.group(1).decode('ascii'),
+                   None if number is None else number.decode('ascii', 'replace'),
+                   (match.group(3) or b"").decode(encoding, errors='replace'))
+
+
+def line_number_at(file_path: str, offset: int, chunk_size: int = 1024 * 1024) -> int:
+    """字节偏移所在的行号 (分块统计之前的换行数)，只在报告错误时使用。"""
+    count = 0
+    with open(file_path, 'rb') as f:
+        while offset > 0:
+            chunk = f.read(min(chunk_size, offset))
+            if not chunk:
+                break
+            count += chunk.count(b"\n")
+            offset -= len(chunk)
+    return count + 1
+
+
+def parse_parameter_number(number_text: str) -> Optional[int]:
+    return int(number_text) if number_text.isdigit() else None
+
+
+def read_dfq_file(file_path: str) -> Tuple[Dict[str, str], List[Dict[str, Any]], List[str]]:
+    """读取DFQ文件，返回 (抬头 {K0100/K1001…: 值}, 按序号排列的参数列表, 错误列表)。
+    参数记录与导入Excel得到的相同，可直接在预览中编辑并重新生成。"""
+    header_info: Dict[str, str] = {}
+    parameters_by_number: Dict[int, Dict[str, Any]] = {}
+    errors: List[str] = []
+    file_name = os.path.basename(file_path)
+    try:
+        for offset, k_key, number_text, value in iter_k_lines(file_path):
+            if number_text is None:
+                header_info[k_key] = value
+                continue
+            if k_key not in PARAMETER_K_DEFAULTS:
+                continue
+            number = parse_parameter_number(number_text)
+            if number is None:
+                errors.append(f"'{file_name}' 第 {line_number_at(file_path, offset)} 行的参数序号无效: "
+                              f"{k_key}/{number_text}")
+                continue
+            if number == 0:
+                continue  # /0 表示适用于所有参数，本程序不写出
+            param = parameters_by_number.get(number)
+            if param is None:
+                param = {f"{k}_val": v for k, v in PARAMETER_K_DEFAULTS.items()}
+                param.update({"selected_for_output": True, "source_file": file_name, "source_sheet": "",
+                              "original_row_index_df": number - 1, "original_excel_row": number})
+                parameters_by_number[number] = param
+            param[f"{k_key}_val"] = value
+    except (OSError, ValueError) as e:
+        logger.error(f"读取DFQ文件 '{file_path}' 失败: {e}")
+        return {}, [], [f"读取DFQ文件 '{file_name}' 失败: {e}"]
+    parameters = [parameters_by_number[n] for n in sorted(parameters_by_number)]
+    for param in parameters:
+        param["source_name"] = param["K2001_val"]
+    declared_count = header_info.get("K0100", "").strip()
+    if declared_count.isdigit() and int(declared_count) != len(parameters):
+        errors.append(f"'{file_name}': K0100 声明 {declared_count} 个参数，实际读取到 {len(parameters)} 个。")
+    logger.info(f"read_dfq_file: '{file_path}' 中读取到 {len(parameters)} 个参数。")
+    return header_info, parameters, errors
+
+
+def read_dfq_parameters(file_path: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """读取DFQ文件的参数 (忽略抬头)，返回 (参数列表, 错误列表)，用于在界面中重新导入旧的DFQ进行编辑。"""
+    _, parameters, errors = read_dfq_file(file_path)
+    return parameters, errors
+
+
+def _scan_structure(file_path: str) -> Tuple[List[Tuple[str, str]], List[int], int]:
+    """第一遍扫描：返回 (抬头行 [(K键, 值)]，不含 K0100；参数序号 (升序)；/0 行数)。"""
+    header_lines: List[Tuple[str, str]] = []
+    numbers = set()
+    global_line_count = 0
+    for _, k_key, number_text, value in iter_k_lines(file_path):
+        if number_text is None:
+            if k_key != "K0100":
+                header_lines.append((k_key, value))
+            continue
+        number = parse_parameter_number(number_text)
+        if number == 0:
+            global_line_count += 1
+        elif number is not None:
+            numbers.add(number)
+    return header_lines, sorted(numbers), global_line_count
+
+
+def merge_dfq_files(file_paths: List[str], output_file: str) -> Tuple[int, List[str]]:
+    """将多个检验计划合并为一个DFQ文件：参数按文件顺序重新编号为 /1…/N，K0100 为参数总数，抬头取第一个文件的。
+    逐行流式读写，内存占用与文件大小无关。返回 (参数总数, 警告/错误列表)；只合并 K 行，测量值行不会写入。"""
+    errors: List[str] = []
+    structures = []
+    first_header = None
+    for file_path in file_paths:
+        try:
+            header_lines, numbers, global_line_count = _scan_structure(file_path)
+        except OSError as e:
+            logger.error(f"读取DFQ文件 '{file_path}' 失败: {e}")
+            return 0, errors + [f"读取DFQ文件 '{os.path.basename(file_path)}' 失败: {e}"]
+        structures.append(numbers)
+        header = dict(header_lines)
+        if first_header is None:
+            first_header = header_lines
+        elif header.get("K1001", "") != dict(first_header).get("K1001", ""):
+            errors.append(f"'{os.path.basename(file_path)}' 的零件号 K1001 '{header.get('K1001', '')}' "
+                          f"与第一个文件不同，已按第一个文件的抬头合并。")
+        if global_line_count:
+            errors.append(f"'{os.path.basename(file_path)}' 中 {global_line_count} 行 /0 (适用于所有参数) 的K值未合并。")
+    total = sum(len(numbers) for numbers in structures)
+
+    temp_file = output_file + ".tmp"
+    try:
+        with open(temp_file, 'w', encoding='utf-8', newline='\n') as out:
+            out.write(f"K0100 {total}\n")
+            for k_key, value in first_header or []:
+                out.write(f"{k_key} {value}\n")
+            offset = 0
+            for file_path, numbers in zip(file_paths, structures):
+                renumber = {n: offset + i + 1 for i, n in enumerate(numbers)}
+                for _, k_key, number_text, value in iter_k_lines(file_path):
+                    new_number = renumber.get(parse_parameter_number(number_text)) if number_text is not None else None
+                    if new_number is not None:
+                        out.write(f"{k_key}/{new_number} {value}\n")
+                offset += len(numbers)
+        os.replace(temp_file, output_file)
+    except OSError as e:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        logger.error(f"合并DFQ文件到 '{output_file}' 失败: {e}")
+        return 0, errors + [f"合并DFQ文件失败: {e}"]
+    logger.info(f"merge_dfq_files: {len(file_paths)} 个文件合并为 '{output_file}'，共 {total} 个参数。")
+    return total, errors
+
+
+def split_dfq_file(file_path: str, output_dir: str, parameters_per_file: int) -> Tuple[List[str], List[str]]:
+    """将DFQ文件按参数数量拆分为多个文件 (<原文件名>_partNNN.dfq)，每个文件带完整抬头，参数重新编号，
+    /0 行写入每个文件。逐行流式读写。返回 (输出文件列表, 警告/错误列表)。"""
+    if parameters_per_file <= 0:
+        return [], ["每个文件的参数数量必须大于0。"]
+    try:
+        header_lines, numbers, _ = _scan_structure(file_path)
+    except OSError as e:
+        logger.error(f"读取DFQ文件 '{file_path}' 失败: {e}")
+        return [], [f"读取DFQ文件 '{os.path.basename(file_path)}' 失败: {e}"]
+    if not numbers:
+        return [], [f"'{os.path.basename(file_path)}' 中没有参数。"]
+    chunk_count = (len(numbers) + parameters_per_file - 1) // parameters_per_file
+    position = {n: i for i, n in enumerate(numbers)}
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    output_files = [os.path.join(output_dir, f"{stem}_part{i + 1:03d}.dfq") for i in range(chunk_count)]
+    temp_files = [path + ".tmp" for path in output_files]
+    global_lines: List[str] = []
+
+    open_files: "collections.OrderedDict[int, Any]" = collections.OrderedDict()
+    started = set()
+
+    def chunk_file(chunk_index: int):
+        f = open_files.get(chunk_index)
+        if f is not None:
+            open_files.move_to_end(chunk_index)
+            return f
+        if len(open_files) >= MAX_OPEN_SPLIT_FILES:
+            open_files.popitem(last=False)[1].close()
+        f = open(temp_files[chunk_index], 'a' if chunk_index in started else 'w', encoding='utf-8', newline='\n')
+        open_files[chunk_index] = f
+        if chunk_index not in started:
+            started.add(chunk_index)
+            chunk_size = min(parameters_per_file, len(numbers) - chunk_index * parameters_per_file)
+            f.write(f"K0100 {chunk_size}\n")
+            f.writelines(f"{k_key} {value}\n" for k_key, value in header_lines)
+            f.writelines(global_lines)
+        return f
+
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        for _, k_key, number_text, value in iter_k_lines(file_path):
+            if number_text is None:
+                continue
+            number = parse_parameter_number(number_text)
+            if number == 0:
+                line = f"{k_key}/0 {value}\n"
+                global_lines.append(line)
+                for chunk_index in list(started):
+                    chunk_file(chunk_index).write(line)
+                continue
+            if number not in position:
+                continue
+            chunk_index, offset = divmod(position[number], parameters_per_file)
+            chunk_file(chunk_index).write(f"{k_key}/{offset + 1} {value}\n")
+        for f in open_files.values():
+            f.close()
+        open_files.clear()
+        for temp_path, output_path in zip(temp_files, output_files):
+            os.replace(temp_path, output_path)
+    except OSError as e:
+        for f in open_files.values():
+            f.close()
+        for temp_path in temp_files:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        logger.error(f"拆分DFQ文件 '{file_path}' 失败: {e}")
+        return [], [f"拆分DFQ文件失败: {e}"]
+    logger.info(f"split_dfq_file: '{file_path}' 的 {len(numbers)} 个参数拆分为 {chunk_count} 个文件。")
+    return output_files, []
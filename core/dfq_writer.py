@@ -2,80 +2,277 @@
 import logging
 from typing import List, Dict, Any, Tuple
 import datetime
+import hashlib
 import os
+import tempfile
+import threading
+import time
+
+from core import measured_values
 
 logger = logging.getLogger(__name__)
 
+# 同一秒内同名文件允许的最大序号
+MAX_FILENAME_SEQUENCE = 1000
+# 写入过程中的临时文件后缀，qs-STAT 只扫描 .dfq 文件，不会读到未写完的内容
+TEMP_FILE_SUFFIX = ".tmp"
 
-def generate_dfq_content(parameters_to_output: List[Dict[str, Any]], header_info: Dict[str, str]) -> List[str]:
-    logger.info(f"generate_dfq_content: 开始生成DFQ内容，参数数量: {len(parameters_to_output)}")
-    logger.debug(f"  抬头信息: {header_info}")
+# 本进程已确认存在的输出 (子) 目录，按日期/零件分层时避免每次写入都在网络共享上检查或创建目录
+_known_directories = set()
+_known_directories_lock = threading.Lock()
 
-    dfq_lines: List[str] = []
-    param_count = len(parameters_to_output)
 
-    dfq_lines.append(f"K0100 {param_count}")
-    dfq_lines.append(f"K1001 {header_info.get('K1001', '')}")
-    dfq_lines.append(f"K1002 {header_info.get('K1002', '')}")
-    dfq_lines.append(f"K1004 {header_info.get('K1004', '5')}")
-    dfq_lines.append(f"K1086 {header_info.get('K1086', '')}")
-    dfq_lines.append(f"K1091 {header_info.get('K1091', '')}")
+def generate_dfq_header_lines(param_count: int, header_info: Dict[str, str]) -> List[str]:
+    """生成抬头部分 (K0100 与 K1xxx 行)。"""
+    return [
+        f"K0100 {param_count}",
+        f"K1001 {header_info.get('K1001', '')}",
+        f"K1002 {header_info.get('K1002', '')}",
+        f"K1004 {header_info.get('K1004', '5')}",
+        f"K1086 {header_info.get('K1086', '')}",
+        f"K1091 {header_info.get('K1091', '')}",
+    ]
+
 
+def generate_dfq_parameter_lines(parameters_to_output: List[Dict[str, Any]]) -> List[str]:
+    """生成参数部分 (K2001…K2142 行)，与抬头无关，可被多个抬头复用。"""
+    dfq_lines: List[str] = []
     for i, param_data in enumerate(parameters_to_output):
-        param_index_output = i + 1
-        k2001_val = param_data.get('K2001_val', '')
-        k2009_val = param_data.get('K2009_val', '0')  # 获取K2009的值
-        k2120_val = param_data.get('K2120_val', '0')
-        k2121_val = param_data.get('K2121_val', '0')
-        logger.debug(
-            f"  正在写入参数 {param_index_output}: {k2001_val}, K2009='{k2009_val}', K2120='{k2120_val}', K2121='{k2121_val}'")
-
-        dfq_lines.append(f"K2001/{param_index_output} {k2001_val}")
-        dfq_lines.append(f"K2002/{param_index_output} {param_data.get('K2002_val', '')}")
-        dfq_lines.append(f"K2003/{param_index_output} {param_data.get('K2003_val', '')}")
-        dfq_lines.append(f"K2005/{param_index_output} {param_data.get('K2005_val', '0')}")
-        dfq_lines.append(f"K2009/{param_index_output} {k2009_val}")  # 使用获取到的K2009值
-        dfq_lines.append(f"K2101/{param_index_output} {param_data.get('K2101_val', '')}")
-        dfq_lines.append(f"K2113/{param_index_output} {param_data.get('K2113_val', '')}")
-        dfq_lines.append(f"K2112/{param_index_output} {param_data.get('K2112_val', '')}")
-        dfq_lines.append(f"K2121/{param_index_output} {k2121_val}")  # 使用获取到的K2121值
-        dfq_lines.append(f"K2120/{param_index_output} {k2120_val}")  # 使用获取到的K2120值
-        dfq_lines.append(f"K2142/{param_index_output} {param_data.get('K2142_val', '')}")
+        dfq_lines.extend(generate_single_parameter_lines(i + 1, param_data))
+    return dfq_lines
+
+
+def generate_single_parameter_lines(param_index_output: int, param_data: Dict[str, Any]) -> List[str]:
+    """生成单个参数 (输出序号从 1 开始) 的 K2001…K2142 行。"""
+    k2001_val = param_data.get('K2001_val', '')
+    k2009_val = param_data.get('K2009_val', '0')  # 获取K2009的值
+    k2120_val = param_data.get('K2120_val', '0')
+    k2121_val = param_data.get('K2121_val', '0')
+    logger.debug(
+        f"  正在写入参数 {param_index_output}: {k2001_val}, K2009='{k2009_val}', K2120='{k2120_val}', K2121='{k2121_val}'")
+    return [
+        f"K2001/{param_index_output} {k2001_val}",
+        f"K2002/{param_index_output} {param_data.get('K2002_val', '')}",
+        f"K2003/{param_index_output} {param_data.get('K2003_val', '')}",
+        f"K2005/{param_index_output} {param_data.get('K2005_val', '0')}",
+        f"K2009/{param_index_output} {k2009_val}",  # 使用获取到的K2009值
+        f"K2101/{param_index_output} {param_data.get('K2101_val', '')}",
+        f"K2113/{param_index_output} {param_data.get('K2113_val', '')}",
+        f"K2112/{param_index_output} {param_data.get('K2112_val', '')}",
+        f"K2121/{param_index_output} {k2121_val}",  # 使用获取到的K2121值
+        f"K2120/{param_index_output} {k2120_val}",  # 使用获取到的K2120值
+        f"K2142/{param_index_output} {param_data.get('K2142_val', '')}",
+    ]
+
+
+def generate_dfq_content(parameters_to_output: List[Dict[str, Any]], header_info: Dict[str, str]) -> List[str]:
+    logger.info(f"generate_dfq_content: 开始生成DFQ内容，参数数量: {len(parameters_to_output)}")
+    logger.debug(f"  抬头信息: {header_info}")
+
+    dfq_lines = generate_dfq_header_lines(len(parameters_to_output), header_info)
+    dfq_lines.extend(generate_dfq_parameter_lines(parameters_to_output))
+    # 参数带有测量值时 (导入时开启了 MeasuredValues)，在参数之后写入测量值行
+    dfq_lines.extend(measured_values.generate_value_lines(parameters_to_output))
 
     logger.info("DFQ内容生成完毕。")
     return dfq_lines
 
 
-def write_dfq_file(output_path: str, dfq_lines: List[str], header_info: Dict[str, str]) -> Tuple[bool, str]:
-    # ... (此函数与上一轮代码一致)
-    logger.info(f"write_dfq_file: 准备写入DFQ文件到路径: {output_path}")
-    if not os.path.isdir(output_path):
-        try:
-            os.makedirs(output_path, exist_ok=True)
-            logger.info(f"输出目录 '{output_path}' 不存在，已创建。")
-        except OSError as e:
-            logger.error(f"创建输出目录 '{output_path}' 失败: {e}", exc_info=True)
-            return False, f"创建输出目录 '{output_path}' 失败: {e}"
+def generate_dfq_fanout(parameters_to_output: List[Dict[str, Any]],
+                        header_infos: List[Dict[str, str]]) -> List[Tuple[Dict[str, str], bytes, str]]:
+    """参数部分 (含测量值行) 只编码一次，为每个抬头拼接各自的K1xxx行。返回 [(抬头, 文件字节内容, 内容哈希)]。"""
+    logger.info(f"generate_dfq_fanout: 参数数量 {len(parameters_to_output)}，抬头数量 {len(header_infos)}")
+    parameter_lines = generate_dfq_parameter_lines(parameters_to_output)
+    parameter_lines.extend(measured_values.generate_value_lines(parameters_to_output))
+    parameter_block = encode_dfq_lines(parameter_lines)
+    # 与 compute_catalog_hash 的规范化方式保持一致，便于与近期输出索引比对
+    parameter_block_canonical = "\n".join(line.rstrip() for line in parameter_lines).encode('utf-8')
+
+    outputs: List[Tuple[Dict[str, str], bytes, str]] = []
+    for header_info in header_infos:
+        header_lines = generate_dfq_header_lines(len(parameters_to_output), header_info)
+        content_digest = hashlib.sha256("\n".join(line.rstrip() for line in header_lines).encode('utf-8'))
+        if parameter_block_canonical:
+            content_digest.update(b"\n")
+            content_digest.update(parameter_block_canonical)
+        outputs.append((header_info, encode_dfq_lines(header_lines) + parameter_block, content_digest.hexdigest()))
+    logger.info("DFQ多抬头内容生成完毕。")
+    return outputs
+
+
+def encode_dfq_lines(dfq_lines: List[str]) -> bytes:
+    """将DFQ行编码为写入文件的字节内容 (UTF-8，每行以换行结尾)。"""
+    return "".join(line + "\n" for line in dfq_lines).encode('utf-8')
+
+
+def compute_catalog_hash(dfq_lines: List[str]) -> str:
+    """计算检验计划内容 (抬头 + 参数) 的规范化哈希，与文件名中的时间戳无关。"""
+    canonical = "\n".join(line.rstrip() for line in dfq_lines)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
 
+def _sanitize_filename_part(name: str) -> str:
+    return "".join(c if c.isalnum() or c in ('_', '-') else '_' for c in name)
+
+
+def build_dfq_filename(header_info: Dict[str, str], timestamp: str, sequence: int = 0) -> str:
+    """生成DFQ文件名；sequence > 0 时追加序号后缀以避免同一秒内的重名。"""
     k1001 = header_info.get('K1001', 'NA')
     k1002 = header_info.get('K1002', 'NA')
     k1086 = header_info.get('K1086', 'NA')
     k1091 = header_info.get('K1091', 'NA')
-    timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+    base_name = (f"{_sanitize_filename_part(k1001)}_{_sanitize_filename_part(k1002)}_"
+                 f"{_sanitize_filename_part(k1086)}_{_sanitize_filename_part(k1091)}_{timestamp}")
+    if sequence > 0:
+        base_name += f"_{sequence:03d}"
+    return base_name + ".dfq"
+
 
-    def sanitize(name):
-        return "".join(c if c.isalnum() or c in ('_', '-') else '_' for c in name)
+def _publish_no_clobber(temp_path: str, target_path: str) -> bool:
+    """将临时文件原子地发布为目标文件；目标已存在时返回 False 且不覆盖。"""
+    if os.name == 'nt':
+        # Windows 下 os.rename 在目标已存在时会抛出 FileExistsError，本身即为不覆盖的原子重命名
+        try:
+            os.rename(temp_path, target_path)
+            return True
+        except FileExistsError:
+            return False
+    try:
+        os.link(temp_path, target_path)
+    except FileExistsError:
+        return False
+    except OSError:
+        # 部分网络共享不支持硬链接：确认目标不存在后直接重命名。不先创建占位文件，读取方不会看到空的DFQ
+        # (检查与重命名之间的极短窗口内若有同名文件出现会被覆盖，文件名含时间戳，实际不会发生)
+        if os.path.lexists(target_path):
+            return False
+        os.rename(temp_path, target_path)
+        return True
+    os.remove(temp_path)
+    return True
 
-    filename = f"{sanitize(k1001)}_{sanitize(k1002)}_{sanitize(k1086)}_{sanitize(k1091)}_{timestamp}.dfq"
-    file_path = os.path.join(output_path, filename)
-    logger.debug(f"目标DFQ文件名: {file_path}")
 
+def resolve_output_directory(output_path: str, header_info: Dict[str, str], subdirectory_template: str,
+                             now: datetime.datetime) -> str:
+    """按子目录模板 (例如 "{K1001}/{YYYY}/{MM}/{DD}") 得到DFQ文件所在目录；模板为空或无效时为输出目录本身。
+    抬头字段按文件名规则清理，不会产生 ".." 等路径。"""
+    if not subdirectory_template:
+        return output_path
+    fields = {key: _sanitize_filename_part(header_info.get(key, '') or 'NA')
+              for key in ('K1001', 'K1002', 'K1086', 'K1091')}
+    fields.update(YYYY=f"{now.year:04d}", MM=f"{now.month:02d}", DD=f"{now.day:02d}")
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            for line in dfq_lines:
-                f.write(line + "\n")
-        logger.info(f"DFQ文件成功写入到: {file_path}")
-        return True, file_path
-    except IOError as e:
-        logger.error(f"写入 DFQ 文件 '{file_path}' 失败: {e}", exc_info=True)
-        return False, f"写入 DFQ 文件 '{file_path}' 失败: {e}"
\ No newline at end of file
+        parts = [part.format_map(fields) for part in subdirectory_template.replace('\\', '/').split('/')]
+    except (KeyError, ValueError, IndexError) as e:
+        logger.warning(f"输出子目录模板 '{subdirectory_template}' 无效，直接写入输出目录: {e}")
+        return output_path
+    parts = [part for part in parts if part and part not in ('.', '..')]
+    return os.path.join(output_path, *parts) if parts else output_path
+
+
+def ensure_output_directory(directory: str) -> Tuple[bool, str]:
+    """确保目录存在；已确认过的目录直接返回。返回 (是否成功, 错误信息)。"""
+    with _known_directories_lock:
+        if directory in _known_directories:
+            return True, ""
+    if not os.path.isdir(directory):
+        try:
+            os.makedirs(directory, exist_ok=True)
+            logger.info(f"输出目录 '{directory}' 不存在，已创建。")
+        except OSError as e:
+            logger.error(f"创建输出目录 '{directory}' 失败: {e}", exc_info=True)
+            return False, f"创建输出目录 '{directory}' 失败: {e}"
+    with _known_directories_lock:
+        _known_directories.add(directory)
+    return True, ""
+
+
+def forget_output_directory(directory: str):
+    """写入失败时将目录移出已确认列表 (可能已被删除或归档)，下次写入重新检查。"""
+    with _known_directories_lock:
+        _known_directories.discard(directory)
+
+
+def write_dfq_bytes(output_path: str, data: bytes, header_info: Dict[str, str],
+                    subdirectory_template: str = "") -> Tuple[bool, str]:
+    """先写入目标目录下的 .tmp 临时文件，再以不覆盖的方式原子发布；文件名冲突时递增序号。
+    subdirectory_template 非空时写入按模板分层的子目录 (见 resolve_output_directory)。"""
+    logger.info(f"write_dfq_bytes: 准备写入DFQ文件到路径: {output_path}")
+    now = datetime.datetime.now()
+    target_dir = resolve_output_directory(output_path, header_info, subdirectory_template, now)
+    success, error_message = ensure_output_directory(target_dir)
+    if not success:
+        return False, error_message
+
+    timestamp = now.strftime("%Y%m%d%H%M%S")
+    temp_path = ""
+    file_path = ""
+    try:
+        temp_fd, temp_path = tempfile.mkstemp(suffix=TEMP_FILE_SUFFIX, prefix=".dfq_", dir=target_dir)
+        with os.fdopen(temp_fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        for sequence in range(MAX_FILENAME_SEQUENCE):
+            file_path = os.path.join(target_dir, build_dfq_filename(header_info, timestamp, sequence))
+            if _publish_no_clobber(temp_path, file_path):
+                temp_path = ""
+                logger.info(f"DFQ文件成功写入到: {file_path}")
+                return True, file_path
+            logger.debug(f"目标文件已存在，尝试下一个序号: {file_path}")
+        logger.error(f"同一秒内的候选文件名已全部被占用: {file_path}")
+        return False, f"无法为 DFQ 文件分配唯一文件名 (同一秒内已有 {MAX_FILENAME_SEQUENCE} 个同名文件)。"
+    except OSError as e:
+        forget_output_directory(target_dir)
+        logger.error(f"写入 DFQ 文件 '{file_path or target_dir}' 失败: {e}", exc_info=True)
+        return False, f"写入 DFQ 文件 '{file_path or target_dir}' 失败: {e}"
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError as e:
+                logger.warning(f"删除临时文件 '{temp_path}' 失败: {e}")
+
+
+def link_existing_dfq(output_path: str, existing_file: str, header_info: Dict[str, str],
+                      subdirectory_template: str = "") -> Tuple[bool, str]:
+    """以硬链接方式为内容相同的已有文件创建一个新文件名，不重新写入内容。"""
+    now = datetime.datetime.now()
+    target_dir = resolve_output_directory(output_path, header_info, subdirectory_template, now)
+    success, error_message = ensure_output_directory(target_dir)
+    if not success:
+        return False, error_message
+    timestamp = now.strftime("%Y%m%d%H%M%S")
+    for sequence in range(MAX_FILENAME_SEQUENCE):
+        file_path = os.path.join(target_dir, build_dfq_filename(header_info, timestamp, sequence))
+        try:
+            os.link(existing_file, file_path)
+            logger.info(f"已为 '{existing_file}' 创建硬链接: {file_path}")
+            return True, file_path
+        except FileExistsError:
+            continue
+        except OSError as e:
+            logger.warning(f"创建硬链接 '{file_path}' 失败: {e}")
+            return False, f"创建硬链接失败: {e}"
+    return False, f"无法为硬链接分配唯一文件名 (同一秒内已有 {MAX_FILENAME_SEQUENCE} 个同名文件)。"
+
+
+def write_dfq_bytes_with_retry(output_path: str, data: bytes, header_info: Dict[str, str],
+                               max_retries: int = 3, initial_backoff: float = 1.0,
+                               max_backoff: float = 30.0, subdirectory_template: str = "") -> Tuple[bool, str]:
+    """写入失败时按指数退避重试，用于网络共享上的瞬时错误。"""
+    success, message_or_filepath = write_dfq_bytes(output_path, data, header_info, subdirectory_template)
+    delay = initial_backoff
+    for attempt in range(1, max_retries + 1):
+        if success:
+            break
+        logger.warning(f"写入失败 (第 {attempt}/{max_retries} 次重试将在 {delay:.1f}s 后进行): {message_or_filepath}")
+        time.sleep(delay)
+        delay = min(delay * 2, max_backoff)
+        success, message_or_filepath = write_dfq_bytes(output_path, data, header_info, subdirectory_template)
+    return success, message_or_filepath
+
+
+def write_dfq_file(output_path: str, dfq_lines: List[str], header_info: Dict[str, str],
+                   subdirectory_template: str = "") -> Tuple[bool, str]:
+    return write_dfq_bytes(output_path, encode_dfq_lines(dfq_lines), header_info, subdirectory_template)
@@ -0,0 +1,137 @@
+# core/edit_memory.py
+# 本机保存的"编辑记忆" (SQLite)：生成DFQ时按 (K1001, K1086, 导入时的参数名) 记录用户最终确定的
+# K2001/K2002/K2003/K2005/K2009/K2142、自然界限 (K2121/K2120)、参数顺序与是否输出；
+# 再次导入同一零件/工站的文件时，用一次按主键的连接查询取回全部记录并恢复，不逐个参数查询。
+import datetime
+import logging
+import os
+import sqlite3
+from typing import List, Dict, Any, Optional, Tuple
+
+from core.config_manager import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+EDIT_MEMORY_PATH = os.path.join(CACHE_DIR, "edit_memory.sqlite3")
+
+# 记录并恢复的K值 (参数字典中的键为 f"{k}_val")
+REMEMBERED_K_KEYS = ("K2001", "K2002", "K2003", "K2005", "K2009", "K2142")
+# 自然界限标志及其对应的公差：公差为空时标志必须为 0，不恢复
+NATURAL_LIMIT_KEYS = (("K2121", "K2113"), ("K2120", "K2112"))
+
+_VALUE_COLUMNS = [k.lower() for k in REMEMBERED_K_KEYS] + [k.lower() for k, _ in NATURAL_LIMIT_KEYS]
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS parameter_edits (
+    k1001 TEXT NOT NULL,
+    k1086 TEXT NOT NULL,
+    source_name TEXT NOT NULL,
+    {", ".join(f"{c} TEXT" for c in _VALUE_COLUMNS)},
+    selected INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (k1001, k1086, source_name)
+) WITHOUT ROWID
+"""
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(_SCHEMA)
+    return conn
+
+
+def memory_key(header_info: Dict[str, str]) -> Tuple[str, str]:
+    """编辑记忆按抬头的 (K1001 零件号, K1086 工站) 区分。"""
+    return str(header_info.get("K1001", "")), str(header_info.get("K1086", ""))
+
+
+def _source_name(param: Dict[str, Any]) -> str:
+    # 导入时的参数名；用户在预览中改名后仍按原名匹配
+    return str(param.get("source_name", param.get("K2001_val", "")))
+
+
+def record_edits(header_info: Dict[str, str], parameters: List[Dict[str, Any]],
+                 db_path: str = EDIT_MEMORY_PATH) -> int:
+    """记录 parameters (完整的参数列表，含未选中输出的参数，顺序即输出顺序) 的最终值，返回记录条数。"""
+    if not parameters:
+        return 0
+    k1001, k1086 = memory_key(header_info)
+    updated_at = datetime.datetime.now().isoformat(timespec="seconds")
+    rows = []
+    for position, param in enumerate(parameters):
+        rows.append((k1001, k1086, _source_name(param),
+                     *(str(param.get(f"{c.upper()}_val", "")) for c in _VALUE_COLUMNS),
+                     1 if param.get("selected_for_output", True) else 0, position, updated_at))
+    columns = ["k1001", "k1086", "source_name", *_VALUE_COLUMNS, "selected", "position", "updated_at"]
+    try:
+        conn = _connect(db_path)
+        try:
+            with conn:
+                conn.executemany(f"INSERT OR REPLACE INTO parameter_edits ({', '.join(columns)}) "
+                                 f"VALUES ({', '.join('?' * len(columns))})", rows)
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"写入编辑记忆 '{db_path}' 失败: {e}")
+        return 0
+    logger.info(f"编辑记忆: 已记录 {len(rows)} 个参数 (K1001 {k1001}, K1086 {k1086})。")
+    return len(rows)
+
+
+def load_edits(header_info: Dict[str, str], parameters: List[Dict[str, Any]],
+               db_path: str = EDIT_MEMORY_PATH) -> Dict[int, Dict[str, Any]]:
+    """返回 {参数下标: 记录}。参数名写入临时表后与记忆表做一次连接查询。"""
+    if not parameters or not os.path.exists(db_path):
+        return {}
+    k1001, k1086 = memory_key(header_info)
+    columns = [*_VALUE_COLUMNS, "selected", "position"]
+    try:
+        conn = _connect(db_path)
+        try:
+            conn.execute("CREATE TEMP TABLE incoming (idx INTEGER PRIMARY KEY, source_name TEXT NOT NULL)")
+            conn.executemany("INSERT INTO incoming (idx, source_name) VALUES (?, ?)",
+                             ((i, _source_name(p)) for i, p in enumerate(parameters)))
+            cursor = conn.execute(
+                f"SELECT i.idx, {', '.join(f'e.{c}' for c in columns)} FROM incoming i "
+                f"JOIN parameter_edits e ON e.k1001 = ? AND e.k1086 = ? AND e.source_name = i.source_name",
+                (k1001, k1086))
+            return {row[0]: dict(zip(columns, row[1:])) for row in cursor}
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"读取编辑记忆 '{db_path}' 失败: {e}")
+        return {}
+
+
+def apply_edit_memory(parameters: List[Dict[str, Any]], header_info: Optional[Dict[str, str]],
+                      settings: Optional[Dict[str, Any]] = None,
+                      db_path: str = EDIT_MEMORY_PATH) -> Tuple[List[Dict[str, Any]], int]:
+    """恢复已记忆的参数值与顺序，返回 (排序后的参数列表, 恢复的参数数量)。
+    记忆中的参数按记录的顺序排列；新参数排在导入顺序中紧邻其前的已记忆参数之后。"""
+    if not parameters or not header_info or (settings is not None and not settings.get("Enabled", True)):
+        return parameters, 0
+    edits = load_edits(header_info, parameters, db_path)
+    if not edits:
+        return parameters, 0
+    sort_keys = []
+    last_position = -1
+    for i, param in enumerate(parameters):
+        edit = edits.get(i)
+        if edit is None:
+            sort_keys.append((last_position, 1, i))
+            continue
+        for k in REMEMBERED_K_KEYS:
+            if edit[k.lower()] is not None:
+                param[f"{k}_val"] = edit[k.lower()]
+        for flag_key, tol_key in NATURAL_LIMIT_KEYS:
+            if edit[flag_key.lower()] is not None and str(param.get(f"{tol_key}_val", "")).strip():
+                param[f"{flag_key}_val"] = edit[flag_key.lower()]
+        param["selected_for_output"] = bool(edit["selected"])
+        last_position = edit["position"]
+        sort_keys.append((last_position, 0, i))
+    order = sorted(range(len(parameters)), key=sort_keys.__getitem__)
+    return [parameters[i] for i in order], len(edits)
@@ -2,83 +2,316 @@
 # (代码与第25轮回复中的版本完全相同，此处不再重复)
 # 请确保您使用的是那个版本，它正确处理了K值的初始化。
 import pandas as pd
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Optional
 import os
 import logging
+import re
+
+from core import classification_rules, csv_reader, dfq_reader, measured_values, parse_scheduler, reader_backends, \
+    source_cache, table_layout
 
 logger = logging.getLogger(__name__)
 
+# 支持导入的源文件扩展名 (小写)
+EXCEL_EXTENSIONS = ('.xls', '.xlsx')
+SUPPORTED_EXTENSIONS = EXCEL_EXTENSIONS + csv_reader.CSV_EXTENSIONS
 
-def read_excel_files(file_paths: List[str]) -> Tuple[List[Dict[str, Any]], List[str]]:
-    logger.info(f"read_excel_files: 开始处理 {len(file_paths)} 个Excel文件。")
-    all_parameters_raw: List[Dict[str, Any]] = []
+# 工作表选择方式：第一个工作表 / 全部工作表 / 名称匹配正则表达式 / 按下标列表
+SHEET_MODE_FIRST = "first"
+SHEET_MODE_ALL = "all"
+SHEET_MODE_PATTERN = "pattern"
+SHEET_MODE_INDICES = "indices"
+
+
+def select_sheet_names(sheet_names: List[str], sheet_selection: Optional[Dict[str, Any]] = None) -> List[str]:
+    """按工作表选择设置 (见 config_manager.get_sheet_selection_settings) 从工作簿的工作表中选出要读取的工作表。"""
+    mode = (sheet_selection or {}).get("Mode", SHEET_MODE_FIRST)
+    if mode == SHEET_MODE_ALL:
+        return list(sheet_names)
+    if mode == SHEET_MODE_PATTERN:
+        pattern = re.compile(sheet_selection.get("Pattern", ""), re.IGNORECASE)
+        return [name for name in sheet_names if pattern.search(str(name))]
+    if mode == SHEET_MODE_INDICES:
+        indices = sheet_selection.get("Indices", [0])
+        return [sheet_names[i] for i in indices if isinstance(i, int) and -len(sheet_names) <= i < len(sheet_names)]
+    return list(sheet_names[:1])
+
+
+def build_parameter_record(param_name: str, nominal_value: str, upper_tol_str: str, lower_tol_str: str,
+                           file_path: str, sheet_name: str, row_idx: int) -> Dict[str, Any]:
+    """按源文件中一行的参数名、名义值与上下公差构建参数记录 (K值初始值)。"""
+    k2003_val = ""
+    k2005_val = "0"
+    k2009_val = "0"
+    k2142_val = ""  # 修正2：K2142 始终默认空
+
+    is_upper_tol_present_in_excel = (upper_tol_str.strip() != "")
+    is_lower_tol_present_in_excel = (lower_tol_str.strip() != "")
+
+    k2121_initial_val = '1' if is_upper_tol_present_in_excel else '0'
+    k2120_initial_val = '1' if is_lower_tol_present_in_excel else '0'
+
+    return {
+        "K2001_val": param_name, "K2002_val": param_name,
+        "K2101_val": nominal_value,
+        "K2113_val": upper_tol_str, "K2112_val": lower_tol_str,
+        "K2142_val": k2142_val, "K2003_val": k2003_val,
+        "K2005_val": k2005_val, "K2009_val": k2009_val,
+        "K2121_val": k2121_initial_val, "K2120_val": k2120_initial_val,
+        "selected_for_output": True,
+        "source_name": param_name,
+        "source_file": os.path.basename(file_path),
+        "source_sheet": sheet_name,
+        "original_row_index_df": row_idx,
+        "original_excel_row": row_idx + 14
+    }
+
+
+def _extract_parameters_from_frame(df: pd.DataFrame, file_path: str, sheet_name: str,
+                                   layout: Optional[Dict[str, Any]] = None,
+                                   measurement_settings: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """按布局 (默认第14行起 A、C、D、E 列，见 core/table_layout.py) 从一个工作表的数据中提取参数。
+    df 的列标签为原列下标 (可只包含布局用到的列)；measurement_settings 开启时同时读取测量值列 (见 core/measured_values.py)。"""
+    parameters: List[Dict[str, Any]] = []
+    layout = layout or table_layout.DEFAULT_LAYOUT
+
+    def cell_text(row, column):
+        return str(row[column]).strip() if column is not None and column in row.index and pd.notna(row[column]) else ""
+
+    for row_idx, row in df.iloc[layout["FirstDataRow"]:].iterrows():
+        param_name = cell_text(row, layout["NameColumn"])
+        if not param_name:
+            logger.debug(
+                f"    文件 '{os.path.basename(file_path)}' 工作表 '{sheet_name}' Excel行 {row_idx + 14} 参数名为空，跳过。")
+            continue
+
+        nominal_value = cell_text(row, layout["NominalColumn"])
+        upper_tol_str = cell_text(row, layout["UpperTolColumn"])
+        lower_tol_str = cell_text(row, layout["LowerTolColumn"])
+        parameters.append(build_parameter_record(param_name, nominal_value, upper_tol_str, lower_tol_str,
+                                                 file_path, sheet_name, row_idx))
+    measured_values.attach_measurements(parameters, df, layout, measurement_settings, f"{file_path}|{sheet_name}")
+    return parameters
+
+
+def read_single_csv_file(file_path: str, stop_at_blank_row: bool = True,
+                         layout_settings: Optional[Dict[str, Any]] = None,
+                         measurement_settings: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """读取 CSV/TSV 文件的参数 (布局与 Excel 相同，默认第14行起 A、C、D、E 列)，单元格文本原样使用。
+    measurement_settings 开启时同时读取测量值列。"""
+    parameters: List[Dict[str, Any]] = []
     errors: List[str] = []
+    file_name = os.path.basename(file_path)
+    layout = table_layout.resolve_layout(file_path, lambda nrows: csv_reader.read_head_rows(file_path, nrows),
+                                         layout_settings)
+    if layout is None:
+        errors.append(f"文件 '{file_name}' 未能识别参数表布局 (开头若干行中没有表头或参数行)。")
+        return parameters, errors
+    first_data_row = layout["FirstDataRow"]
+    columns = [layout[key] for key in table_layout.LAYOUT_KEYS[1:]]
+    with_values = bool(measurement_settings and measurement_settings.get("Enabled", False))
+    value_columns = measured_values.value_columns(layout, measurement_settings) if with_values else []
+    value_rows: List[List[str]] = []  # 每行的参数名与测量值列 (含参数区上方的零件信息行)
+    row_count = 0
+    for row_idx, row in csv_reader.iter_layout_rows(file_path, stop_at_blank_row, first_data_row,
+                                                    columns + value_columns):
+        param_name, nominal_value, upper_tol_str, lower_tol_str = row[:4]
+        row_count = row_idx + 1
+        if with_values:
+            value_rows.append([param_name] + row[4:])
+        if row_idx < first_data_row:
+            continue
+        param_name = param_name.strip()
+        if not param_name:
+            logger.debug(f"    文件 '{file_name}' 行 {row_idx + 14} 参数名为空，跳过。")
+            continue
+        parameters.append(build_parameter_record(param_name, nominal_value.strip(), upper_tol_str.strip(),
+                                                 lower_tol_str.strip(), file_path, "", row_idx))
+    if row_count < first_data_row:
+        errors.append(f"文件 '{file_name}' 的行数少于14行，无法处理。")
+    elif value_rows:
+        frame = pd.DataFrame(value_rows, columns=[layout["NameColumn"]] + value_columns)
+        frame = frame.loc[:, (frame != "").any()]  # 去掉全部为空的列
+        measured_values.attach_measurements(parameters, frame, layout, measurement_settings, f"{file_path}|")
+    return parameters, errors
+
+
+def _head_rows(df: pd.DataFrame) -> List[List[Any]]:
+    return df.astype(object).where(df.notna(), None).values.tolist()
 
-    for file_idx, file_path in enumerate(file_paths):
-        logger.debug(f"  正在处理文件 {file_idx + 1}/{len(file_paths)}: {file_path}")
-        try:
-            engine = None
-            if file_path.lower().endswith('.xlsx'):
-                engine = 'openpyxl'
-            elif file_path.lower().endswith('.xls'):
-                engine = 'xlrd'
-            else:
-                errors.append(f"不支持的文件类型: {os.path.basename(file_path)}。仅支持 .xls 和 .xlsx。")
-                continue
 
-            df = pd.read_excel(file_path, header=None, sheet_name=0, engine=engine)
-            if df.shape[0] < 13:
-                errors.append(f"文件 '{os.path.basename(file_path)}' 的行数少于14行，无法处理。")
+def _read_selected_sheets(file_path: str, sheet_selection: Optional[Dict[str, Any]],
+                          backend: reader_backends.ReaderBackend, layout_settings: Optional[Dict[str, Any]],
+                          measurement_settings: Optional[Dict[str, Any]] = None
+                          ) -> Tuple[List[str], Dict[str, Tuple[Optional[Dict[str, Any]], Optional[pd.DataFrame]]]]:
+    """用指定后端打开工作簿一次，先确定每个所选工作表的布局 (需要识别时只读取开头若干行)，再只读取布局用到的列
+    (读取测量值时再加上测量值列)。返回 (所选工作表名称, {名称: (布局, DataFrame)})，无法识别布局的工作表为 (None, None)。"""
+    workbook = backend.open_workbook(file_path)
+    try:
+        sheet_names = select_sheet_names(workbook.sheet_names, sheet_selection)
+        sheets = {}
+        for sheet_name in sheet_names:
+            layout = table_layout.resolve_layout(
+                file_path, lambda nrows: _head_rows(workbook.read_sheet_head(sheet_name, nrows)), layout_settings)
+            if layout is None:
+                sheets[sheet_name] = (None, None)
                 continue
+            columns = table_layout.layout_columns(layout)
+            if measurement_settings and measurement_settings.get("Enabled", False):
+                columns += measured_values.value_columns(layout, measurement_settings)
+            sheets[sheet_name] = (layout, workbook.read_sheet(sheet_name, columns))
+        return sheet_names, sheets
+    finally:
+        workbook.close()
 
-            col_count = df.shape[1]
-
-            for row_idx, row in df.iloc[13:].iterrows():
-                excel_row_display = row_idx + 14
-                param_name = str(row.iloc[0]).strip() if col_count > 0 and pd.notna(row.iloc[0]) else ""
-                if not param_name:
-                    logger.debug(
-                        f"    文件 '{os.path.basename(file_path)}' Excel行 {excel_row_display} 参数名为空，跳过。")
-                    continue
-
-                nominal_value = str(row.iloc[2]).strip() if col_count > 2 and pd.notna(row.iloc[2]) else ""
-                upper_tol_str = str(row.iloc[3]).strip() if col_count > 3 and pd.notna(row.iloc[3]) else ""
-                lower_tol_str = str(row.iloc[4]).strip() if col_count > 4 and pd.notna(row.iloc[4]) else ""
-
-                k2003_val = ""
-                k2005_val = "0"
-                k2009_val = "0"
-                k2142_val = ""  # 修正2：K2142 始终默认空
-
-                is_upper_tol_present_in_excel = (upper_tol_str.strip() != "")
-                is_lower_tol_present_in_excel = (lower_tol_str.strip() != "")
-
-                k2121_initial_val = '1' if is_upper_tol_present_in_excel else '0'
-                k2120_initial_val = '1' if is_lower_tol_present_in_excel else '0'
-
-                all_parameters_raw.append({
-                    "K2001_val": param_name, "K2002_val": param_name,
-                    "K2101_val": nominal_value,
-                    "K2113_val": upper_tol_str, "K2112_val": lower_tol_str,
-                    "K2142_val": k2142_val, "K2003_val": k2003_val,
-                    "K2005_val": k2005_val, "K2009_val": k2009_val,
-                    "K2121_val": k2121_initial_val, "K2120_val": k2120_initial_val,
-                    "selected_for_output": True,
-                    "source_file": os.path.basename(file_path),
-                    "original_row_index_df": row_idx,
-                    "original_excel_row": excel_row_display
-                })
+
+def read_single_excel_file(file_path: str, sheet_selection: Optional[Dict[str, Any]] = None,
+                           reader_backend: str = reader_backends.BACKEND_AUTO,
+                           allow_fallback: bool = True,
+                           layout_settings: Optional[Dict[str, Any]] = None,
+                           measurement_settings: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """读取单个Excel文件所选工作表 (默认第一个) 的参数，返回 (参数列表, 错误列表)，不做去重。
+    工作簿只打开一次，所选工作表一起读取；reader_backend 为读取后端名称 (见 core/reader_backends.py)，
+    allow_fallback 时该后端读取失败会改用参考实现；layout_settings 为参数表布局设置
+    (见 config_manager.get_table_layout_settings，默认固定为第14行起 A、C、D、E 列)；
+    measurement_settings 为测量值设置 (见 config_manager.get_measured_values_settings，默认不读取测量值)。"""
+    parameters: List[Dict[str, Any]] = []
+    errors: List[str] = []
+    file_name = os.path.basename(file_path)
+    try:
+        if file_path.lower().endswith(csv_reader.CSV_EXTENSIONS):
+            return read_single_csv_file(file_path, layout_settings=layout_settings,
+                                        measurement_settings=measurement_settings)
+        if file_path.lower().endswith(dfq_reader.DFQ_EXTENSIONS):
+            return dfq_reader.read_dfq_parameters(file_path)
+        if not file_path.lower().endswith(EXCEL_EXTENSIONS):
+            errors.append(f"不支持的文件类型: {file_name}。仅支持 .xls、.xlsx、.csv、.tsv 和 .dfq。")
+            return parameters, errors
+
+        multi_sheet = (sheet_selection or {}).get("Mode", SHEET_MODE_FIRST) != SHEET_MODE_FIRST
+        backend = reader_backends.select_backend(file_path, reader_backend)
+        try:
+            sheet_names, sheets = _read_selected_sheets(file_path, sheet_selection, backend, layout_settings,
+                                                        measurement_settings)
+        except MemoryError:
+            raise
         except Exception as e:
-            errors.append(f"处理文件 '{os.path.basename(file_path)}' 时出错: {e}")
-            logger.critical(f"    处理文件 '{os.path.basename(file_path)}' 时发生严重错误: {e}", exc_info=True)
+            if backend.name == reader_backends.REFERENCE_BACKEND or not allow_fallback:
+                raise
+            # 其他后端无法读取时回退到参考实现
+            logger.warning(f"    读取后端 '{backend.name}' 读取 '{file_name}' 失败，改用 pandas: {e}")
+            sheet_names, sheets = _read_selected_sheets(
+                file_path, sheet_selection, reader_backends.get_backend(reader_backends.REFERENCE_BACKEND),
+                layout_settings, measurement_settings)
+        if not sheet_names:
+            errors.append(f"文件 '{file_name}' 中没有符合工作表选择条件的工作表。")
+            return parameters, errors
+
+        short_sheets, unrecognized_sheets = [], []
+        for sheet_name in sheet_names:
+            layout, df = sheets[sheet_name]
+            if layout is None:
+                unrecognized_sheets.append(str(sheet_name))
+                continue
+            if df.shape[0] < layout["FirstDataRow"]:
+                short_sheets.append(str(sheet_name))
+                continue
+            parameters.extend(_extract_parameters_from_frame(df, file_path, str(sheet_name), layout,
+                                                             measurement_settings))
+        if unrecognized_sheets and not multi_sheet:
+            errors.append(f"文件 '{file_name}' 未能识别参数表布局 (开头若干行中没有表头或参数行)。")
+        elif unrecognized_sheets:
+            logger.warning(f"    文件 '{file_name}' 的工作表 {unrecognized_sheets} 未能识别参数表布局，已跳过。")
+            if len(unrecognized_sheets) == len(sheet_names):
+                errors.append(f"文件 '{file_name}' 所选工作表均未能识别参数表布局。")
+        if short_sheets and not multi_sheet:
+            errors.append(f"文件 '{file_name}' 的行数少于14行，无法处理。")
+        elif short_sheets:
+            # 多工作表时，说明页等行数不足的工作表只记录日志；全部不足时才报告错误
+            logger.warning(f"    文件 '{file_name}' 的工作表 {short_sheets} 行数少于14行，已跳过。")
+            if len(short_sheets) == len(sheet_names):
+                errors.append(f"文件 '{file_name}' 所选工作表的行数均少于14行，无法处理。")
+    except MemoryError:
+        errors.append(f"处理文件 '{file_name}' 时超出内存上限，已停止解析。")
+        logger.error(f"    处理文件 '{file_name}' 时超出内存上限。")
+    except Exception as e:
+        errors.append(f"处理文件 '{file_name}' 时出错: {e}")
+        logger.critical(f"    处理文件 '{file_name}' 时发生严重错误: {e}", exc_info=True)
+    return parameters, errors
+
 
+def deduplicate_parameters(parameters: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """按 (K2001, K2002) 去重，保留首次出现的参数及其顺序；重复参数的测量值并入保留的参数。"""
     deduplicated_parameters: List[Dict[str, Any]] = []
-    seen_params = set()
-    for param in all_parameters_raw:
+    seen_params: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for param in parameters:
         param_key = (param["K2001_val"], param["K2002_val"])
         if param_key not in seen_params:
             deduplicated_parameters.append(param)
-            seen_params.add(param_key)
+            seen_params[param_key] = param
+        elif param.get("measurements"):
+            measured_values.merge_measurements(seen_params[param_key], param)
+    return deduplicated_parameters
+
+
+def read_excel_files(file_paths: List[str], *, isolation_settings: Optional[Dict[str, Any]] = None,
+                     source_cache_settings: Optional[Dict[str, Any]] = None,
+                     sheet_selection: Optional[Dict[str, Any]] = None,
+                     reader_backend: str = reader_backends.BACKEND_AUTO,
+                     layout_settings: Optional[Dict[str, Any]] = None,
+                     classification_settings: Optional[Dict[str, Any]] = None,
+                     measurement_settings: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """读取并去重多个文件的参数 (各项设置只能按关键字传入)。isolation_settings 启用时 (见 config_manager.get_parse_isolation_settings)
+    每个文件在带超时与内存上限的独立进程中解析；source_cache_settings (见 config_manager.get_source_cache_settings)
+    控制是否先将网络共享上的文件预取到本地缓存再解析；sheet_selection 为工作表选择设置 (默认第一个工作表)；reader_backend 为读取后端名称；
+    layout_settings 为参数表布局设置；classification_settings 为按参数名自动分类的设置 (见 config_manager.get_classification_settings)；
+    measurement_settings 为测量值设置 (见 config_manager.get_measured_values_settings)。"""
+    logger.info(f"read_excel_files: 开始处理 {len(file_paths)} 个Excel文件。")
+    all_parameters_raw: List[Dict[str, Any]] = []
+    errors: List[str] = []
+
+    isolated = bool(isolation_settings and isolation_settings.get("Enabled", False))
+    max_workers = int(isolation_settings.get("MaxWorkers", 2)) if isolated else 1
+    preflights, dispatch_order = None, None
+    if isolated and max_workers > 1 and len(file_paths) > 1:
+        # 多个工作进程时按预计耗时从大到小分配；结果仍按原文件顺序合并，去重顺序不变
+        preflights = parse_scheduler.preflight_files(file_paths, isolation_settings.get("CostModel", {}))
+        dispatch_order = parse_scheduler.largest_first_order(preflights)
+    prefetcher = source_cache.create_prefetcher(file_paths, source_cache_settings, dispatch_order)
+    try:
+        if isolated:
+            from core import parse_isolation  # 工作进程模块依赖本模块，延迟导入
+            file_results, elapsed_seconds = parse_isolation.parse_files_isolated(
+                file_paths, timeout_seconds=float(isolation_settings.get("TimeoutSeconds", 120)),
+                memory_limit_mb=int(isolation_settings.get("MemoryLimitMB", 2048)),
+                max_workers=max_workers, order=dispatch_order,
+                path_resolver=prefetcher.local_path if prefetcher else None, sheet_selection=sheet_selection,
+                reader_backend=reader_backend, layout_settings=layout_settings,
+                measurement_settings=measurement_settings)
+            if preflights is not None:
+                parse_scheduler.report_parse_costs(preflights, elapsed_seconds)
+        else:
+            file_results = []
+            for file_idx, file_path in enumerate(file_paths):
+                logger.debug(f"  正在处理文件 {file_idx + 1}/{len(file_paths)}: {file_path}")
+                file_results.append(read_single_excel_file(prefetcher.local_path(file_idx) if prefetcher else file_path,
+                                                           sheet_selection, reader_backend,
+                                                           layout_settings=layout_settings,
+                                                           measurement_settings=measurement_settings))
+    finally:
+        if prefetcher is not None:
+            prefetcher.close()
+    for file_parameters, file_errors in file_results:
+        all_parameters_raw.extend(file_parameters)
+        errors.extend(file_errors)
+
+    deduplicated_parameters = deduplicate_parameters(all_parameters_raw)
+    # 从DFQ重新导入的参数保留文件中已有的分类
+    classified_count = classification_rules.apply_classification_rules(
+        [p for p in deduplicated_parameters if not p.get("source_file", "").lower().endswith(dfq_reader.DFQ_EXTENSIONS)],
+        classification_settings)
+    if classified_count:
+        logger.info(f"read_excel_files: 按参数名规则自动分类了 {classified_count}/{len(deduplicated_parameters)} 个参数。")
     if not deduplicated_parameters and not errors and file_paths:
         errors.append("在所有选择的Excel文件中，从第14行开始未找到有效的参数数据，或者所有参数名为空。")
-    return deduplicated_parameters, errors
\ No newline at end of file
+    return deduplicated_parameters, errors
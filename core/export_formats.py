@@ -0,0 +1,221 @@
+# core/export_formats.py
+# 多格式导出：除DFQ外，同一份参数 (检验计划) 可同时导出为 CSV、JSON Lines 与 xlsx 汇总，供 MES 与报表工具使用。
+# 每种格式一个写出器，参数列表只遍历一次，每个参数依次交给所有写出器；附加格式与DFQ同名 (扩展名不同)，
+# 在DFQ写入成功后原子地写到同一目录。
+import csv
+import io
+import json
+import logging
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional, Tuple
+
+from openpyxl import Workbook
+
+from core import dfq_writer, measured_values
+
+logger = logging.getLogger(__name__)
+
+FORMAT_DFQ = "dfq"
+FORMAT_CSV = "csv"
+FORMAT_JSONL = "jsonl"
+FORMAT_XLSX = "xlsx"
+EXPORT_FORMATS = (FORMAT_DFQ, FORMAT_CSV, FORMAT_JSONL, FORMAT_XLSX)
+
+# 附加格式中每个参数的字段 (抬头 K1001/K1086 之后)，与DFQ中参数的K值一致
+PARAMETER_FIELDS = ["K2001", "K2002", "K2003", "K2005", "K2009", "K2101", "K2113", "K2112", "K2121", "K2120", "K2142"]
+HEADER_FIELDS = ["K1001", "K1002", "K1004", "K1086", "K1091"]
+# xlsx 汇总中按数值写入的K值 (便于在 Excel 中直接计算)
+_NUMERIC_FIELDS = {"K2101", "K2113", "K2112"}
+_FIELD_DEFAULTS = {"K2005": "0", "K2009": "0", "K2120": "0", "K2121": "0"}
+
+
+def _parameter_values(param: Dict[str, Any]) -> List[str]:
+    return [str(param.get(f"{k_key}_val", _FIELD_DEFAULTS.get(k_key, ""))) for k_key in PARAMETER_FIELDS]
+
+
+class ExportWriter(ABC):
+    """写出器基类：add() 按输出顺序逐个接收参数，finish() 返回文件的字节内容。"""
+    extension = ""
+
+    def __init__(self, header_info: Dict[str, str], parameter_count: int):
+        self.header_info = header_info
+        self.parameter_count = parameter_count
+
+    @abstractmethod
+    def add(self, index: int, param: Dict[str, Any], values: List[str]):
+        ...
+
+    @abstractmethod
+    def finish(self) -> bytes:
+        ...
+
+
+class DfqExportWriter(ExportWriter):
+    extension = ".dfq"
+
+    def __init__(self, header_info: Dict[str, str], parameter_count: int):
+        super().__init__(header_info, parameter_count)
+        self.lines = dfq_writer.generate_dfq_header_lines(parameter_count, header_info)
+        self._parameters: List[Dict[str, Any]] = []
+
+    def add(self, index: int, param: Dict[str, Any], values: List[str]):
+        self.lines.extend(dfq_writer.generate_single_parameter_lines(index, param))
+        self._parameters.append(param)
+
+    def finish(self) -> bytes:
+        # 测量值行按整个 零件 × 参数 矩阵生成，需要全部参数
+        self.lines.extend(measured_values.generate_value_lines(self._parameters))
+        return dfq_writer.encode_dfq_lines(self.lines)
+
+    def content_hash(self) -> str:
+        return dfq_writer.compute_catalog_hash(self.lines)
+
+
+class CsvExportWriter(ExportWriter):
+    """CSV (UTF-8 BOM，可直接用 Excel 打开)，每个参数一行。"""
+    extension = ".csv"
+
+    def __init__(self, header_info: Dict[str, str], parameter_count: int):
+        super().__init__(header_info, parameter_count)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._writer.writerow(["K1001", "K1086", "序号"] + PARAMETER_FIELDS)
+        self._prefix = [header_info.get("K1001", ""), header_info.get("K1086", "")]
+
+    def add(self, index: int, param: Dict[str, Any], values: List[str]):
+        self._writer.writerow(self._prefix + [index] + values)
+
+    def finish(self) -> bytes:
+        return self._buffer.getvalue().encode("utf-8-sig")
+
+
+class JsonLinesExportWriter(ExportWriter):
+    """JSON Lines，每个参数一个对象 {"K1001", "K1086", "index", "K2001"…}。"""
+    extension = ".jsonl"
+
+    def __init__(self, header_info: Dict[str, str], parameter_count: int):
+        super().__init__(header_info, parameter_count)
+        self._lines: List[str] = []
+        self._prefix = {"K1001": header_info.get("K1001", ""), "K1086": header_info.get("K1086", "")}
+
+    def add(self, index: int, param: Dict[str, Any], values: List[str]):
+        record = dict(self._prefix, index=index)
+        record.update(zip(PARAMETER_FIELDS, values))
+        self._lines.append(json.dumps(record, ensure_ascii=False))
+
+    def finish(self) -> bytes:
+        return "".join(line + "\n" for line in self._lines).encode("utf-8")
+
+
+def _numeric_cell(text: str) -> Any:
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+class XlsxSummaryWriter(ExportWriter):
+    """xlsx 汇总：“抬头”与“参数”两个工作表。使用只写模式的工作簿，行写出后不再保留在内存中。"""
+    extension = ".xlsx"
+
+    def __init__(self, header_info: Dict[str, str], parameter_count: int):
+        super().__init__(header_info, parameter_count)
+        self._workbook = Workbook(write_only=True)
+        header_sheet = self._workbook.create_sheet("抬头")
+        header_sheet.append(["K值", "值"])
+        header_sheet.append(["K0100", parameter_count])
+        for k_key in HEADER_FIELDS:
+            header_sheet.append([k_key, header_info.get(k_key, "")])
+        self._sheet = self._workbook.create_sheet("参数")
+        self._sheet.append(["序号"] + PARAMETER_FIELDS)
+        self._numeric_positions = [i for i, k_key in enumerate(PARAMETER_FIELDS) if k_key in _NUMERIC_FIELDS]
+
+    def add(self, index: int, param: Dict[str, Any], values: List[str]):
+        row: List[Any] = list(values)
+        for i in self._numeric_positions:
+            row[i] = _numeric_cell(row[i])
+        self._sheet.append([index] + row)
+
+    def finish(self) -> bytes:
+        buffer = io.BytesIO()
+        self._workbook.save(buffer)
+        return buffer.getvalue()
+
+
+EXPORT_WRITERS = {
+    FORMAT_DFQ: DfqExportWriter,
+    FORMAT_CSV: CsvExportWriter,
+    FORMAT_JSONL: JsonLinesExportWriter,
+    FORMAT_XLSX: XlsxSummaryWriter,
+}
+
+
+def export_parameters(parameters_to_output: List[Dict[str, Any]], header_info: Dict[str, str],
+                      formats: Optional[List[str]] = None) -> Tuple[Dict[str, bytes], Optional[str]]:
+    """一次遍历参数列表，生成各格式的文件内容。返回 ({格式: 字节内容}, DFQ内容哈希 (不含DFQ时为 None))。"""
+    formats = [f for f in (formats or [FORMAT_DFQ]) if f in EXPORT_WRITERS]
+    logger.info(f"export_parameters: 参数数量 {len(parameters_to_output)}，格式 {formats}")
+    writers = {f: EXPORT_WRITERS[f](header_info, len(parameters_to_output)) for f in formats}
+    _feed_writers(parameters_to_output, list(writers.values()))
+    outputs = {f: writer.finish() for f, writer in writers.items()}
+    dfq_export = writers.get(FORMAT_DFQ)
+    return outputs, dfq_export.content_hash() if dfq_export else None
+
+
+def export_parameters_for_headers(parameters_to_output: List[Dict[str, Any]], header_infos: List[Dict[str, str]],
+                                  formats: List[str]) -> List[Dict[str, bytes]]:
+    """多个抬头共用一次参数遍历：先为每个抬头建立各格式的写出器，再将每个参数依次交给全部写出器。
+    返回与 header_infos 顺序一致的 [{格式: 字节内容}]。"""
+    formats = [f for f in formats if f in EXPORT_WRITERS]
+    logger.info(f"export_parameters_for_headers: 参数数量 {len(parameters_to_output)}，抬头数量 {len(header_infos)}，"
+                f"格式 {formats}")
+    writers_by_header = [{f: EXPORT_WRITERS[f](header_info, len(parameters_to_output)) for f in formats}
+                         for header_info in header_infos]
+    _feed_writers(parameters_to_output, [w for writers in writers_by_header for w in writers.values()])
+    return [{f: writer.finish() for f, writer in writers.items()} for writers in writers_by_header]
+
+
+def _feed_writers(parameters_to_output: List[Dict[str, Any]], writer_list: List[ExportWriter]):
+    for i, param in enumerate(parameters_to_output):
+        # 各写出器共用同一份字段值，只取一次
+        values = _parameter_values(param)
+        for writer in writer_list:
+            writer.add(i + 1, param, values)
+
+
+def export_path(dfq_file: str, export_format: str) -> str:
+    """附加格式的文件路径：与DFQ文件同名，扩展名按格式。"""
+    return os.path.splitext(dfq_file)[0] + EXPORT_WRITERS[export_format].extension
+
+
+def write_export_files(dfq_file: str, outputs: Optional[Dict[str, bytes]]) -> Tuple[List[str], List[str]]:
+    """将DFQ以外的各格式写到DFQ文件旁 (先写 .tmp 再原子替换)。返回 (写入的文件, 错误列表)。"""
+    written_files: List[str] = []
+    errors: List[str] = []
+    for export_format, data in (outputs or {}).items():
+        if export_format == FORMAT_DFQ:
+            continue
+        target_path = export_path(dfq_file, export_format)
+        temp_path = ""
+        try:
+            temp_fd, temp_path = tempfile.mkstemp(suffix=dfq_writer.TEMP_FILE_SUFFIX, prefix=".export_",
+                                                  dir=os.path.dirname(target_path) or ".")
+            with os.fdopen(temp_fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, target_path)
+            temp_path = ""
+            written_files.append(target_path)
+        except OSError as e:
+            logger.error(f"写入 {export_format} 文件 '{target_path}' 失败: {e}")
+            errors.append(f"写入 {os.path.basename(target_path)} 失败: {e}")
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError as e:
+                    logger.warning(f"删除临时文件 '{temp_path}' 失败: {e}")
+    if written_files:
+        logger.info(f"已写入附加格式: {', '.join(os.path.basename(p) for p in written_files)}")
+    return written_files, errors
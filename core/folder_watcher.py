@@ -0,0 +1,250 @@
+# core/folder_watcher.py
+# 监视文件夹：轮询 (可选 watchdog 事件唤醒) 源目录树，等待新文件写入稳定后
+# 交给有界的工作进程池转换为DFQ，处理结果写入持久化日志，重启后不会重复处理。
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Tuple, Optional
+
+from core import batch_processor, excel_processor, output_manifest
+from core.processing_journal import ProcessingJournal, STATUS_DONE, STATUS_FAILED, STATUS_BASELINE, \
+    default_journal_path
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # watchdog 为可选依赖，缺失时仅使用轮询
+    Observer = None
+    FileSystemEventHandler = object
+
+logger = logging.getLogger(__name__)
+
+# 目录修改时间早于此时长 (秒) 且未变化时，视为"冷目录"：沿用缓存的扫描结果，不再逐个 stat 其中的文件。
+# 原地改写文件不会改变目录的修改时间，因此冷目录每隔 cold_rescan_seconds 仍完整重新扫描一次
+COLD_DIRECTORY_SECONDS = 24 * 3600
+
+
+class _WakeUpHandler(FileSystemEventHandler):
+    def __init__(self, wake_event: threading.Event):
+        super().__init__()
+        self.wake_event = wake_event
+
+    def on_any_event(self, event):
+        self.wake_event.set()
+
+
+class FolderWatcher:
+    def __init__(self, root: str, output_path: str, header_presets: List[Dict[str, str]],
+                 fallback_header: Optional[Dict[str, str]] = None, journal: Optional[ProcessingJournal] = None,
+                 poll_interval: float = 10.0, stable_seconds: float = 15.0, max_workers: int = 2,
+                 generation_options: Optional[Dict[str, Any]] = None, max_failed_attempts: int = 3,
+                 retry_failed_after: float = 60.0, process_existing: bool = False,
+                 cold_rescan_seconds: float = 600.0):
+        self.root = root
+        self.output_path = output_path
+        self.header_presets = header_presets
+        self.fallback_header = fallback_header
+        self.journal = journal or ProcessingJournal(default_journal_path("watch", root))
+        self.poll_interval = poll_interval
+        self.stable_seconds = stable_seconds
+        self.max_workers = max(1, max_workers)
+        self.generation_options = generation_options or {}
+        self.max_failed_attempts = max(1, max_failed_attempts)
+        self.retry_failed_after = retry_failed_after
+        self.process_existing = process_existing
+        self.cold_rescan_seconds = cold_rescan_seconds
+        self.batch_id = output_manifest.new_batch_id()
+
+        # 目录缓存: 目录 -> (目录mtime, 完整扫描的时间, 子目录列表, {文件: (大小, mtime)})
+        self._dir_cache: Dict[str, Tuple[float, float, List[str], Dict[str, Tuple[int, float]]]] = {}
+        # 待稳定的候选文件: 路径 -> (大小, mtime, 首次观察到该状态的时间)
+        self._candidates: Dict[str, Tuple[int, float, float]] = {}
+        self._in_flight: Dict[Future, Tuple[str, int, float]] = {}
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._observer = None
+
+    def _scan_directory(self, directory: str, now: float, found: Dict[str, Tuple[int, float]]):
+        try:
+            dir_mtime = os.stat(directory).st_mtime
+        except OSError as e:
+            logger.warning(f"无法访问目录 '{directory}': {e}")
+            return
+        cached = self._dir_cache.get(directory)
+        if cached and cached[0] == dir_mtime and now - dir_mtime > COLD_DIRECTORY_SECONDS \
+                and now - cached[1] < self.cold_rescan_seconds:
+            subdirs, files = cached[2], cached[3]
+        else:
+            subdirs, files = [], {}
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                subdirs.append(entry.path)
+                            elif entry.name.lower().endswith(excel_processor.SUPPORTED_EXTENSIONS) \
+                                    and not entry.name.startswith("~$"):
+                                st = entry.stat()
+                                files[entry.path] = (st.st_size, st.st_mtime)
+                        except OSError as e:
+                            logger.debug(f"读取目录项 '{entry.path}' 失败: {e}")
+            except OSError as e:
+                logger.warning(f"列出目录 '{directory}' 失败: {e}")
+                return
+            self._dir_cache[directory] = (dir_mtime, now, subdirs, files)
+        found.update(files)
+        for subdir in subdirs:
+            self._scan_directory(subdir, now, found)
+
+    def scan(self) -> Dict[str, Tuple[int, float]]:
+        """扫描源目录树，返回 {文件路径: (大小, mtime)}。"""
+        found: Dict[str, Tuple[int, float]] = {}
+        self._scan_directory(self.root, time.time(), found)
+        return found
+
+    def _needs_processing(self, path: str, size: int, mtime: float, now: float) -> bool:
+        """当前大小/修改时间下尚未处理，或之前失败且未超过重试次数、距上次失败已超过重试间隔。"""
+        if not self.journal.is_processed(path, size, mtime):
+            return True
+        attempts = self.journal.failed_attempts(path, size, mtime)
+        if not attempts or attempts >= self.max_failed_attempts:
+            return False
+        return now - self.journal.get(path).get("recorded_at", 0) >= self.retry_failed_after
+
+    def _collect_ready_files(self, found: Dict[str, Tuple[int, float]], now: float) -> List[Tuple[str, int, float]]:
+        in_flight_paths = {path for path, _, _ in self._in_flight.values()}
+        ready: List[Tuple[str, int, float]] = []
+        for path, (size, mtime) in found.items():
+            if path in in_flight_paths or not self._needs_processing(path, size, mtime, now):
+                self._candidates.pop(path, None)
+                continue
+            candidate = self._candidates.get(path)
+            if candidate is None or candidate[0] != size or candidate[1] != mtime:
+                self._candidates[path] = (size, mtime, now)
+            elif now - candidate[2] >= self.stable_seconds:
+                ready.append((path, size, mtime))
+        for path in list(self._candidates):
+            if path not in found:
+                del self._candidates[path]
+        return ready
+
+    def _submit(self, path: str, size: int, mtime: float):
+        header_info = batch_processor.resolve_header_for_file(path, self.header_presets, self.fallback_header)
+        self._candidates.pop(path, None)
+        if not header_info:
+            logger.warning(f"文件 '{path}' 无法确定抬头信息，记录为失败。")
+            self.journal.record(path, size, mtime, STATUS_FAILED,
+                                message="无法确定抬头信息：文件名未匹配任何预设。")
+            return
+        job = {"source_files": [path], "header": header_info}
+        try:
+            future = self._executor.submit(batch_processor.run_generation_job, job, self.output_path,
+                                           self.generation_options)
+        except BrokenProcessPool:
+            # 工作进程异常退出 (例如超出内存上限) 后进程池不可再用，重建后重新提交
+            logger.warning("FolderWatcher: 工作进程池已损坏，重新创建。")
+            self._executor.shutdown(wait=False)
+            self._executor = self._create_executor()
+            future = self._executor.submit(batch_processor.run_generation_job, job, self.output_path,
+                                           self.generation_options)
+        future.add_done_callback(lambda _: self._wake_event.set())
+        self._in_flight[future] = (path, size, mtime)
+        logger.info(f"已提交转换任务: {path}")
+
+    def _collect_finished(self):
+        finished_futures = [f for f in self._in_flight if f.done()]
+        for future in finished_futures:
+            path, size, mtime = self._in_flight.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"转换 '{path}' 时工作进程异常: {e}", exc_info=True)
+                self.journal.record(path, size, mtime, STATUS_FAILED, message=f"工作进程异常: {e}")
+                continue
+            batch_processor.record_job_result(self.output_path, self.batch_id, result)
+            status = STATUS_DONE if result["success"] else STATUS_FAILED
+            self.journal.record(path, size, mtime, status, result.get("output_file", ""), result.get("message", ""),
+                                result.get("sha256", ""))
+            logger.info(f"转换{'完成' if result['success'] else '失败'}: {path} -> {result.get('message', '')}")
+        if finished_futures:
+            self.journal.flush()
+
+    def poll_once(self) -> int:
+        """执行一次扫描与调度，返回本次提交的任务数。"""
+        self._collect_finished()
+        now = time.time()
+        ready = self._collect_ready_files(self.scan(), now)
+        submitted_count = 0
+        # 工作进程池有界：在途任务不超过工作进程数的两倍，其余留待下次轮询
+        for path, size, mtime in ready:
+            if len(self._in_flight) >= self.max_workers * 2:
+                break
+            self._submit(path, size, mtime)
+            submitted_count += 1
+        return submitted_count
+
+    def has_pending_work(self) -> bool:
+        return bool(self._candidates or self._in_flight)
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.max_workers, initializer=batch_processor.pool_worker_initializer,
+                                   initargs=(self.generation_options,))
+
+    def record_baseline(self) -> int:
+        """首次监视该目录 (处理日志为空) 时，将已有的文件登记为基线而不转换，返回登记的文件数。"""
+        if self.journal.file_count():
+            return 0
+        found = self.scan()
+        for path, (size, mtime) in found.items():
+            self.journal.record(path, size, mtime, STATUS_BASELINE, message="监视开始前已存在，未转换。")
+        self.journal.flush()
+        logger.info(f"FolderWatcher: 首次监视，已将 {len(found)} 个已有文件登记为基线 (之后变化时才转换)。")
+        return len(found)
+
+    def start(self):
+        logger.info(f"FolderWatcher: 开始监视 '{self.root}'，输出到 '{self.output_path}'，"
+                    f"轮询间隔 {self.poll_interval}s，稳定等待 {self.stable_seconds}s，工作进程 {self.max_workers}")
+        if not self.process_existing:
+            self.record_baseline()
+        self._executor = self._create_executor()
+        if Observer is not None:
+            try:
+                self._observer = Observer()
+                self._observer.schedule(_WakeUpHandler(self._wake_event), self.root, recursive=True)
+                self._observer.start()
+                logger.info("FolderWatcher: 已启用文件系统事件唤醒 (watchdog)。")
+            except Exception as e:
+                logger.warning(f"FolderWatcher: 无法启用文件系统事件，仅使用轮询: {e}")
+                self._observer = None
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def run_forever(self):
+        """阻塞运行直到调用 stop()。有候选文件或在途任务时缩短等待间隔。"""
+        self.start()
+        try:
+            while not self._stop_event.is_set():
+                self.poll_once()
+                timeout = min(self.poll_interval, 1.0) if self.has_pending_work() else self.poll_interval
+                self._wake_event.wait(timeout)
+                self._wake_event.clear()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._collect_finished()
+            self._executor = None
+        self.journal.close()
+        logger.info("FolderWatcher: 已停止。")
@@ -0,0 +1,47 @@
+# core/k_codes.py
+# K2005 (参数等级) 与 K2009 (公差类型) 的合法代码及显示名称，界面下拉框与DFQ校验共用。
+
+# K2005 选项
+K2005_OPTIONS_MAP = {"0": "次要的", "1": "略重要的", "2": "重要的", "3": "很重要的", "4": "关键的"}
+
+# K2009 选项 (公差类型)
+K2009_OPTIONS = {
+    "0": "未定义", "100": "直线度", "101": "平面度", "102": "圆度", "103": "圆柱度",
+    "104": "线轮廓度", "105": "面轮廓度", "106": "倾斜度", "107": "垂直度", "108": "平行度",
+    "109": "位置度", "110": "同心度", "111": "对称度", "112": "跳动度", "113": "全跳动度",
+    "114": "复合一同轴度", "115": "复合一图案位置度", "117": "坐标", "118": "曲面跳动",
+    "120": "X坐标", "121": "Y坐标", "122": "Z坐标", "125": "偏移量", "132": "椭圆度",
+    "140": "角度区域的评定值", "145": "表面光洁度", "149": "凹坑深度",
+    "150": "最大轮廓高度 Rz", "151": "轮廓总高度 Rt", "152": "算术平均偏差 Ra",
+    "153": "最大原始轮廓高度 Pt", "154": "轮廓峰高 Rk", "155": "缩减波峰高度",
+    "156": "缩减波谷深度", "157": "轮廓波纹深度 Wt", "158": "最大波纹深度 Wz",
+    "159": "基本粗糙度深度 Rmax", "160": "材料承载率 Pmr", "161": "材料比例 Mr1",
+    "162": "材料比例 Mr2", "170": "油槽深度", "171": "油槽角度", "172": "油槽节距",
+    "180": "平均主波纹度", "181": "最大主波纹度", "182": "主波纹长度",
+    "190": "粗糙单元平均深度", "191": "轮廓不规则性最大深度", "192": "粗糙单元平均宽度",
+    "193": "材料承载率 Rmr", "194": "材料比例 tp", "200": "距离", "201": "半径",
+    "202": "直径", "203": "角度", "204": "椭圆短轴", "205": "椭圆长轴", "206": "锥角",
+    "207": "内径", "208": "外径", "210": "球面测量杆", "211": "齿高/齿深",
+    "212": "参考圆柱上的齿厚", "214": "齿厚偏差（参考圆柱处）", "215": "齿厚变动量",
+    "216": "跨（k个）齿公法线长度", "220": "弹簧刚度", "230": "宽度",
+    "231": "垂直度（方形度）", "232": "最大直径", "233": "最小直径", "234": "平均直径",
+    "250": "温度 [°C]", "251": "温度 [F]", "255": "压力 [bar]", "260": "涂层厚度",
+    "270": "体积", "280": "质量", "282": "力", "285": "硬度", "290": "粘度",
+    "300": "不平衡量", "301": "扭矩", "302": "拧紧扭矩", "303": "附加扭矩",
+    "310": "二维坐标系（注释）", "311": "三维坐标系（注释）", "320": "旋转角度",
+    "350": "转速", "360": "角度误差", "362": "轮廓误差", "364": "速度误差",
+    "370": "形状偏差", "372": "形状增量", "380": "凸轮高度", "501": "电阻",
+    "502": "电容", "503": "电感", "504": "相位移", "505": "频率", "506": "电流强度",
+    "507": "电压", "508": "功率", "509": "场强", "601": "节距", "602": "节距误差",
+    "604": "累积节距偏差", "605": "累积节距误差", "606": "节距波动",
+    "607": "总节距误差", "608": "基节偏差", "609": "轴向节距偏差",
+    "610": "齿顶圆直径", "612": "齿根圆直径", "617": "参考圆柱上的槽宽",
+    "620": "齿向（线）", "621": "齿向形状误差", "630": "齿廓", "631": "齿廓形状误差",
+    "632": "齿廓角度偏差", "633": "齿廓扭曲", "640": "齿顶修缘", "641": "齿廓修鼓",
+    "642": "修鼓量", "643": "鼓形高度", "651": "齿线角度偏差", "652": "齿线扭曲",
+    "660": "径向跳动偏差", "661": "偏心量", "662": "摆差", "663": "同轴度",
+    "670": "双面啮合综合偏差", "671": "双面啮合一齿综合径向偏差",
+    "672": "接触跳动偏差", "673": "径向双球（柱）距", "674": "径向双滚柱距",
+    "675": "径向单球（柱）距", "676": "径向单滚柱距", "800": "时间", "805": "数量",
+    "820": "噪音", "910": "泄漏率", "950": "零件清洁度", "955": "残留粒子"
+}
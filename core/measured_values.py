@@ -0,0 +1,206 @@
+# core/measured_values.py
+# 测量值 (可选)：读取参数表中公差列右侧的测量值列 (每列一个零件)，以及参数区上方按行标签给出的
+# 每个零件的日期时间 (K0004)、批次 (K0006) 与检验员 (K0008)，生成DFQ时写为测量值行。
+# 测量值行为 DFQ 的紧凑格式：每个零件一行，各参数之间以 0x0F 分隔，每个参数的 K0001 值、K0002 属性、
+# K0004 日期时间… 之间以 0x14 分隔。读取按整列解析，写出时按整个矩阵确定小数位数与缺失值，每个零件一次格式化整行。
+import datetime
+import logging
+import os
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core import parameter_validation
+
+logger = logging.getLogger(__name__)
+
+CHARACTERISTIC_SEPARATOR = "\x0f"
+FIELD_SEPARATOR = "\x14"
+# K0002 属性：0 为正常，255 为无效 (该零件未测量此参数)
+ATTRIBUTE_VALID = "0"
+ATTRIBUTE_MISSING = "255"
+# K0004 日期时间格式
+DATE_TIME_FORMAT = "%d.%m.%Y/%H:%M:%S"
+# 测量值按参数取所需的小数位数，超过此位数的四舍五入
+MAX_VALUE_DECIMALS = 6
+
+# 每个零件的属性，按行标签 (参数名列等非测量值列中的文字，小写) 识别
+PART_ATTRIBUTE_KEYS = ("K0004", "K0006", "K0008")
+_ATTRIBUTE_KEYWORDS = [
+    ("K0004", ("日期", "时间", "date", "time")),
+    ("K0006", ("批次", "批号", "炉号", "batch", "lot", "charge")),
+    ("K0008", ("操作员", "检验员", "测量员", "检测员", "operator", "inspector")),
+]
+# 测量值行中每个参数的字段顺序 (K0001 值与 K0002 属性之后)，空字段保留分隔符
+_PART_FIELD_ORDER = ("K0004", "K0005", "K0006", "K0007", "K0008")
+
+
+def value_columns(layout: Dict[str, Any], settings: Dict[str, Any]) -> List[int]:
+    """测量值所在的列下标：FirstValueColumn 未指定时从布局最后一列的下一列开始，最多 MaxValueColumns 列。"""
+    first_column = settings.get("FirstValueColumn")
+    if not isinstance(first_column, int) or isinstance(first_column, bool) or first_column < 0:
+        first_column = max(layout[key] for key in ("NameColumn", "NominalColumn", "UpperTolColumn", "LowerTolColumn")
+                           if layout.get(key) is not None) + 1
+    return list(range(first_column, first_column + int(settings.get("MaxValueColumns", 1000))))
+
+
+def _is_blank(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and value != value) or \
+        (isinstance(value, str) and not value.strip())
+
+
+def _attribute_key(label: str) -> Optional[str]:
+    for key, keywords in _ATTRIBUTE_KEYWORDS:
+        if any(keyword in label for keyword in keywords):
+            return key
+    return None
+
+
+def _format_timestamp(value: Any) -> str:
+    if _is_blank(value):
+        return ""
+    if isinstance(value, (datetime.date, pd.Timestamp)):
+        timestamp = pd.Timestamp(value)
+    else:
+        try:
+            timestamp = pd.Timestamp(str(value).strip())
+        except (ValueError, TypeError):
+            return ""
+    return "" if pd.isna(timestamp) else timestamp.strftime(DATE_TIME_FORMAT)
+
+
+def _format_text(value: Any) -> str:
+    if _is_blank(value):
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    # 分隔符与换行不能出现在字段中
+    return str(value).strip().translate({ord(CHARACTERISTIC_SEPARATOR): " ", ord(FIELD_SEPARATOR): " ",
+                                          ord("\r"): " ", ord("\n"): " "})
+
+
+def extract_measurements(df: pd.DataFrame, layout: Dict[str, Any], settings: Dict[str, Any],
+                         source: str) -> Optional[Tuple[Dict[str, Any], np.ndarray, Dict[Any, int]]]:
+    """从一个工作表的数据 (列标签为原列下标，行标签为原行下标) 中取出测量值。返回 (零件信息, 测量值矩阵
+    (参数行 × 零件，空或非数值为 NaN), {行标签: 矩阵行号})；没有任何测量值时返回 None。
+    零件信息为 {"source", "part_count", "K0004"/"K0006"/"K0008": 每个零件的文本}，同一工作表的参数共用。"""
+    first_data_row = layout["FirstDataRow"]
+    columns = [c for c in value_columns(layout, settings) if c in df.columns]
+    if not columns or df.shape[0] <= first_data_row:
+        return None
+    data = df.iloc[first_data_row:]
+    # 整个测量值区域展平后一次解析为浮点数组
+    values = parameter_validation.parse_numeric_values(
+        data[columns].to_numpy(dtype=object).ravel().tolist())[0].reshape(len(data), len(columns))
+    measured_columns = ~np.isnan(values).all(axis=0)
+    if not measured_columns.any():
+        return None
+
+    label_columns = [c for c in df.columns if c not in set(columns)]
+    attributes: Dict[str, List[Any]] = {}
+    for _, row in df.iloc[:first_data_row].iterrows():
+        label = next((str(row[c]).strip().lower() for c in label_columns if isinstance(row[c], str) and row[c].strip()),
+                     "")
+        key = _attribute_key(label)
+        if key and key not in attributes:
+            attributes[key] = [row[c] for c in columns]
+    if "K0004" not in attributes and first_data_row > 0:
+        # 没有日期行时，测量值列的表头为日期则作为该零件的日期时间
+        header_cells = [df.iloc[first_data_row - 1][c] for c in columns]
+        if any(isinstance(cell, (datetime.date, pd.Timestamp)) for cell in header_cells):
+            attributes["K0004"] = [cell if isinstance(cell, (datetime.date, pd.Timestamp)) else None
+                                   for cell in header_cells]
+
+    kept = np.flatnonzero(measured_columns)
+    block: Dict[str, Any] = {"source": source, "part_count": len(kept)}
+    for key in PART_ATTRIBUTE_KEYS:
+        cells = attributes.get(key)
+        formatter = _format_timestamp if key == "K0004" else _format_text
+        block[key] = [formatter(cells[i]) for i in kept] if cells else [""] * len(kept)
+    return block, values[:, kept], {label: i for i, label in enumerate(data.index)}
+
+
+def attach_measurements(parameters: List[Dict[str, Any]], df: pd.DataFrame, layout: Dict[str, Any],
+                        settings: Optional[Dict[str, Any]], source: str) -> int:
+    """测量值开启时，将工作表中每个参数行的测量值记入参数记录的 "measurements"
+    ([{"block": 零件信息, "values": 该参数各零件的测量值}])。返回零件数。"""
+    if not parameters or not settings or not settings.get("Enabled", False):
+        return 0
+    extracted = extract_measurements(df, layout, settings, source)
+    if extracted is None:
+        return 0
+    block, values, row_positions = extracted
+    for param in parameters:
+        position = row_positions.get(param.get("original_row_index_df"))
+        if position is not None:
+            param["measurements"] = [{"block": block, "values": values[position]}]
+    logger.debug(f"    '{os.path.basename(source)}' 中读取到 {block['part_count']} 个零件的测量值。")
+    return block["part_count"]
+
+
+def merge_measurements(kept_param: Dict[str, Any], duplicate_param: Dict[str, Any]):
+    """去重时将重复参数 (来自其他文件/工作表) 的测量值并入保留的参数，作为更多的零件。"""
+    sources = {entry["block"]["source"] for entry in kept_param.get("measurements") or ()}
+    for entry in duplicate_param.get("measurements") or ():
+        if entry["block"]["source"] not in sources:
+            kept_param.setdefault("measurements", []).append(entry)
+            sources.add(entry["block"]["source"])
+
+
+def value_decimals(matrix: np.ndarray) -> np.ndarray:
+    """每列 (参数) 测量值所需的小数位数 (最多 MAX_VALUE_DECIMALS 位)：按列整体判断，每轮只检查尚未确定的列。"""
+    decimals = np.full(matrix.shape[1], MAX_VALUE_DECIMALS)
+    remaining = np.arange(matrix.shape[1])
+    for d in range(MAX_VALUE_DECIMALS):
+        scaled = matrix[:, remaining] * 10.0 ** d
+        with np.errstate(invalid="ignore"):
+            done = ((np.abs(scaled - np.round(scaled)) <= 1e-6) | np.isnan(scaled)).all(axis=0)
+        decimals[remaining[done]] = d
+        remaining = remaining[~done]
+        if not remaining.size:
+            break
+    return decimals
+
+
+def generate_value_lines(parameters_to_output: List[Dict[str, Any]]) -> List[str]:
+    """生成测量值行 (每个零件一行，参数顺序与输出顺序一致)。所有参数的测量值先填入一个 零件 × 参数 的矩阵，
+    按整个矩阵确定每个参数的小数位数与缺失值，再为每个零件拼出一个格式模板，一次格式化整行，不逐个单元格格式化。
+    没有测量值时返回空列表。"""
+    blocks: Dict[str, Tuple[Dict[str, Any], int]] = {}
+    part_count = 0
+    for param in parameters_to_output:
+        for entry in param.get("measurements") or ():
+            block = entry["block"]
+            if block["source"] not in blocks:
+                blocks[block["source"]] = (block, part_count)
+                part_count += block["part_count"]
+    if not part_count:
+        return []
+
+    matrix = np.full((part_count, len(parameters_to_output)), np.nan)
+    for i, param in enumerate(parameters_to_output):
+        for entry in param.get("measurements") or ():
+            offset = blocks[entry["block"]["source"]][1]
+            matrix[offset:offset + len(entry["values"]), i] = entry["values"]
+    measured = ~np.isnan(matrix)
+    complete_parts = measured.all(axis=1)
+    measured_parts = measured.any(axis=1)
+
+    # 每个参数的字段模板：有值时为 "%.<小数位>f" + 属性 0；缺失时 "%.0s" 消耗该值但不输出，属性为 255
+    valid_fields = np.array([f"%.{d}f{FIELD_SEPARATOR}{ATTRIBUTE_VALID}" for d in value_decimals(matrix).tolist()])
+    missing_field = f"%.0s{FIELD_SEPARATOR}{ATTRIBUTE_MISSING}"
+    valid_field_list = valid_fields.tolist()
+    part_fields = {key: [text for block, _ in blocks.values() for text in block[key]] for key in PART_ATTRIBUTE_KEYS}
+    lines: List[str] = []
+    for p, (values, complete, any_measured) in enumerate(zip(matrix.tolist(), complete_parts.tolist(),
+                                                             measured_parts.tolist())):
+        if not any_measured:
+            continue
+        # 零件字段 (日期时间、批次…) 为每个参数相同的后缀，转义其中的 % 后拼入模板
+        tail = "".join(FIELD_SEPARATOR + (part_fields[key][p] if key in part_fields else "")
+                       for key in _PART_FIELD_ORDER).rstrip(FIELD_SEPARATOR).replace("%", "%%")
+        fields = valid_field_list if complete else np.where(measured[p], valid_fields, missing_field).tolist()
+        lines.append(((tail + CHARACTERISTIC_SEPARATOR).join(fields) + tail) % tuple(values))
+    logger.info(f"generate_value_lines: {len(lines)} 个零件 × {len(parameters_to_output)} 个参数的测量值。")
+    return lines
@@ -0,0 +1,109 @@
+# core/output_archive.py
+# 输出归档：按批次清单 (dfq_manifest.jsonl) 将每天生成的文件作为一个归档批次，所有文件都已超过指定天数
+# (已被下游导入) 后打包为 <输出目录>/archive/<日期>.zip 并删除原文件，使输出目录 (及 qs-STAT 的导入扫描) 只保留近期文件。
+# 界面与监视文件夹每次生成都是一个清单批次，按天归档避免产生大量只含一个文件的压缩包。
+# 每个文件由 ZipFile.write 分块读入并直接压缩写进包中，不生成中间副本；压缩包写完后才删除原文件。
+import json
+import logging
+import os
+import time
+import zipfile
+from typing import List, Dict, Any, Optional, Tuple
+
+from core import output_manifest, dfq_writer
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIRNAME = "archive"
+# 与DFQ同名的附加格式 (见 export_formats) 一并归档
+COMPANION_EXTENSIONS = (".csv", ".jsonl", ".xlsx")
+
+
+def archive_path_for(output_path: str, archive_date: str) -> str:
+    return os.path.join(output_path, ARCHIVE_DIRNAME, f"{archive_date}.zip")
+
+
+def _read_files_by_date(output_path: str) -> Dict[str, List[str]]:
+    """按清单中的顺序返回 {生成日期 (YYYY-MM-DD): [DFQ文件相对路径]}。"""
+    manifest_path = os.path.join(output_path, output_manifest.MANIFEST_FILENAME)
+    batches: Dict[str, List[str]] = {}
+    if not os.path.exists(manifest_path):
+        return batches
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                written_at = str(record.get("written_at", ""))
+                if len(written_at) >= 10 and record.get("output_file"):
+                    batches.setdefault(written_at[:10], []).append(record["output_file"])
+    except OSError as e:
+        logger.warning(f"读取清单 '{manifest_path}' 失败: {e}")
+    return batches
+
+
+def _existing_files(output_path: str, relative_files: List[str]) -> List[str]:
+    """仍然存在的文件 (DFQ 及同名附加格式)，以相对输出目录的路径返回。"""
+    files: List[str] = []
+    for relative_file in relative_files:
+        stem = os.path.splitext(relative_file)[0]
+        for candidate in [relative_file] + [stem + extension for extension in COMPANION_EXTENSIONS]:
+            if candidate not in files and os.path.isfile(os.path.join(output_path, candidate)):
+                files.append(candidate)
+    return files
+
+
+def _write_bundle(output_path: str, archive_date: str, files: List[str]) -> Tuple[bool, str]:
+    """将文件压缩进该日期的 zip 包 (先写 .tmp，完成后原子发布)。返回 (是否成功, 包路径或错误信息)。"""
+    bundle_path = archive_path_for(output_path, archive_date)
+    temp_path = bundle_path + dfq_writer.TEMP_FILE_SUFFIX
+    try:
+        os.makedirs(os.path.dirname(bundle_path), exist_ok=True)
+        with zipfile.ZipFile(temp_path, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+            for relative_file in files:
+                bundle.write(os.path.join(output_path, relative_file), arcname=relative_file.replace(os.sep, '/'))
+        os.replace(temp_path, bundle_path)
+        return True, bundle_path
+    except OSError as e:
+        logger.error(f"归档 {archive_date} 失败: {e}", exc_info=True)
+        try:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        except OSError:
+            pass
+        return False, f"归档 {archive_date} 失败: {e}"
+
+
+def archive_outputs(output_path: str, after_days: float, now: Optional[float] = None) -> Dict[str, Any]:
+    """归档所有文件都已超过 after_days 天的日期批次。已归档 (zip 已存在) 或文件已全部不在的批次跳过。
+    返回 {"archived": [包路径], "file_count": 归档的文件数, "errors": [错误信息]}。"""
+    summary: Dict[str, Any] = {"archived": [], "file_count": 0, "errors": []}
+    if after_days <= 0:
+        return summary
+    cutoff = (time.time() if now is None else now) - after_days * 86400
+    for archive_date, relative_files in _read_files_by_date(output_path).items():
+        if os.path.exists(archive_path_for(output_path, archive_date)):
+            continue
+        files = _existing_files(output_path, relative_files)
+        if not files:
+            continue
+        try:
+            if any(os.path.getmtime(os.path.join(output_path, f)) > cutoff for f in files):
+                continue
+        except OSError:
+            continue
+        success, bundle_path_or_message = _write_bundle(output_path, archive_date, files)
+        if not success:
+            summary["errors"].append(bundle_path_or_message)
+            continue
+        for relative_file in files:
+            try:
+                os.remove(os.path.join(output_path, relative_file))
+            except OSError as e:
+                summary["errors"].append(f"删除已归档文件 '{relative_file}' 失败: {e}")
+        summary["archived"].append(bundle_path_or_message)
+        summary["file_count"] += len(files)
+        logger.info(f"已归档 {archive_date}: {len(files)} 个文件 -> {bundle_path_or_message}")
+    return summary
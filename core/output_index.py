@@ -0,0 +1,71 @@
+# core/output_index.py
+# 本机保存的"近期输出索引"：每个输出目录一份，记录内容哈希 → 已写入的DFQ文件，
+# 用于识别并跳过内容完全相同的重复生成。
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import List, Dict, Any, Optional
+
+from core.config_manager import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_INDEX_DIR = os.path.join(CACHE_DIR, "output_index")
+# 每个输出目录最多保留的近期记录数
+MAX_INDEX_ENTRIES = 500
+
+_index_lock = threading.Lock()
+
+
+def _index_file_for(output_path: str) -> str:
+    normalized = os.path.normcase(os.path.abspath(output_path))
+    digest = hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+    return os.path.join(OUTPUT_INDEX_DIR, f"{digest}.json")
+
+
+def _load_entries(index_file: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(index_file):
+        return []
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            entries = json.load(f).get("entries", [])
+            return entries if isinstance(entries, list) else []
+    except (json.JSONDecodeError, IOError, AttributeError) as e:
+        logger.warning(f"读取输出索引 '{index_file}' 失败，将重建: {e}")
+        return []
+
+
+def find_recent_output(output_path: str, content_hash: str) -> Optional[str]:
+    """查找输出目录中内容哈希相同且仍然存在的近期文件，返回其路径。"""
+    with _index_lock:
+        entries = _load_entries(_index_file_for(output_path))
+    for entry in reversed(entries):
+        if entry.get("hash") == content_hash:
+            file_path = os.path.join(output_path, entry.get("file", ""))
+            if os.path.isfile(file_path):
+                return file_path
+    return None
+
+
+def record_output(output_path: str, content_hash: str, file_path: str):
+    """记录一次成功写入，超过上限时丢弃最旧的记录。"""
+    index_file = _index_file_for(output_path)
+    with _index_lock:
+        entries = [e for e in _load_entries(index_file) if e.get("hash") != content_hash]
+        entries.append({
+            "hash": content_hash,
+            "file": os.path.relpath(file_path, output_path),
+            "written_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        })
+        entries = entries[-MAX_INDEX_ENTRIES:]
+        try:
+            os.makedirs(OUTPUT_INDEX_DIR, exist_ok=True)
+            temp_file = index_file + ".tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({"output_path": os.path.abspath(output_path), "entries": entries}, f, ensure_ascii=False)
+            os.replace(temp_file, index_file)
+        except OSError as e:
+            logger.warning(f"更新输出索引 '{index_file}' 失败: {e}")
@@ -0,0 +1,85 @@
+# core/output_manifest.py
+# 输出目录下的批次清单 (JSON Lines)，每生成一个DFQ文件追加一行，下游可据此增量导入而无需扫描目录。
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "dfq_manifest.jsonl"
+
+_manifest_lock = threading.Lock()
+
+
+def new_batch_id() -> str:
+    """生成批次ID：时间戳 + 随机后缀，按字典序即可大致排序。"""
+    return f"{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def sha256_of_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def build_manifest_record(batch_id: str, output_path: str, output_file: str, source_files: List[str],
+                          header_info: Optional[Dict[str, str]], parameter_count: int, byte_count: int,
+                          sha256: str, duration: float) -> Dict[str, Any]:
+    return {
+        "batch_id": batch_id,
+        "written_at": datetime.datetime.now().isoformat(timespec="milliseconds"),
+        "output_file": os.path.relpath(output_file, output_path),
+        "source_files": list(source_files),
+        "header": dict(header_info) if header_info else {},
+        "parameter_count": parameter_count,
+        "bytes": byte_count,
+        "sha256": sha256,
+        "duration": round(duration, 4),
+    }
+
+
+def append_manifest_records(output_path: str, records: List[Dict[str, Any]]) -> bool:
+    """将记录追加到输出目录的清单文件，一次写入所有行。"""
+    if not records:
+        return True
+    manifest_path = os.path.join(output_path, MANIFEST_FILENAME)
+    payload = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+    try:
+        with _manifest_lock:
+            with open(manifest_path, 'a', encoding='utf-8') as f:
+                f.write(payload)
+        logger.debug(f"已向清单 {manifest_path} 追加 {len(records)} 条记录。")
+        return True
+    except IOError as e:
+        logger.error(f"追加清单 '{manifest_path}' 失败: {e}", exc_info=True)
+        return False
+
+
+def find_latest_output(output_path: str, header_info: Dict[str, str]) -> Optional[str]:
+    """按清单查找输出目录中同一零件 (K1001) 与工站 (K1086) 最近生成且仍然存在的DFQ文件，返回其路径。"""
+    manifest_path = os.path.join(output_path, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        return None
+    k1001, k1086 = header_info.get("K1001", ""), header_info.get("K1086", "")
+    try:
+        with _manifest_lock:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+    except IOError as e:
+        logger.warning(f"读取清单 '{manifest_path}' 失败: {e}")
+        return None
+    for line in reversed(lines):
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        header = record.get("header") or {}
+        if header.get("K1001", "") != k1001 or header.get("K1086", "") != k1086:
+            continue
+        file_path = os.path.join(output_path, record.get("output_file", ""))
+        if os.path.isfile(file_path):
+            return file_path
+    return None
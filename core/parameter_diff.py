@@ -0,0 +1,143 @@
+# core/parameter_diff.py
+# 参数集对比：将当前导入的参数与上次生成的DFQ (基准) 按参数名 (K2001) 对比，找出新增、删除与变化的参数。
+# 每个参数记录取 公称值/上下公差/分类 组成签名元组，两边各建一次以名称为键的字典后逐一比较签名，整体为 O(n)；
+# 只有签名不同的参数才逐项按数值比较找出变化的K值。
+import csv
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+from core import dfq_reader, output_manifest
+
+logger = logging.getLogger(__name__)
+
+STATUS_ADDED = "added"
+STATUS_REMOVED = "removed"
+STATUS_CHANGED = "changed"
+STATUS_UNCHANGED = "unchanged"
+
+STATUS_LABELS = {STATUS_ADDED: "新增", STATUS_REMOVED: "删除", STATUS_CHANGED: "变化", STATUS_UNCHANGED: "未变化"}
+
+# 参与对比的K值 (参数名为匹配键，不在其中)
+DIFF_FIELDS = [
+    ("K2101_val", "K2101 (公称值)"), ("K2113_val", "K2113 (上公差)"), ("K2112_val", "K2112 (下公差)"),
+    ("K2005_val", "K2005 (参数等级)"), ("K2009_val", "K2009 (公差类型)"), ("K2142_val", "K2142 (检验方法)"),
+]
+_DIFF_KEYS = [k_key for k_key, _ in DIFF_FIELDS]
+
+
+def _normalize_value(value: Any) -> str:
+    # 数值按浮点数比较，"0.10" 与 "0.1" 视为相同
+    text = "" if value is None else str(value).strip()
+    try:
+        return repr(float(text))
+    except ValueError:
+        return text
+
+
+def record_signature(param: Dict[str, Any]) -> Tuple[str, ...]:
+    """参数记录 (公称值、上下公差、分类) 的原文签名，作为字典值可直接按哈希比较。"""
+    return tuple([str(param.get(k_key, "")).strip() for k_key in _DIFF_KEYS])
+
+
+def changed_fields(old_param: Dict[str, Any], new_param: Dict[str, Any]) -> List[Dict[str, str]]:
+    """逐项比较签名不同的两个参数，数值相等 (例如 "0.10" 与 "0.1") 的项不算变化。"""
+    return [{"k_key": k_key, "label": label,
+             "old": str(old_param.get(k_key, "")), "new": str(new_param.get(k_key, ""))}
+            for k_key, label in DIFF_FIELDS
+            if _normalize_value(old_param.get(k_key, "")) != _normalize_value(new_param.get(k_key, ""))]
+
+
+def _index_by_name(parameters: List[Dict[str, Any]]) -> Dict[str, Tuple[int, Tuple[str, ...]]]:
+    index: Dict[str, Tuple[int, Tuple[str, ...]]] = {}
+    for i, param in enumerate(parameters):
+        name = str(param.get("K2001_val", "")).strip()
+        if name not in index:  # 重名参数只取第一个，与导入时的去重一致
+            index[name] = (i, record_signature(param))
+    return index
+
+
+def diff_parameters(current: List[Dict[str, Any]], baseline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """对比当前参数与基准参数，返回对比结果列表：先按当前顺序列出每个当前参数 (新增/变化/未变化)，
+    再按基准顺序列出已删除的参数。每项为 {"status", "name", "index" (当前下标，删除为 None),
+    "baseline_index" (基准下标，新增为 None), "changes": [{"k_key", "label", "old", "new"}]}。"""
+    baseline_index = _index_by_name(baseline)
+    matched_names = set()
+    entries: List[Dict[str, Any]] = []
+    for i, param in enumerate(current):
+        name = str(param.get("K2001_val", "")).strip()
+        baseline_entry = baseline_index.get(name)
+        if baseline_entry is None or name in matched_names:
+            entries.append({"status": STATUS_ADDED, "name": name, "index": i, "baseline_index": None, "changes": []})
+            continue
+        matched_names.add(name)
+        baseline_i, baseline_signature = baseline_entry
+        changes = [] if record_signature(param) == baseline_signature else changed_fields(baseline[baseline_i], param)
+        entries.append({"status": STATUS_CHANGED if changes else STATUS_UNCHANGED, "name": name, "index": i,
+                        "baseline_index": baseline_i, "changes": changes})
+    for name, (baseline_i, _) in baseline_index.items():
+        if name not in matched_names:
+            entries.append({"status": STATUS_REMOVED, "name": name, "index": None, "baseline_index": baseline_i,
+                            "changes": []})
+    return entries
+
+
+def count_by_status(entries: List[Dict[str, Any]]) -> Dict[str, int]:
+    counts = {status: 0 for status in STATUS_LABELS}
+    for entry in entries:
+        counts[entry["status"]] += 1
+    return counts
+
+
+def describe_changes(entry: Dict[str, Any]) -> str:
+    """变化项的说明文字，例如 "K2113 (上公差): 0.1 → 0.2"。"""
+    return "；".join(f"{c['label']}: {c['old']} → {c['new']}" for c in entry["changes"])
+
+
+def summarize_diff(entries: List[Dict[str, Any]]) -> str:
+    counts = count_by_status(entries)
+    return "，".join(f"{STATUS_LABELS[status]} {counts[status]}" for status in
+                    (STATUS_ADDED, STATUS_REMOVED, STATUS_CHANGED, STATUS_UNCHANGED))
+
+
+REPORT_COLUMNS = ["K1001", "K1086", "源文件", "基准DFQ", "状态", "参数名", "K值", "基准值", "当前值", "说明"]
+
+
+def write_change_report(report_path: str, results: List[Dict[str, Any]], include_unchanged: bool = False) -> bool:
+    """将批量对比结果写为 CSV 报告 (UTF-8 BOM，可直接用 Excel 打开)，每个变化的K值一行。
+    results 中每项为 {"header", "source_files", "baseline_file", "entries", "message"}。"""
+    try:
+        with open(report_path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(REPORT_COLUMNS)
+            for result in results:
+                header = result.get("header") or {}
+                prefix = [header.get("K1001", ""), header.get("K1086", ""), ";".join(result.get("source_files", [])),
+                          result.get("baseline_file") or ""]
+                if not result.get("baseline_file"):
+                    writer.writerow(prefix + ["", "", "", "", "", result.get("message", "")])
+                    continue
+                for entry in result.get("entries", []):
+                    status_label = STATUS_LABELS[entry["status"]]
+                    if entry["status"] == STATUS_CHANGED:
+                        for change in entry["changes"]:
+                            writer.writerow(prefix + [status_label, entry["name"], change["label"],
+                                                      change["old"], change["new"], ""])
+                    elif entry["status"] != STATUS_UNCHANGED or include_unchanged:
+                        writer.writerow(prefix + [status_label, entry["name"], "", "", "", ""])
+        return True
+    except OSError as e:
+        logger.error(f"写入对比报告 '{report_path}' 失败: {e}")
+        return False
+
+
+def diff_against_dfq(current: List[Dict[str, Any]], dfq_path: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """读取基准DFQ文件并与当前参数对比，返回 (对比结果, 读取错误)。"""
+    _, baseline, errors = dfq_reader.read_dfq_file(dfq_path)
+    return diff_parameters(current, baseline), errors
+
+
+def find_baseline_for(output_path: Optional[str], header_info: Optional[Dict[str, str]]) -> Optional[str]:
+    """在输出目录的清单中查找该零件/工站上次生成的DFQ文件。"""
+    if not output_path or not header_info:
+        return None
+    return output_manifest.find_latest_output(output_path, header_info)
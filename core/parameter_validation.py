@@ -0,0 +1,97 @@
+# core/parameter_validation.py
+# 公称值与上下公差 (K2101/K2113/K2112) 的数值校验：一次性将整个检验计划的三列解析为浮点数组，
+# 按规则向量化地找出问题行，避免在 qs-STAT 导入 DFQ 时才发现错误。
+# 上下公差为相对公称值的偏差 (例如 0.1 / -0.1)。
+import logging
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SEVERITY_ERROR = "error"
+SEVERITY_WARNING = "warning"
+
+ISSUE_NOT_NUMERIC = "not_numeric"
+ISSUE_COMMA_DECIMAL = "comma_decimal"
+ISSUE_UPPER_BELOW_LOWER = "upper_below_lower"
+
+NUMERIC_FIELDS = [("K2101_val", "K2101 (公称值)"), ("K2113_val", "K2113 (上公差)"), ("K2112_val", "K2112 (下公差)")]
+
+
+def parse_numeric_values(values: List[Any]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """将一列文本一次性解析为浮点数组。返回 (数值 (空或无法解析为 NaN), 是否为空, 是否无法解析, 是否使用逗号小数分隔符)；
+    使用逗号小数分隔符的值按点号解析后计入数值。只有解析失败的少数值才逐个检查。"""
+    numbers = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(
+        dtype=float, na_value=np.nan, copy=True)
+    numbers[~np.isfinite(numbers)] = np.nan
+    empty = np.zeros(len(numbers), dtype=bool)
+    not_numeric = np.zeros(len(numbers), dtype=bool)
+    comma_decimal = np.zeros(len(numbers), dtype=bool)
+    for i in np.flatnonzero(np.isnan(numbers)):
+        text = "" if values[i] is None else str(values[i]).strip()
+        if not text:
+            empty[i] = True
+            continue
+        if text.count(",") == 1:
+            try:
+                number = float(text.replace(",", "."))
+            except ValueError:
+                number = float("nan")
+            if np.isfinite(number):
+                comma_decimal[i] = True
+                numbers[i] = number
+                continue
+        not_numeric[i] = True
+    return numbers, empty, not_numeric, comma_decimal
+
+
+def validate_parameters(parameters: List[Dict[str, Any]], index_offset: int = 0) -> List[Dict[str, Any]]:
+    """校验参数列表的公称值与上下公差，返回问题列表
+    [{"index": 参数下标 (+index_offset), "k_key", "code", "severity", "message"}]，按参数下标排序。"""
+    if not parameters:
+        return []
+    columns = {}
+    issues: List[Tuple[int, int, Dict[str, Any]]] = []
+    for field_order, (k_key, label) in enumerate(NUMERIC_FIELDS):
+        raw_values = [p.get(k_key, "") for p in parameters]
+        numbers, _, not_numeric, comma_decimal = parse_numeric_values(raw_values)
+        columns[k_key] = numbers
+        for i in np.flatnonzero(not_numeric):
+            issues.append((i, field_order, {
+                "k_key": k_key, "code": ISSUE_NOT_NUMERIC, "severity": SEVERITY_ERROR,
+                "message": f"{label} '{raw_values[i]}' 不是数值"}))
+        for i in np.flatnonzero(comma_decimal):
+            issues.append((i, field_order, {
+                "k_key": k_key, "code": ISSUE_COMMA_DECIMAL, "severity": SEVERITY_ERROR,
+                "message": f"{label} '{raw_values[i]}' 使用了逗号作为小数分隔符，应为 '{str(raw_values[i]).strip().replace(',', '.')}'"}))
+
+    upper, lower = columns["K2113_val"], columns["K2112_val"]
+    with np.errstate(invalid="ignore"):
+        upper_below_lower = upper < lower
+    for i in np.flatnonzero(upper_below_lower):
+        issues.append((i, len(NUMERIC_FIELDS), {
+            "k_key": "K2113_val", "code": ISSUE_UPPER_BELOW_LOWER, "severity": SEVERITY_ERROR,
+            "message": f"上公差 {upper[i]:g} 小于下公差 {lower[i]:g}"}))
+
+    issues.sort(key=lambda item: (item[0], item[1]))
+    return [dict(issue, index=int(i) + index_offset) for i, _, issue in issues]
+
+
+def validate_parameter(parameter: Dict[str, Any], index: int) -> List[Dict[str, Any]]:
+    """校验单个参数 (例如编辑后的行)，问题的 index 为 index。"""
+    return validate_parameters([parameter], index_offset=index)
+
+
+def group_issues_by_index(issues: List[Dict[str, Any]]) -> Dict[int, List[Dict[str, Any]]]:
+    grouped: Dict[int, List[Dict[str, Any]]] = {}
+    for issue in issues:
+        grouped.setdefault(issue["index"], []).append(issue)
+    return grouped
+
+
+def count_issues(issues: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """返回 (错误数, 警告数)。"""
+    error_count = sum(1 for issue in issues if issue["severity"] == SEVERITY_ERROR)
+    return error_count, len(issues) - error_count
@@ -0,0 +1,179 @@
+# core/parse_isolation.py
+# 隔离解析：每个源文件在独立的工作进程中解析，设置墙钟超时与内存上限。
+# 卡死或占用内存过多的文件会被终止并记入错误列表，其余文件继续由其他工作进程处理。
+import logging
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import wait
+from typing import List, Dict, Any, Tuple, Optional, Callable
+
+from core import excel_processor
+
+try:
+    import resource  # 仅 POSIX 可用，用于设置进程的地址空间上限
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# forkserver 预先导入的模块 (Excel 读取引擎由 pandas 延迟导入，预先导入可避免每个工作进程重复导入)，缺失的模块会被忽略
+FORKSERVER_PRELOAD = [__name__, "openpyxl", "xlrd", "pandas.io.excel._openpyxl", "pandas.io.excel._xlrd", "python_calamine"]
+
+ParseResult = Tuple[List[Dict[str, Any]], List[str]]
+
+
+def apply_memory_limit(memory_limit_mb: int):
+    """为当前进程设置地址空间上限 (MB)，非 POSIX 或未设置上限时不做处理。"""
+    if resource is None or not memory_limit_mb or memory_limit_mb <= 0:
+        return
+    limit_bytes = int(memory_limit_mb) * 1024 * 1024
+    try:
+        _, hard_limit = resource.getrlimit(resource.RLIMIT_AS)
+        if hard_limit != resource.RLIM_INFINITY:
+            limit_bytes = min(limit_bytes, hard_limit)
+        resource.setrlimit(resource.RLIMIT_AS, (limit_bytes, hard_limit))
+    except (ValueError, OSError) as e:
+        logger.warning(f"无法设置进程的内存上限 ({memory_limit_mb} MB): {e}")
+
+
+def _worker_main(conn, memory_limit_mb: int, sheet_selection: Optional[Dict[str, Any]], reader_backend: str,
+                 layout_settings: Optional[Dict[str, Any]], measurement_settings: Optional[Dict[str, Any]]):
+    """工作进程主循环：逐个接收文件路径并返回解析结果，收到 None 时退出。"""
+    apply_memory_limit(memory_limit_mb)
+    while True:
+        try:
+            file_path = conn.recv()
+        except (EOFError, OSError):
+            break
+        if file_path is None:
+            break
+        conn.send(excel_processor.read_single_excel_file(file_path, sheet_selection, reader_backend,
+                                                         layout_settings=layout_settings,
+                                                         measurement_settings=measurement_settings))
+
+
+def _get_context():
+    # forkserver 预先导入 pandas 与读取引擎，之后每个工作进程都从它派生，启动开销小；Windows 只能使用 spawn
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(FORKSERVER_PRELOAD)
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+class _ParseWorker:
+    def __init__(self, context, memory_limit_mb: int, sheet_selection: Optional[Dict[str, Any]] = None,
+                 reader_backend: str = "auto", layout_settings: Optional[Dict[str, Any]] = None,
+                 measurement_settings: Optional[Dict[str, Any]] = None):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main,
+                                       args=(child_conn, memory_limit_mb, sheet_selection, reader_backend,
+                                             layout_settings, measurement_settings),
+                                       name="ExcelParseWorker", daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.task_index: Optional[int] = None
+        self.file_path = ""
+        self.started_at = 0.0
+        self.deadline = 0.0
+
+    def assign(self, task_index: int, file_path: str, timeout_seconds: float):
+        self.task_index = task_index
+        self.file_path = file_path
+        self.started_at = time.monotonic()
+        self.deadline = self.started_at + timeout_seconds if timeout_seconds and timeout_seconds > 0 else float("inf")
+        self.conn.send(file_path)
+
+    def release(self):
+        self.task_index = None
+        self.file_path = ""
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=2)
+        self.kill()
+
+
+def parse_files_isolated(file_paths: List[str], timeout_seconds: float = 120.0, memory_limit_mb: int = 2048,
+                         max_workers: int = 2, order: Optional[List[int]] = None,
+                         path_resolver: Optional[Callable[[int], str]] = None,
+                         sheet_selection: Optional[Dict[str, Any]] = None, reader_backend: str = "auto",
+                         layout_settings: Optional[Dict[str, Any]] = None,
+                         measurement_settings: Optional[Dict[str, Any]] = None
+                         ) -> Tuple[List[ParseResult], List[Optional[float]]]:
+    """在隔离的工作进程中解析文件，按 file_paths 的顺序返回 (每个文件的 (参数列表, 错误列表), 每个文件的实际耗时秒数)。
+    order 为分配给工作进程的文件下标顺序 (默认按原顺序)，不影响返回结果的顺序；
+    path_resolver(下标) 返回实际解析的路径 (例如本地缓存副本)；sheet_selection、reader_backend、layout_settings 与 measurement_settings 原样传给 read_single_excel_file。"""
+    results: List[Optional[ParseResult]] = [None] * len(file_paths)
+    elapsed_seconds: List[Optional[float]] = [None] * len(file_paths)
+    if not file_paths:
+        return [], []
+    dispatch_order = list(order) if order is not None else list(range(len(file_paths)))
+    context = _get_context()
+    worker_count = max(1, min(max_workers, len(file_paths)))
+    workers = [_ParseWorker(context, memory_limit_mb, sheet_selection, reader_backend, layout_settings,
+                            measurement_settings) for _ in range(worker_count)]
+    next_position = 0
+    try:
+        while True:
+            for i, worker in enumerate(workers):
+                if worker.task_index is None and next_position < len(dispatch_order):
+                    if not worker.process.is_alive():
+                        workers[i] = worker = _ParseWorker(context, memory_limit_mb, sheet_selection, reader_backend,
+                                                           layout_settings, measurement_settings)
+                    task_index = dispatch_order[next_position]
+                    file_path = path_resolver(task_index) if path_resolver else file_paths[task_index]
+                    worker.assign(task_index, file_path, timeout_seconds)
+                    next_position += 1
+            busy_workers = [w for w in workers if w.task_index is not None]
+            if not busy_workers:
+                break
+
+            nearest_deadline = min(w.deadline for w in busy_workers)
+            wait_timeout = None if nearest_deadline == float("inf") else max(0.0, nearest_deadline - time.monotonic())
+            wait([w.conn for w in busy_workers] + [w.process.sentinel for w in busy_workers], timeout=wait_timeout)
+
+            now = time.monotonic()
+            for worker in workers:
+                if worker.task_index is None:
+                    continue
+                file_name = os.path.basename(worker.file_path)
+                error_message = ""
+                if worker.conn.poll():
+                    try:
+                        results[worker.task_index] = worker.conn.recv()
+                        elapsed_seconds[worker.task_index] = time.monotonic() - worker.started_at
+                        worker.release()
+                        continue
+                    except (EOFError, OSError):
+                        error_message = f"解析文件 '{file_name}' 时工作进程异常退出，可能超出内存上限 ({memory_limit_mb} MB)。"
+                elif not worker.process.is_alive():
+                    error_message = (f"解析文件 '{file_name}' 时工作进程异常退出 (退出码 {worker.process.exitcode})，"
+                                     f"可能超出内存上限 ({memory_limit_mb} MB)。")
+                elif now >= worker.deadline:
+                    error_message = f"解析文件 '{file_name}' 超时 (超过 {timeout_seconds:g} 秒)，已终止。"
+                else:
+                    continue
+                logger.error(error_message)
+                results[worker.task_index] = ([], [error_message])
+                elapsed_seconds[worker.task_index] = now - worker.started_at
+                # 被终止的工作进程在分配下一个文件时重新创建，其余文件不受影响
+                worker.kill()
+                worker.release()
+    finally:
+        for worker in workers:
+            if worker.task_index is None:
+                worker.stop()
+            else:
+                worker.kill()
+    return [r if r is not None else ([], []) for r in results], elapsed_seconds
@@ -0,0 +1,121 @@
+# core/parse_scheduler.py
+# 解析调度：解析前对每个文件做低成本的预检 (文件大小、xlsx 工作表的 dimension 元数据，不读取单元格)，
+# 按预计耗时从大到小分配给工作进程，避免大文件排在最后拖长整体时间；并记录预计与实际耗时以便调整估算参数。
+import json
+import logging
+import os
+import posixpath
+import re
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import List, Dict, Any, Optional
+
+from core.config_manager import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# 每个文件的预计与实际解析耗时追加到此文件 (JSON Lines)
+PARSE_COST_LOG_PATH = os.path.join(CACHE_DIR, "parse_cost_log.jsonl")
+# 只读取工作表 XML 开头的这么多字节查找 <dimension>，它位于 <sheetData> 之前
+DIMENSION_SCAN_BYTES = 64 * 1024
+
+_DIMENSION_PATTERN = re.compile(rb'<(?:\w+:)?dimension\s+ref="([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?"')
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PACKAGE_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+def _column_number(column_letters: str) -> int:
+    number = 0
+    for letter in column_letters:
+        number = number * 26 + (ord(letter) - ord('A') + 1)
+    return number
+
+
+def _first_sheet_member(archive: zipfile.ZipFile) -> str:
+    """按 workbook.xml 中的工作表顺序找到第一个工作表 (pandas 的 sheet_name=0) 在压缩包中的路径。"""
+    workbook = ET.fromstring(archive.read("xl/workbook.xml"))
+    first_sheet = workbook.find(f"{_MAIN_NS}sheets/{_MAIN_NS}sheet")
+    relationship_id = first_sheet.get(f"{_REL_NS}id") if first_sheet is not None else None
+    relationships = ET.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    for relationship in relationships.iter(f"{_PACKAGE_REL_NS}Relationship"):
+        if relationship.get("Id") == relationship_id:
+            target = relationship.get("Target", "")
+            return target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+    return "xl/worksheets/sheet1.xml"
+
+
+def read_xlsx_dimension(file_path: str) -> Optional[int]:
+    """读取 xlsx 第一个工作表声明的单元格区域大小 (行数 × 列数)，不解析单元格；读取失败时返回 None。"""
+    try:
+        with zipfile.ZipFile(file_path) as archive:
+            with archive.open(_first_sheet_member(archive)) as sheet_stream:
+                head = sheet_stream.read(DIMENSION_SCAN_BYTES)
+    except (OSError, KeyError, zipfile.BadZipFile, ET.ParseError) as e:
+        logger.debug(f"读取 '{os.path.basename(file_path)}' 的工作表尺寸失败: {e}")
+        return None
+    match = _DIMENSION_PATTERN.search(head)
+    if not match:
+        return None
+    first_column, first_row, last_column, last_row = match.groups()
+    if last_column is None:
+        return 1
+    rows = int(last_row) - int(first_row) + 1
+    columns = _column_number(last_column.decode()) - _column_number(first_column.decode()) + 1
+    return max(rows, 1) * max(columns, 1)
+
+
+def estimate_parse_seconds(byte_count: int, cell_count: Optional[int], cost_model: Dict[str, Any]) -> float:
+    """按估算参数计算预计解析耗时 (秒)：有单元格数量时按单元格估算，否则按文件大小估算。"""
+    base_seconds = float(cost_model.get("BaseSeconds", 0.01))
+    if cell_count is not None:
+        return base_seconds + cell_count / 1_000_000 * float(cost_model.get("SecondsPerMillionCells", 18.0))
+    return base_seconds + byte_count / (1024 * 1024) * float(cost_model.get("SecondsPerMB", 1.0))
+
+
+def preflight_files(file_paths: List[str], cost_model: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """对每个文件做低成本预检，返回与 file_paths 顺序一致的 [{path, bytes, cells, predicted_seconds}]。"""
+    preflights: List[Dict[str, Any]] = []
+    for file_path in file_paths:
+        try:
+            byte_count = os.path.getsize(file_path)
+        except OSError:
+            byte_count = 0
+        cell_count = read_xlsx_dimension(file_path) if file_path.lower().endswith('.xlsx') else None
+        preflights.append({
+            "path": file_path, "bytes": byte_count, "cells": cell_count,
+            "predicted_seconds": estimate_parse_seconds(byte_count, cell_count, cost_model)
+        })
+    return preflights
+
+
+def largest_first_order(preflights: List[Dict[str, Any]]) -> List[int]:
+    """按预计耗时从大到小排列文件下标 (耗时相同时保持原顺序)。"""
+    return sorted(range(len(preflights)), key=lambda i: -preflights[i]["predicted_seconds"])
+
+
+def report_parse_costs(preflights: List[Dict[str, Any]], actual_seconds: List[Optional[float]],
+                       log_path: Optional[str] = PARSE_COST_LOG_PATH) -> List[Dict[str, Any]]:
+    """生成预计与实际耗时对照报告，写入日志并追加到 log_path (为 None 时不写文件)。"""
+    recorded_at = time.time()
+    report = []
+    for preflight, actual in zip(preflights, actual_seconds):
+        entry = dict(preflight, actual_seconds=actual, recorded_at=recorded_at)
+        entry["path"] = os.path.basename(preflight["path"])
+        report.append(entry)
+        logger.info(f"  解析耗时 '{entry['path']}': 预计 {preflight['predicted_seconds']:.3f}s，"
+                    f"实际 {'-' if actual is None else f'{actual:.3f}s'} "
+                    f"({preflight['bytes']} 字节，{preflight['cells'] if preflight['cells'] is not None else '?'} 个单元格)")
+    measured = [(e["predicted_seconds"], e["actual_seconds"]) for e in report if e["actual_seconds"] is not None]
+    if measured and sum(p for p, _ in measured) > 0:
+        logger.info(f"  实际/预计耗时比: {sum(a for _, a in measured) / sum(p for p, _ in measured):.2f}")
+    if log_path:
+        try:
+            os.makedirs(os.path.dirname(log_path), exist_ok=True)
+            with open(log_path, 'a', encoding='utf-8') as f:
+                for entry in report:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning(f"写入解析耗时记录 '{log_path}' 失败: {e}")
+    return report
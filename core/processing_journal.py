@@ -0,0 +1,154 @@
+# core/processing_journal.py
+# 追加写入的处理日志 (JSON Lines)：记录每个源文件在某个 (大小, 修改时间) 下的处理结果，
+# 程序重启或批量任务中断后据此跳过已处理且未变化的文件。
+# 写入保持文件句柄打开，按条数/时间批量 fsync，避免成为高速批量转换的瓶颈。
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from core.config_manager import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_DIR = os.path.join(CACHE_DIR, "journal")
+
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+# 监视文件夹首次启动时已存在的文件 (视为已处理，之后变化时才转换)
+STATUS_BASELINE = "baseline"
+
+
+def default_journal_path(prefix: str, key_path: str) -> str:
+    """按用途前缀与目录路径 (监视的源目录或批量输出目录) 生成日志文件路径。"""
+    digest = hashlib.sha1(os.path.normcase(os.path.abspath(key_path)).encode('utf-8')).hexdigest()
+    return os.path.join(JOURNAL_DIR, f"{prefix}_{digest}.jsonl")
+
+
+class ProcessingJournal:
+    def __init__(self, journal_path: str, sync_every: int = 200, sync_interval: float = 1.0):
+        self.journal_path = journal_path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self._line_count = 0
+        self._file = None
+        self._unsynced_count = 0
+        self._last_sync = time.monotonic()
+        self._load()
+
+    @staticmethod
+    def _key(file_path: str) -> str:
+        return os.path.normcase(os.path.abspath(file_path))
+
+    def _load(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 断电等情况下最后一行可能不完整，忽略即可
+                    logger.warning(f"处理日志 '{self.journal_path}' 中存在无法解析的行，已忽略。")
+                    continue
+                self._latest[self._key(record.get("path", ""))] = record
+                self._line_count += 1
+        logger.info(f"已加载处理日志 '{self.journal_path}': {self._line_count} 条记录，{len(self._latest)} 个文件。")
+
+    def file_count(self) -> int:
+        """有记录的文件数。"""
+        with self._lock:
+            return len(self._latest)
+
+    def get(self, file_path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._latest.get(self._key(file_path))
+
+    def is_processed(self, file_path: str, size: int, mtime: float) -> bool:
+        """文件在当前大小/修改时间下是否已有处理记录 (成功、失败或基线均算已处理)。"""
+        record = self.get(file_path)
+        return bool(record) and record.get("size") == size and record.get("mtime") == mtime
+
+    def failed_attempts(self, file_path: str, size: int, mtime: float) -> int:
+        """文件在当前大小/修改时间下连续失败的次数 (未失败或文件已变化时为 0)。"""
+        record = self.get(file_path)
+        if not record or record.get("status") != STATUS_FAILED or record.get("size") != size \
+                or record.get("mtime") != mtime:
+            return 0
+        return int(record.get("attempts", 1))
+
+    def is_done(self, file_path: str, size: int, mtime: float) -> bool:
+        """文件在当前大小/修改时间下是否已成功转换，且输出文件仍然存在。失败或缺失的需要重新处理。"""
+        record = self.get(file_path)
+        return bool(record) and record.get("status") == STATUS_DONE and record.get("size") == size \
+            and record.get("mtime") == mtime and os.path.isfile(record.get("output_file", ""))
+
+    def record(self, file_path: str, size: int, mtime: float, status: str, output_file: str = "",
+               message: str = "", output_sha256: str = ""):
+        entry = {
+            "path": file_path, "size": size, "mtime": mtime, "status": status,
+            "output_file": output_file, "sha256": output_sha256, "message": message, "recorded_at": time.time()
+        }
+        with self._lock:
+            if status == STATUS_FAILED:
+                previous = self._latest.get(self._key(file_path))
+                same_version = bool(previous) and previous.get("status") == STATUS_FAILED \
+                    and previous.get("size") == size and previous.get("mtime") == mtime
+                entry["attempts"] = int(previous.get("attempts", 1)) + 1 if same_version else 1
+            line = json.dumps(entry, ensure_ascii=False) + "\n"
+            self._latest[self._key(file_path)] = entry
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+                self._file = open(self.journal_path, 'a', encoding='utf-8')
+            self._file.write(line)
+            self._line_count += 1
+            self._unsynced_count += 1
+            if self._unsynced_count >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+                self._sync_locked()
+
+    def _sync_locked(self):
+        if self._file is None or self._unsynced_count == 0:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced_count = 0
+        self._last_sync = time.monotonic()
+
+    def flush(self):
+        """将尚未落盘的记录写入磁盘。"""
+        with self._lock:
+            self._sync_locked()
+
+    def compact(self):
+        """日志中被覆盖的旧记录过多时，只保留每个文件的最新记录重写日志。"""
+        with self._lock:
+            if self._line_count <= 2 * len(self._latest) + 100:
+                return
+            self._sync_locked()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            temp_path = self.journal_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for entry in self._latest.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.journal_path)
+            logger.info(f"处理日志已压缩: {self._line_count} 行 -> {len(self._latest)} 行。")
+            self._line_count = len(self._latest)
+
+    def close(self):
+        with self._lock:
+            self._sync_locked()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,243 @@
+# core/reader_backends.py
+# 工作簿读取后端：统一的 "打开工作簿 → 读取所选工作表" 接口。pandas (openpyxl/xlrd) 为参考实现，
+# 安装了 python-calamine (Rust 实现) 时可使用更快的 calamine 后端。
+# 行读取型后端逐行取出单元格后交给 pandas 的 TextParser 构建 DataFrame，类型推断与 pd.read_excel 完全一致，
+# 因此各后端提取出的参数记录相同 (见 core/reader_conformance.py)。
+import datetime
+import itertools
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional, Iterator
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+from pandas.errors import EmptyDataError
+
+from core.config_manager import CACHE_DIR
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # python-calamine 为可选依赖
+    CalamineWorkbook = None
+
+logger = logging.getLogger(__name__)
+
+BACKEND_AUTO = "auto"
+REFERENCE_BACKEND = "pandas"
+# 列出可用后端时的顺序 (auto 模式不据此选择，没有测速结果时始终使用参考实现)
+BACKEND_PRIORITY = ["calamine", "pandas"]
+# backend_main.py benchmark 的测速结果 (按扩展名记录从快到慢的后端名称)，auto 模式据此选择后端
+BACKEND_RANKING_PATH = os.path.join(CACHE_DIR, "reader_backend_ranking.json")
+
+# 识别参数表布局时读取的列数 (与 core/table_layout.SNIFF_COLUMNS 一致)
+HEAD_COLUMN_COUNT = 16
+
+
+class ReaderBackend(ABC):
+    """读取后端接口：open_workbook 返回的工作簿对象需提供 sheet_names、read_sheet_head(名称, 行数)、
+    read_sheet(名称, 列下标列表) 与 close()。"""
+    name = ""
+    extensions = ('.xls', '.xlsx')
+
+    def is_available(self) -> bool:
+        return True
+
+    def supports(self, file_path: str) -> bool:
+        return file_path.lower().endswith(self.extensions)
+
+    @abstractmethod
+    def open_workbook(self, file_path: str):
+        ...
+
+
+class PandasWorkbook:
+    def __init__(self, file_path: str):
+        engine = 'openpyxl' if file_path.lower().endswith('.xlsx') else 'xlrd'
+        self._excel_file = pd.ExcelFile(file_path, engine=engine)
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return self._excel_file.sheet_names
+
+    def read_sheet_head(self, sheet_name: str, nrows: int) -> pd.DataFrame:
+        return self._excel_file.parse(sheet_name=sheet_name, header=None, nrows=nrows)
+
+    def read_sheet(self, sheet_name: str, columns: List[int]) -> pd.DataFrame:
+        # 用函数筛选列：列标签保持原列下标，且列数不足时不会报错
+        column_set = set(columns)
+        return self._excel_file.parse(sheet_name=sheet_name, header=None, usecols=lambda c: c in column_set)
+
+    def close(self):
+        self._excel_file.close()
+
+
+class PandasReaderBackend(ReaderBackend):
+    """参考实现：pd.ExcelFile，.xlsx 使用 openpyxl，.xls 使用 xlrd。"""
+    name = "pandas"
+
+    def open_workbook(self, file_path: str) -> PandasWorkbook:
+        return PandasWorkbook(file_path)
+
+
+def frame_from_rows(rows: List[List[Any]]) -> pd.DataFrame:
+    """按 pandas 读取 Excel 的方式 (去除行尾空单元格与末尾空行、补齐列宽、TextParser 类型推断) 由行数据构建 DataFrame。"""
+    data: List[List[Any]] = []
+    last_row_with_data = -1
+    for row_number, row in enumerate(rows):
+        row = list(row)
+        while row and row[-1] == "":
+            row.pop()
+        if row:
+            last_row_with_data = row_number
+        data.append(row)
+    data = data[:last_row_with_data + 1]
+    if not data:
+        return pd.DataFrame()
+    max_width = max(len(row) for row in data)
+    data = [row + [""] * (max_width - len(row)) for row in data]
+    try:
+        return TextParser(data, header=None, skip_blank_lines=False).read()
+    except EmptyDataError:
+        return pd.DataFrame()
+
+
+class RowWorkbook(ABC):
+    """行读取型工作簿：子类实现 sheet_names 与 iter_rows，逐行返回单元格值 (空单元格为 "")。"""
+
+    @property
+    @abstractmethod
+    def sheet_names(self) -> List[str]:
+        ...
+
+    @abstractmethod
+    def iter_rows(self, sheet_name: str, column_count: int) -> Iterator[List[Any]]:
+        ...
+
+    def read_sheet_head(self, sheet_name: str, nrows: int) -> pd.DataFrame:
+        return frame_from_rows(list(itertools.islice(self.iter_rows(sheet_name, HEAD_COLUMN_COUNT), nrows)))
+
+    def read_sheet(self, sheet_name: str, columns: List[int]) -> pd.DataFrame:
+        # 只保留到布局用到的最后一列，再按原列下标选出所需的列
+        df = frame_from_rows(list(self.iter_rows(sheet_name, max(columns) + 1)))
+        return df[[c for c in df.columns if c in set(columns)]]
+
+    def close(self):
+        pass
+
+
+def _convert_calamine_cell(value: Any) -> Any:
+    # 与 pandas 的 calamine/openpyxl 读取器一致：整数值的浮点数转为 int，日期转为 Timestamp
+    if isinstance(value, float):
+        int_value = int(value) if value == value and value not in (float("inf"), float("-inf")) else None
+        return int_value if int_value is not None and int_value == value else value
+    if isinstance(value, datetime.date):
+        return pd.Timestamp(value)
+    if isinstance(value, datetime.timedelta):
+        return pd.Timedelta(value)
+    return value
+
+
+class CalamineRowWorkbook(RowWorkbook):
+    def __init__(self, file_path: str):
+        self._workbook = CalamineWorkbook.from_path(file_path)
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return self._workbook.sheet_names
+
+    def iter_rows(self, sheet_name: str, column_count: int) -> Iterator[List[Any]]:
+        # skip_empty_area=False 保留开头的空行/空列，行号与 pandas 读取结果一致
+        sheet = self._workbook.get_sheet_by_name(sheet_name)
+        for row in sheet.to_python(skip_empty_area=False):
+            yield [_convert_calamine_cell(value) for value in row[:column_count]]
+
+    def close(self):
+        close = getattr(self._workbook, "close", None)
+        if close is not None:
+            close()
+
+
+class CalamineReaderBackend(ReaderBackend):
+    """python-calamine (Rust 实现) 读取后端，可选依赖。"""
+    name = "calamine"
+
+    def is_available(self) -> bool:
+        return CalamineWorkbook is not None
+
+    def open_workbook(self, file_path: str) -> CalamineRowWorkbook:
+        return CalamineRowWorkbook(file_path)
+
+
+_BACKENDS: Dict[str, ReaderBackend] = {}
+
+
+def register_backend(backend: ReaderBackend):
+    """注册读取后端 (同名覆盖)。"""
+    _BACKENDS[backend.name] = backend
+
+
+def get_backend(name: str) -> Optional[ReaderBackend]:
+    return _BACKENDS.get(name)
+
+
+def backend_names() -> List[str]:
+    """全部已注册后端的名称 (包括依赖未安装的)。"""
+    return list(_BACKENDS)
+
+
+def available_backends(file_path: Optional[str] = None) -> List[ReaderBackend]:
+    """返回已安装 (且支持该文件类型) 的后端，按 BACKEND_PRIORITY 排序，未列出的排在最后。"""
+    backends = [b for b in _BACKENDS.values() if b.is_available() and (file_path is None or b.supports(file_path))]
+    return sorted(backends, key=lambda b: BACKEND_PRIORITY.index(b.name) if b.name in BACKEND_PRIORITY
+                  else len(BACKEND_PRIORITY))
+
+
+_ranking_cache: Optional[Dict[str, List[str]]] = None
+
+
+def load_backend_ranking() -> Dict[str, List[str]]:
+    global _ranking_cache
+    if _ranking_cache is None:
+        _ranking_cache = {}
+        if os.path.exists(BACKEND_RANKING_PATH):
+            try:
+                with open(BACKEND_RANKING_PATH, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                _ranking_cache = data.get("ranking", {}) if isinstance(data, dict) else {}
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"读取后端测速结果 '{BACKEND_RANKING_PATH}' 失败: {e}")
+    return _ranking_cache
+
+
+def save_backend_ranking(ranking: Dict[str, List[str]], details: Dict[str, Any]):
+    global _ranking_cache
+    os.makedirs(os.path.dirname(BACKEND_RANKING_PATH), exist_ok=True)
+    temp_path = BACKEND_RANKING_PATH + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({"ranking": ranking, "details": details}, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, BACKEND_RANKING_PATH)
+    _ranking_cache = ranking
+
+
+def select_backend(file_path: str, preference: str = BACKEND_AUTO) -> ReaderBackend:
+    """选择读取后端：指定名称且可用时使用该后端；auto 时按测速结果 (仅包含通过一致性检查的后端) 选择最快的，
+    没有测速结果时使用参考实现 (其他后端在本机通过一致性检查之前不会被自动选用)。"""
+    candidates = available_backends(file_path)
+    if preference and preference != BACKEND_AUTO:
+        backend = get_backend(preference)
+        if backend is not None and backend in candidates:
+            return backend
+        logger.warning(f"读取后端 '{preference}' 不可用，改为自动选择。")
+    ranking = load_backend_ranking().get(os.path.splitext(file_path)[1].lower())
+    if ranking:
+        for name in ranking:
+            backend = get_backend(name)
+            if backend is not None and backend in candidates:
+                return backend
+    return get_backend(REFERENCE_BACKEND)
+
+
+register_backend(PandasReaderBackend())
+register_backend(CalamineReaderBackend())
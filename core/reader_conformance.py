@@ -0,0 +1,170 @@
+# core/reader_conformance.py
+# 读取后端一致性检查与测速：每个后端提取出的参数记录必须与参考实现 (pandas) 完全相同，
+# 只有通过检查的后端才会参与测速排名，auto 模式按排名选择最快的后端。
+import datetime
+import logging
+import os
+import time
+from typing import List, Dict, Any, Optional
+
+from openpyxl import Workbook
+
+from core import excel_processor, reader_backends
+
+try:
+    import xlwt
+except ImportError:  # xlwt 仅用于生成 .xls 样本，缺失时只检查 .xlsx
+    xlwt = None
+
+logger = logging.getLogger(__name__)
+
+
+def build_conformance_workbooks(directory: str) -> List[str]:
+    """生成覆盖常见边界情况的 .xlsx 样本 (整数/小数/负数公差、空单元格、前导空行、日期、文本数字、非默认布局、多工作表等)；
+    安装了 xlwt 时另生成内容相同的 .xls 样本。"""
+    os.makedirs(directory, exist_ok=True)
+    header_rows = [["检验报告"], [], ["零件号", None, "P507AC-100"], ["日期", None, datetime.datetime(2024, 5, 6, 7, 8, 9)]]
+    header_rows += [[] for _ in range(13 - len(header_rows))]
+    samples = {
+        "numbers.xlsx": {"Sheet": [
+            ["Diameter 1", None, 10, 0.05, -0.05],
+            ["Length", "mm", 25.4, 0.1, 0],
+            ["  Spaced name  ", None, "  12.50 ", "+0.2", "-0.1"],
+            [None, None, 1, 2, 3],
+            ["Angle", None, 45.0, None, -0.5],
+            ["Big", None, 123456789012, 1e-7, -1e-7],
+            ["Flag", None, True, None, None],
+        ]},
+        "sparse.xlsx": {"Sheet": [
+            ["Only name"],
+            [],
+            ["Date nominal", None, datetime.datetime(2024, 1, 2), None, None],
+            ["Text tol", None, "Ø10", "H7", ""],
+        ]},
+        "shifted_layout.xlsx": {"Sheet": [
+            ["序号", "特性名称", "单位", "名义值", "上公差", "下公差"],
+            [1, "Bore", "mm", 20, 0.021, 0],
+            [2, "Depth", "mm", 8.5, 0.1, -0.1],
+        ]},
+        "multi_sheet.xlsx": {
+            "OP10": [["P1", None, 1.5, 0.1, -0.1], ["P2", None, 2, 0.2, None]],
+            "Info": None,
+            "OP20": [["P1", None, 1.5, 0.1, -0.1], ["Q1", None, "abc", None, -3]],
+        },
+    }
+    paths = []
+    for file_name, sheets in samples.items():
+        sheet_rows = {name: header_rows + rows if rows is not None else [["说明页"]] for name, rows in sheets.items()}
+        path = os.path.join(directory, file_name)
+        _write_xlsx_sample(path, sheet_rows)
+        paths.append(path)
+        if xlwt is not None:
+            xls_path = os.path.splitext(path)[0] + ".xls"
+            _write_xls_sample(xls_path, sheet_rows)
+            paths.append(xls_path)
+    return paths
+
+
+def _write_xlsx_sample(path: str, sheet_rows: Dict[str, List[List[Any]]]):
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for sheet_name, rows in sheet_rows.items():
+        worksheet = workbook.create_sheet(sheet_name)
+        for row in rows:
+            worksheet.append(row)
+    workbook.save(path)
+
+
+def _write_xls_sample(path: str, sheet_rows: Dict[str, List[List[Any]]]):
+    workbook = xlwt.Workbook(encoding='utf-8')
+    date_style = xlwt.easyxf(num_format_str="yyyy-mm-dd hh:mm:ss")
+    for sheet_name, rows in sheet_rows.items():
+        worksheet = workbook.add_sheet(sheet_name)
+        for r, row in enumerate(rows):
+            for c, value in enumerate(row):
+                if value is None:
+                    continue
+                if isinstance(value, datetime.datetime):
+                    worksheet.write(r, c, value, date_style)
+                else:
+                    worksheet.write(r, c, value)
+    workbook.save(path)
+
+
+def _read_with_backend(file_path: str, sheet_selection: Optional[Dict[str, Any]], backend_name: str,
+                       layout_settings: Optional[Dict[str, Any]] = None):
+    # 不允许回退到参考实现，否则后端自身的读取失败会被掩盖
+    return excel_processor.read_single_excel_file(file_path, sheet_selection, backend_name, allow_fallback=False,
+                                                  layout_settings=layout_settings)
+
+
+def check_conformance(file_paths: List[str], sheet_selection: Optional[Dict[str, Any]] = None,
+                      backend_names: Optional[List[str]] = None,
+                      layout_settings: Optional[Dict[str, Any]] = None) -> Dict[str, List[str]]:
+    """用每个可用后端读取文件并与参考实现比较，返回 {后端名称: 差异说明列表}，列表为空表示一致。"""
+    reference = reader_backends.REFERENCE_BACKEND
+    names = backend_names or [b.name for b in reader_backends.available_backends() if b.name != reference]
+    differences: Dict[str, List[str]] = {name: [] for name in names}
+    for file_path in file_paths:
+        file_name = os.path.basename(file_path)
+        expected_parameters, expected_errors = _read_with_backend(file_path, sheet_selection, reference, layout_settings)
+        for name in names:
+            backend = reader_backends.get_backend(name)
+            if backend is None or not backend.is_available() or not backend.supports(file_path):
+                continue
+            parameters, errors = _read_with_backend(file_path, sheet_selection, name, layout_settings)
+            if bool(errors) != bool(expected_errors):
+                differences[name].append(f"{file_name}: 错误不一致 (参考: {expected_errors}，{name}: {errors})")
+            if len(parameters) != len(expected_parameters):
+                differences[name].append(
+                    f"{file_name}: 参数数量不一致 (参考 {len(expected_parameters)}，{name} {len(parameters)})")
+                continue
+            for expected, actual in zip(expected_parameters, parameters):
+                if expected != actual:
+                    changed_keys = sorted(k for k in set(expected) | set(actual) if expected.get(k) != actual.get(k))
+                    differences[name].append(
+                        f"{file_name} 工作表 '{expected.get('source_sheet')}' 第 {expected.get('original_excel_row')} 行: "
+                        + "，".join(f"{k} 参考={expected.get(k)!r} {name}={actual.get(k)!r}" for k in changed_keys))
+    return differences
+
+
+def benchmark_backends(file_paths: List[str], sheet_selection: Optional[Dict[str, Any]] = None,
+                       repeat: int = 3, save: bool = True,
+                       layout_settings: Optional[Dict[str, Any]] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """按扩展名对通过一致性检查的后端测速 (取 repeat 次中最快的一次)，返回 {扩展名: [{name, seconds}] (从快到慢)}，
+    save=True 时写入排名供 auto 模式使用。"""
+    differences = check_conformance(file_paths, sheet_selection, layout_settings=layout_settings)
+    nonconforming = {name for name, diffs in differences.items() if diffs}
+    for name in nonconforming:
+        logger.warning(f"读取后端 '{name}' 未通过一致性检查，不参与排名: {differences[name][:3]}")
+
+    files_by_extension: Dict[str, List[str]] = {}
+    for file_path in file_paths:
+        files_by_extension.setdefault(os.path.splitext(file_path)[1].lower(), []).append(file_path)
+
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    for extension, extension_files in files_by_extension.items():
+        extension_backends = reader_backends.available_backends(extension_files[0])
+        if not extension_backends:
+            # CSV/TSV 等不经过读取后端的文件类型不参与排名
+            continue
+        timings = []
+        for backend in extension_backends:
+            if backend.name in nonconforming:
+                continue
+            best_seconds = None
+            for _ in range(max(1, repeat)):
+                started_at = time.perf_counter()
+                for file_path in extension_files:
+                    _read_with_backend(file_path, sheet_selection, backend.name, layout_settings)
+                elapsed = time.perf_counter() - started_at
+                best_seconds = elapsed if best_seconds is None else min(best_seconds, elapsed)
+            timings.append({"name": backend.name, "seconds": best_seconds})
+            logger.info(f"读取后端 '{backend.name}' 读取 {len(extension_files)} 个 {extension} 文件: {best_seconds:.3f}s")
+        results[extension] = sorted(timings, key=lambda t: t["seconds"])
+
+    if save:
+        ranking = {ext: [t["name"] for t in timings] for ext, timings in results.items()}
+        reader_backends.save_backend_ranking(ranking, {"results": results, "nonconforming": sorted(nonconforming),
+                                                       "measured_at": time.time()})
+    return results
@@ -0,0 +1,197 @@
+# core/source_cache.py
+# 源文件本地缓存：网络共享上的 Excel 文件先以大块顺序读取复制到本地缓存目录，再从本地磁盘解析，
+# 避免 pd.read_excel 对远程文件的大量小块随机读取。解析当前文件时并发预取队列中后续的 N 个文件。
+# 缓存按 (路径, 大小, 修改时间) 校验，总大小超过上限时按最近使用时间淘汰。
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Dict, Any, Optional
+
+from core.config_manager import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+SOURCE_CACHE_DIR = os.path.join(CACHE_DIR, "source_cache")
+
+CACHE_MODE_AUTO = "auto"  # 仅缓存网络共享上的文件
+CACHE_MODE_ALWAYS = "always"
+CACHE_MODE_NEVER = "never"
+
+# 视为网络文件系统的挂载类型 (POSIX，读取 /proc/mounts)
+NETWORK_FILESYSTEM_TYPES = {"cifs", "smb3", "smbfs", "nfs", "nfs4", "afs", "fuse.sshfs", "9p"}
+_DRIVE_REMOTE = 4  # Windows GetDriveTypeW 返回值: 网络驱动器
+# 最近这么多秒内使用过的缓存项不会被淘汰，避免删除正在解析的副本
+EVICTION_GRACE_SECONDS = 300
+
+
+def _posix_mount_types() -> Dict[str, str]:
+    mounts: Dict[str, str] = {}
+    try:
+        with open("/proc/mounts", 'r', encoding='utf-8') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 3:
+                    mounts[fields[1].replace("\\040", " ")] = fields[2]
+    except OSError:
+        pass
+    return mounts
+
+
+def is_network_path(file_path: str) -> bool:
+    """判断文件是否位于网络共享 (UNC 路径、网络驱动器或网络文件系统挂载点) 上。"""
+    absolute_path = os.path.abspath(file_path)
+    if os.name == 'nt':
+        if absolute_path.startswith("\\\\"):
+            return True
+        try:
+            import ctypes
+            drive_root = os.path.splitdrive(absolute_path)[0] + "\\"
+            return ctypes.windll.kernel32.GetDriveTypeW(drive_root) == _DRIVE_REMOTE
+        except (ImportError, AttributeError, OSError):
+            return False
+    real_path = os.path.realpath(absolute_path)
+    best_mount, best_type = "", ""
+    for mount_point, fs_type in _posix_mount_types().items():
+        prefix = mount_point.rstrip("/") + "/"
+        if (real_path == mount_point or real_path.startswith(prefix)) and len(mount_point) > len(best_mount):
+            best_mount, best_type = mount_point, fs_type
+    return best_type in NETWORK_FILESYSTEM_TYPES
+
+
+class SourceCache:
+    def __init__(self, cache_dir: str = SOURCE_CACHE_DIR, mode: str = CACHE_MODE_AUTO, max_size_mb: int = 2048,
+                 chunk_size_mb: int = 8):
+        self.cache_dir = cache_dir
+        self.mode = mode
+        self.max_bytes = int(max_size_mb) * 1024 * 1024
+        self.chunk_size = max(1, int(chunk_size_mb)) * 1024 * 1024
+        self._lock = threading.Lock()
+        self._network_cache: Dict[str, bool] = {}
+
+    def should_cache(self, file_path: str) -> bool:
+        if self.mode == CACHE_MODE_NEVER:
+            return False
+        if self.mode == CACHE_MODE_ALWAYS:
+            return True
+        directory = os.path.dirname(os.path.abspath(file_path))
+        with self._lock:
+            if directory not in self._network_cache:
+                self._network_cache[directory] = is_network_path(directory)
+            return self._network_cache[directory]
+
+    def _entry_dir(self, file_path: str, size: int, mtime_ns: int) -> str:
+        key = f"{os.path.normcase(os.path.abspath(file_path))}|{size}|{mtime_ns}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest()[:24])
+
+    def localize(self, file_path: str) -> str:
+        """返回可供解析的本地路径：命中缓存或复制成功时为缓存中的副本 (保留原文件名)，否则为原路径。"""
+        if not self.should_cache(file_path):
+            return file_path
+        try:
+            st = os.stat(file_path)
+        except OSError as e:
+            logger.warning(f"无法读取源文件 '{file_path}' 的状态，直接解析原文件: {e}")
+            return file_path
+        entry_dir = self._entry_dir(file_path, st.st_size, st.st_mtime_ns)
+        local_path = os.path.join(entry_dir, os.path.basename(file_path))
+        if os.path.isfile(local_path) and os.path.getsize(local_path) == st.st_size:
+            os.utime(entry_dir)  # 更新最近使用时间，供淘汰使用
+            logger.debug(f"源文件缓存命中: {file_path}")
+            return local_path
+
+        started_at = time.perf_counter()
+        temp_path = ""
+        try:
+            os.makedirs(entry_dir, exist_ok=True)
+            temp_fd, temp_path = tempfile.mkstemp(suffix=".part", dir=entry_dir)
+            with open(file_path, 'rb', buffering=0) as source, os.fdopen(temp_fd, 'wb') as target:
+                shutil.copyfileobj(source, target, self.chunk_size)
+            os.replace(temp_path, local_path)
+        except OSError as e:
+            logger.warning(f"复制源文件 '{file_path}' 到本地缓存失败，直接解析原文件: {e}")
+            if temp_path and os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            return file_path
+        logger.info(f"已将源文件复制到本地缓存 ({st.st_size} 字节，{time.perf_counter() - started_at:.2f}s): {file_path}")
+        self.evict()
+        return local_path
+
+    def evict(self):
+        """缓存总大小超过上限时，按最近使用时间从旧到新删除缓存项。"""
+        with self._lock:
+            entries = []
+            total_bytes = 0
+            try:
+                with os.scandir(self.cache_dir) as it:
+                    for entry in it:
+                        if not entry.is_dir(follow_symlinks=False):
+                            continue
+                        entry_bytes = 0
+                        for dir_path, _, file_names in os.walk(entry.path):
+                            for file_name in file_names:
+                                try:
+                                    entry_bytes += os.path.getsize(os.path.join(dir_path, file_name))
+                                except OSError:
+                                    pass
+                        entries.append((entry.stat().st_mtime, entry.path, entry_bytes))
+                        total_bytes += entry_bytes
+            except OSError as e:
+                logger.warning(f"扫描源文件缓存目录 '{self.cache_dir}' 失败: {e}")
+                return
+            protected_after = time.time() - EVICTION_GRACE_SECONDS
+            for last_used, entry_path, entry_bytes in sorted(entries):
+                if total_bytes <= self.max_bytes or last_used >= protected_after:
+                    break
+                shutil.rmtree(entry_path, ignore_errors=True)
+                total_bytes -= entry_bytes
+                logger.debug(f"源文件缓存淘汰: {entry_path}")
+
+
+class SourcePrefetcher:
+    """按解析顺序预取源文件：取第 i 个文件时，后续 prefetch_count 个文件已在后台并发复制。"""
+
+    def __init__(self, cache: SourceCache, file_paths: List[str], order: Optional[List[int]] = None,
+                 prefetch_count: int = 4):
+        self.cache = cache
+        self.file_paths = file_paths
+        self.order = list(order) if order is not None else list(range(len(file_paths)))
+        self.prefetch_count = max(1, prefetch_count)
+        self._executor = ThreadPoolExecutor(max_workers=self.prefetch_count, thread_name_prefix="SourcePrefetch")
+        self._positions = {index: position for position, index in enumerate(self.order)}
+        self._futures: Dict[int, Future] = {}
+        self._next_position = 0
+
+    def _fill(self, up_to_position: int):
+        while self._next_position < min(up_to_position, len(self.order)):
+            index = self.order[self._next_position]
+            self._futures[index] = self._executor.submit(self.cache.localize, self.file_paths[index])
+            self._next_position += 1
+
+    def local_path(self, index: int) -> str:
+        """返回第 index 个文件的本地路径 (必要时等待其复制完成)，并保持其后 prefetch_count 个文件在预取中。"""
+        self._fill(self._positions[index] + 1 + self.prefetch_count)
+        return self._futures[index].result()
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def create_prefetcher(file_paths: List[str], cache_settings: Optional[Dict[str, Any]],
+                      order: Optional[List[int]] = None) -> Optional[SourcePrefetcher]:
+    """按配置 (见 config_manager.get_source_cache_settings) 创建预取器；不需要缓存任何文件时返回 None。"""
+    if not cache_settings or cache_settings.get("Mode", CACHE_MODE_AUTO) == CACHE_MODE_NEVER:
+        return None
+    cache = SourceCache(mode=cache_settings.get("Mode", CACHE_MODE_AUTO),
+                        max_size_mb=int(cache_settings.get("MaxSizeMB", 2048)),
+                        chunk_size_mb=int(cache_settings.get("ChunkSizeMB", 8)))
+    if not any(cache.should_cache(p) for p in file_paths):
+        return None
+    return SourcePrefetcher(cache, file_paths, order, int(cache_settings.get("PrefetchCount", 4)))
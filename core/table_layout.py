@@ -0,0 +1,261 @@
+# core/table_layout.py
+# 参数表布局：参数区起始行以及参数名、名义值、上公差、下公差所在的列。
+# 只读取工作表开头 SniffRows 行，按表头关键字与数值分布识别布局；识别结果按模板指纹缓存，
+# 同一模板的文件不再重复识别。config.json 中可按抬头预设 (K1001) 指定固定布局。
+import datetime
+import hashlib
+import json
+import logging
+import os
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+from core.config_manager import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+LAYOUT_MODE_AUTO = "auto"
+LAYOUT_MODE_FIXED = "fixed"
+
+# FirstDataRow 为参数区第一行的下标 (0 起)，各列为列下标 (0 起)，上下公差列可为 None (不存在)
+LAYOUT_KEYS = ("FirstDataRow", "NameColumn", "NominalColumn", "UpperTolColumn", "LowerTolColumn")
+DEFAULT_LAYOUT = {"FirstDataRow": 13, "NameColumn": 0, "NominalColumn": 2, "UpperTolColumn": 3, "LowerTolColumn": 4}
+# 识别布局时只看前若干列
+SNIFF_COLUMNS = 16
+# 按模板指纹缓存的识别结果，超过上限时丢弃最早记录的模板
+LAYOUT_CACHE_PATH = os.path.join(CACHE_DIR, "table_layout_cache.json")
+MAX_LAYOUT_CACHE_ENTRIES = 500
+
+# 表头关键字 (小写)，按顺序匹配，先匹配上下公差，避免 "公差" 被识别为其他列
+_ROLE_KEYWORDS = [
+    ("UpperTolColumn", ("上公差", "上偏差", "上限", "upper", "usl", "+tol")),
+    ("LowerTolColumn", ("下公差", "下偏差", "下限", "lower", "lsl", "-tol")),
+    ("NominalColumn", ("公称", "名义", "标称", "理论值", "设计值", "目标值", "nominal", "target")),
+    ("NameColumn", ("名称", "参数", "特性", "检测项", "项目", "name", "characteristic", "feature", "parameter")),
+]
+# 一列中至少这一比例的非空单元格为数值时，视为数值列
+_NUMERIC_COLUMN_RATIO = 0.6
+
+# 与 batch_processor.SOURCE_FILENAME_SEPARATOR 相同：源文件名第一段为 K1001
+_SOURCE_FILENAME_SEPARATOR = "$"
+
+
+def normalize_layout(layout: Any) -> Optional[Dict[str, Any]]:
+    """校验并补全布局设置 (缺失项使用默认布局)，无效时返回 None。"""
+    if not isinstance(layout, dict):
+        return None
+    normalized = DEFAULT_LAYOUT.copy()
+    for key in LAYOUT_KEYS:
+        if key in layout:
+            value = layout[key]
+            if value is None and key in ("UpperTolColumn", "LowerTolColumn"):
+                normalized[key] = None
+            elif isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+                normalized[key] = value
+            else:
+                return None
+    return normalized
+
+
+def layout_columns(layout: Dict[str, Any]) -> List[int]:
+    """布局用到的列下标 (升序，去重)，用于只读取这些列。"""
+    return sorted({layout[key] for key in LAYOUT_KEYS[1:] if layout.get(key) is not None})
+
+
+def _cell_kind(value: Any) -> str:
+    # 空单元格 "."、数值 "n"、日期 "d"、文本 "t"
+    if value is None or (isinstance(value, float) and value != value):
+        return "."
+    if isinstance(value, bool):
+        return "t"
+    if isinstance(value, (int, float)):
+        return "n"
+    if isinstance(value, (datetime.date, datetime.time)):
+        return "d"
+    text = str(value).strip()
+    if not text:
+        return "."
+    try:
+        float(text)
+        return "n"
+    except ValueError:
+        return "t"
+
+
+def _is_data_like(kinds: List[str]) -> bool:
+    # 参数行：第一个非空单元格为文本 (参数名)，其后至少有两个数值
+    for column, kind in enumerate(kinds):
+        if kind != ".":
+            return kind == "t" and kinds[column + 1:].count("n") >= 2
+    return False
+
+
+def template_fingerprint(head_rows: List[List[Any]], base_layout: Dict[str, Any]) -> str:
+    """模板指纹：第一个参数行 (含) 之前各行的单元格类型分布，以及默认布局。同一模板的文件表头区结构相同。"""
+    signature = []
+    for row in head_rows:
+        kinds = [_cell_kind(value) for value in row[:SNIFF_COLUMNS]]
+        signature.append("".join(kinds).rstrip("."))
+        if _is_data_like(kinds):
+            break
+    payload = json.dumps({"rows": signature, "base": base_layout}, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _find_header_row(head_rows: List[List[Any]]) -> Optional[Tuple[int, Dict[str, int]]]:
+    # 表头行：至少匹配到两种列的关键字；匹配最多的行优先，相同时取靠前的行
+    best = None
+    for row_index, row in enumerate(head_rows):
+        roles: Dict[str, int] = {}
+        for column, value in enumerate(row[:SNIFF_COLUMNS]):
+            if _cell_kind(value) != "t":
+                continue
+            text = str(value).strip().lower()
+            for role, keywords in _ROLE_KEYWORDS:
+                if role not in roles and any(keyword in text for keyword in keywords):
+                    roles[role] = column
+                    break
+        if len(roles) >= 2 and (best is None or len(roles) > len(best[1])):
+            best = (row_index, roles)
+    return best
+
+
+def sniff_layout(head_rows: List[List[Any]]) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """从工作表开头若干行识别布局：优先按表头关键字确定各列，缺少的列按参数行中数值列的顺序补齐
+    (名义值、上公差、下公差)；没有表头时从第一个参数行开始。返回 (布局, 是否找到表头)，无法识别时布局为 None。"""
+    rows = [[_cell_kind(value) for value in row[:SNIFF_COLUMNS]] for row in head_rows]
+    header = _find_header_row(head_rows)
+    if header is not None:
+        first_data_row, roles = header[0] + 1, dict(header[1])
+    else:
+        first_data_row = next((i for i, kinds in enumerate(rows) if _is_data_like(kinds)), None)
+        if first_data_row is None:
+            return None, False
+        roles = {"NameColumn": rows[first_data_row].index("t")}
+    data_rows = [kinds for kinds in rows[first_data_row:] if any(kind != "." for kind in kinds)]
+    if "NameColumn" not in roles:
+        name_columns = [kinds.index("t") for kinds in data_rows if "t" in kinds]
+        if not name_columns:
+            return None, True
+        roles["NameColumn"] = max(set(name_columns), key=name_columns.count)
+
+    name_column = roles["NameColumn"]
+    numeric_columns = []
+    for column in range(name_column + 1, SNIFF_COLUMNS):
+        values = [kinds[column] for kinds in data_rows if column < len(kinds) and kinds[column] != "."]
+        if values and values.count("n") / len(values) >= _NUMERIC_COLUMN_RATIO and column not in roles.values():
+            numeric_columns.append(column)
+    for role in ("NominalColumn", "UpperTolColumn", "LowerTolColumn"):
+        if role not in roles and numeric_columns:
+            roles[role] = numeric_columns.pop(0)
+    if "NominalColumn" not in roles:
+        return None, header is not None
+    layout = {"FirstDataRow": first_data_row, "UpperTolColumn": None, "LowerTolColumn": None}
+    layout.update(roles)
+    return layout, header is not None
+
+
+def score_layout(head_rows: List[List[Any]], layout: Dict[str, Any]) -> Tuple[int, int]:
+    """布局与开头若干行的吻合程度：(名义值或公差为数值的参数行数, 参数名非空的行数)。"""
+    matched_rows, named_rows = 0, 0
+    for row in head_rows[layout["FirstDataRow"]:]:
+        def kind(column):
+            return _cell_kind(row[column]) if column is not None and column < len(row) else "."
+        if kind(layout["NameColumn"]) == ".":
+            continue
+        named_rows += 1
+        if "n" in (kind(layout["NominalColumn"]), kind(layout["UpperTolColumn"]), kind(layout["LowerTolColumn"])):
+            matched_rows += 1
+    return matched_rows, named_rows
+
+
+def choose_layout(head_rows: List[List[Any]], base_layout: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """在默认布局与识别出的布局中选择与数据更吻合的一个：按表头关键字识别出的布局吻合程度不低于默认布局时优先，
+    仅按数值分布识别出的布局须更吻合。两者都找不到参数行时返回 None (无法识别)。"""
+    sniffed, from_header = sniff_layout(head_rows)
+    base_score = score_layout(head_rows, base_layout)
+    if sniffed is not None:
+        sniffed_matches = score_layout(head_rows, sniffed)[0]
+        if sniffed_matches > base_score[0] or (from_header and sniffed_matches > 0 and sniffed_matches == base_score[0]):
+            return sniffed
+    if sniffed is None and base_score[1] == 0 and len(head_rows) > base_layout["FirstDataRow"]:
+        return None
+    return dict(base_layout)
+
+
+_layout_cache: Optional[Dict[str, Dict[str, Any]]] = None
+
+
+def _load_layout_cache() -> Dict[str, Dict[str, Any]]:
+    global _layout_cache
+    if _layout_cache is None:
+        _layout_cache = {}
+        if os.path.exists(LAYOUT_CACHE_PATH):
+            try:
+                with open(LAYOUT_CACHE_PATH, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                _layout_cache = data if isinstance(data, dict) else {}
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"读取布局缓存 '{LAYOUT_CACHE_PATH}' 失败: {e}")
+    return _layout_cache
+
+
+def _save_layout_cache(fingerprint: str, layout: Optional[Dict[str, Any]]):
+    # 多个解析进程可能同时写入：先合并磁盘上已有的记录，再用进程独立的临时文件原子替换
+    cache = _load_layout_cache()
+    cache.pop(fingerprint, None)
+    cache[fingerprint] = layout
+    try:
+        os.makedirs(os.path.dirname(LAYOUT_CACHE_PATH), exist_ok=True)
+        merged = {}
+        if os.path.exists(LAYOUT_CACHE_PATH):
+            try:
+                with open(LAYOUT_CACHE_PATH, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                merged = data if isinstance(data, dict) else {}
+            except (OSError, json.JSONDecodeError):
+                merged = {}
+        for key in cache:
+            merged.pop(key, None)
+        merged.update(cache)
+        merged = dict(list(merged.items())[-MAX_LAYOUT_CACHE_ENTRIES:])
+        for key in [k for k in cache if k not in merged]:
+            del cache[key]
+        temp_path = f"{LAYOUT_CACHE_PATH}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(merged, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, LAYOUT_CACHE_PATH)
+    except OSError as e:
+        logger.warning(f"保存布局缓存 '{LAYOUT_CACHE_PATH}' 失败: {e}")
+
+
+def preset_layout_for_file(file_path: str, layout_settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """按源文件名第一段 (K1001) 查找 config.json 中该抬头预设指定的布局。"""
+    presets = layout_settings.get("Presets") or {}
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    k1001 = stem.split(_SOURCE_FILENAME_SEPARATOR)[0].strip()
+    return normalize_layout(presets.get(k1001)) if k1001 in presets else None
+
+
+def resolve_layout(file_path: str, read_head: Callable[[int], List[List[Any]]],
+                   layout_settings: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """确定一个工作表的布局：抬头预设指定的布局 > fixed 模式的默认布局 > 按模板指纹缓存或识别的布局。
+    read_head(行数) 返回工作表开头若干行 (仅在需要识别时调用)。无法识别时返回 None。"""
+    if not layout_settings:
+        return dict(DEFAULT_LAYOUT)
+    base_layout = normalize_layout(layout_settings.get("Default")) or dict(DEFAULT_LAYOUT)
+    preset_layout = preset_layout_for_file(file_path, layout_settings)
+    if preset_layout is not None:
+        return preset_layout
+    if layout_settings.get("Mode", LAYOUT_MODE_AUTO) != LAYOUT_MODE_AUTO:
+        return base_layout
+
+    head_rows = read_head(max(int(layout_settings.get("SniffRows", 40)), base_layout["FirstDataRow"] + 1))
+    fingerprint = template_fingerprint(head_rows, base_layout)
+    cache = _load_layout_cache()
+    if fingerprint in cache:
+        return dict(cache[fingerprint]) if cache[fingerprint] else None
+    layout = choose_layout(head_rows, base_layout)
+    if layout != base_layout:
+        logger.info(f"    文件 '{os.path.basename(file_path)}' 识别出非默认的参数表布局: {layout}")
+    _save_layout_cache(fingerprint, layout)
+    return layout
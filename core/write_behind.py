@@ -0,0 +1,156 @@
+# core/write_behind.py
+# 后台写入队列：生成操作立即返回，DFQ 文件由后台线程写入输出目录 (通常为网络共享)，
+# 遇到瞬时错误按指数退避有限次重试，界面可随时查询待写入/失败的任务。
+# 最终失败的任务保留内容以便手动重试，超过手动重试次数后只保留抬头与错误信息。
+import logging
+import queue
+import threading
+import time
+from typing import List, Dict, Any, Optional
+
+from core import dfq_writer, output_index, dfq_lint, export_formats
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUS_PENDING = "pending"
+JOB_STATUS_DONE = "done"
+JOB_STATUS_FAILED = "failed"
+
+
+class WriteBehindQueue:
+    def __init__(self, max_retries: int = 5, initial_backoff: float = 1.0, max_backoff: float = 30.0,
+                 max_manual_retries: int = 3):
+        self.max_retries = max_retries
+        self.max_manual_retries = max_manual_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._jobs: Dict[int, Dict[str, Any]] = {}
+        self._finished_unreported: List[Dict[str, Any]] = []
+        self._next_job_id = 1
+        self._stop_event = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="WriteBehindQueue", daemon=True)
+        self._worker.start()
+
+    def submit(self, output_path: str, data: bytes, header_info: Dict[str, str],
+               context: Optional[Dict[str, Any]] = None, export_outputs: Optional[Dict[str, bytes]] = None) -> int:
+        """提交一个写入任务并立即返回任务ID。context 会原样随结果返回；
+        context["DfqLint"] 为DFQ校验设置，开启写入后校验时结果中的 "lint" 为校验结果；
+        context["OutputLayout"] 为输出目录分层设置 (见 dfq_writer.resolve_output_directory)。
+        export_outputs 为附加格式的内容 ({格式: 字节内容})，DFQ写入成功后写到其旁边，结果中的 "export_files" 为写入的文件。"""
+        with self._lock:
+            job_id = self._next_job_id
+            self._next_job_id += 1
+            job = {
+                "job_id": job_id, "output_path": output_path, "header": dict(header_info),
+                "data": data, "export_outputs": export_outputs, "context": context or {},
+                "status": JOB_STATUS_PENDING, "attempts": 0, "manual_retries": 0, "retryable": True,
+                "output_file": "", "error": "", "submitted_at": time.time()
+            }
+            self._jobs[job_id] = job
+        self._queue.put(job)
+        logger.info(f"WriteBehindQueue: 已提交写入任务 {job_id} -> {output_path} ({len(data)} 字节)")
+        return job_id
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return sum(1 for j in self._jobs.values() if j["status"] == JOB_STATUS_PENDING)
+
+    def pending_jobs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [self._public_view(j) for j in self._jobs.values() if j["status"] == JOB_STATUS_PENDING]
+
+    def failed_jobs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [self._public_view(j) for j in self._jobs.values() if j["status"] == JOB_STATUS_FAILED]
+
+    def pop_finished(self) -> List[Dict[str, Any]]:
+        """取出自上次调用以来完成 (成功或最终失败) 的任务，供界面轮询。"""
+        with self._lock:
+            finished, self._finished_unreported = self._finished_unreported, []
+            return finished
+
+    def has_retryable_failures(self) -> bool:
+        with self._lock:
+            return any(j["status"] == JOB_STATUS_FAILED and j["retryable"] for j in self._jobs.values())
+
+    def retry_failed(self) -> int:
+        """将所有仍可重试 (未超过手动重试次数) 的失败任务重新放回队列，返回重新提交的数量。"""
+        with self._lock:
+            failed = [j for j in self._jobs.values() if j["status"] == JOB_STATUS_FAILED and j["retryable"]]
+            for job in failed:
+                job["status"] = JOB_STATUS_PENDING
+                job["attempts"] = 0
+                job["manual_retries"] += 1
+                job["error"] = ""
+        for job in failed:
+            self._queue.put(job)
+        if failed: logger.info(f"WriteBehindQueue: 重新提交 {len(failed)} 个失败任务。")
+        return len(failed)
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None):
+        """停止后台线程。wait=True 时先等待队列中的任务写完。"""
+        if wait:
+            deadline = None if timeout is None else time.time() + timeout
+            while self.pending_count() > 0 and (deadline is None or time.time() < deadline):
+                time.sleep(0.05)
+        self._stop_event.set()
+        self._queue.put(None)
+        self._worker.join(timeout=5)
+
+    @staticmethod
+    def _public_view(job: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in job.items() if k not in ("data", "export_outputs")}
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            job = self._queue.get()
+            if job is None:
+                break
+            self._process(job)
+
+    def _process(self, job: Dict[str, Any]):
+        delay = self.initial_backoff
+        while True:
+            job["attempts"] += 1
+            success, message_or_filepath = dfq_writer.write_dfq_bytes(
+                job["output_path"], job["data"], job["header"],
+                (job["context"].get("OutputLayout") or {}).get("Subdirectory", ""))
+            if success:
+                if job["context"].get("content_hash"):
+                    # 写入完成即登记，避免界面轮询前的重复生成漏检
+                    output_index.record_output(job["output_path"], job["context"]["content_hash"], message_or_filepath)
+                job["export_files"], job["export_errors"] = export_formats.write_export_files(
+                    message_or_filepath, job["export_outputs"])
+                job["lint"] = dfq_lint.check_after_write(message_or_filepath, job["context"].get("DfqLint"))
+                self._finish(job, JOB_STATUS_DONE, output_file=message_or_filepath)
+                return
+            if job["attempts"] > self.max_retries or self._stop_event.is_set():
+                logger.error(f"WriteBehindQueue: 任务 {job['job_id']} 在 {job['attempts']} 次尝试后失败: {message_or_filepath}")
+                self._finish(job, JOB_STATUS_FAILED, error=message_or_filepath)
+                return
+            logger.warning(f"WriteBehindQueue: 任务 {job['job_id']} 第 {job['attempts']} 次写入失败，"
+                           f"{delay:.1f}s 后重试: {message_or_filepath}")
+            if self._stop_event.wait(delay):
+                self._finish(job, JOB_STATUS_FAILED, error=message_or_filepath)
+                return
+            delay = min(delay * 2, self.max_backoff)
+
+    def _finish(self, job: Dict[str, Any], status: str, output_file: str = "", error: str = ""):
+        with self._lock:
+            job["status"] = status
+            job["output_file"] = output_file
+            job["error"] = error
+            job["finished_at"] = time.time()
+            if status == JOB_STATUS_DONE:
+                # 成功的任务不再需要保留内容
+                self._jobs.pop(job["job_id"], None)
+            elif job["manual_retries"] >= self.max_manual_retries:
+                # 手动重试次数已用完：释放文件内容，只保留抬头与错误信息供界面显示
+                job["data"] = None
+                job["export_outputs"] = None
+                job["context"] = {}
+                job["retryable"] = False
+                logger.warning(f"WriteBehindQueue: 任务 {job['job_id']} 已达到手动重试上限，不再保留文件内容。")
+            self._finished_unreported.append(self._public_view(job))
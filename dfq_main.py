@@ -0,0 +1,105 @@
+# dfq_main.py
+# DFQ文件工具 (无界面)：
+#   python dfq_main.py merge <DFQ文件...> --output <合并后的文件>      合并同一零件的多个检验计划，参数重新编号，K0100 重新计算
+#   python dfq_main.py split <DFQ文件> --size <每个文件的参数数> [--output-dir <目录>]   按参数数量拆分
+#   python dfq_main.py lint <DFQ文件或目录...> [--report <报告.jsonl>] [--workers N]   并行校验，输出 JSON Lines 报告
+#   python dfq_main.py archive <输出目录> [--days N]   将所有文件都已超过 N 天的日期打包为 archive/<日期>.zip
+import argparse
+import logging
+import os
+import sys
+
+from core import dfq_reader, dfq_lint, output_archive, config_manager
+from core.cli_support import setup_cli_logging
+
+LOG_FILENAME = 'dfq_trace.log'
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="DFQ 文件的合并、拆分、校验与归档。")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    merge_parser = subparsers.add_parser("merge", help="合并多个 DFQ 文件 (抬头取第一个文件)")
+    merge_parser.add_argument("paths", nargs="+", help="按顺序合并的 DFQ 文件")
+    merge_parser.add_argument("--output", required=True, help="合并后的 DFQ 文件路径")
+    split_parser = subparsers.add_parser("split", help="按参数数量拆分 DFQ 文件")
+    split_parser.add_argument("path", help="要拆分的 DFQ 文件")
+    split_parser.add_argument("--size", type=int, required=True, help="每个文件的参数数量")
+    split_parser.add_argument("--output-dir", default="", help="输出目录 (默认为源文件所在目录)")
+    lint_parser = subparsers.add_parser("lint", help="校验 DFQ 文件 (目录会递归查找 .dfq 文件)")
+    lint_parser.add_argument("paths", nargs="+", help="DFQ 文件或目录")
+    lint_parser.add_argument("--report", default="", help="JSON Lines 报告路径 (每行一个文件的校验结果；不指定时只输出日志)")
+    lint_parser.add_argument("--include-clean", action="store_true", help="报告中也列出没有问题的文件")
+    lint_parser.add_argument("--workers", type=int, default=None, help="工作进程数 (默认取 CPU 核数)")
+    archive_parser = subparsers.add_parser("archive", help="按生成日期将输出目录中的旧文件打包归档 (依据批次清单)")
+    archive_parser.add_argument("output_dir", help="输出目录 (含 dfq_manifest.jsonl)")
+    archive_parser.add_argument("--days", type=float, default=None,
+                                help="归档超过多少天的文件 (默认取 OutputLayout.ArchiveAfterDays)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    setup_cli_logging(LOG_FILENAME)
+    if args.command == "merge":
+        total, errors = dfq_reader.merge_dfq_files(args.paths, args.output)
+        for error in errors:
+            logging.warning(error)
+        if not total:
+            logging.error("合并失败或源文件中没有参数。")
+            return 1
+        logging.info(f"已合并 {len(args.paths)} 个文件，共 {total} 个参数: {args.output}")
+        return 0
+
+    if args.command == "lint":
+        return run_lint(args)
+    if args.command == "archive":
+        return run_archive(args)
+
+    output_files, errors = dfq_reader.split_dfq_file(args.path, args.output_dir or os.path.dirname(args.path) or ".",
+                                                     args.size)
+    for error in errors:
+        logging.error(error)
+    for output_file in output_files:
+        logging.info(f"已写入: {output_file}")
+    return 0 if output_files else 1
+
+
+def _log_lint_progress(checked_count, result):
+    if result["issues"]:
+        logging.warning(f"{result['file']}: {dfq_lint.describe_result(result)}")
+    if checked_count % 1000 == 0:
+        logging.info(f"已校验 {checked_count} 个文件...")
+
+
+def run_lint(args):
+    results = dfq_lint.lint_paths(args.paths, max_workers=args.workers)
+    if args.report:
+        summary = dfq_lint.write_lint_report(args.report, results, args.include_clean, _log_lint_progress)
+        if summary is None:
+            return 2
+    else:
+        summary = dfq_lint.new_summary()
+        for result in results:
+            dfq_lint.add_to_summary(summary, result)
+            _log_lint_progress(summary["files"], result)
+    logging.info(f"校验结束: 共 {summary['files']} 个文件，{summary['files_with_errors']} 个有错误，"
+                 f"{summary['files_with_warnings']} 个只有警告 (错误 {summary['errors']}，警告 {summary['warnings']})。"
+                 + (f" 报告已写入 {args.report}" if args.report else ""))
+    return 1 if summary["files_with_errors"] else 0
+
+
+
+def run_archive(args):
+    after_days = args.days if args.days is not None else config_manager.get_output_layout_settings()["ArchiveAfterDays"]
+    if not after_days or after_days <= 0:
+        logging.error("必须指定归档天数 (--days) 或在 config.json 中设置 OutputLayout.ArchiveAfterDays。")
+        return 2
+    summary = output_archive.archive_outputs(args.output_dir, after_days)
+    for error in summary["errors"]:
+        logging.error(error)
+    logging.info(f"归档结束: {len(summary['archived'])} 个压缩包，共 {summary['file_count']} 个文件。")
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
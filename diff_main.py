@@ -0,0 +1,58 @@
+# diff_main.py
+# 批量对比模式 (无界面)：python diff_main.py <文件或目录...> [--output <输出目录>] [--report <报告.csv>]
+# 将每个零件/工站的源文件与输出目录中上次生成的DFQ对比，列出新增、删除与公差/分类变化的参数，不写入DFQ文件。
+import argparse
+import logging
+import sys
+
+from core import batch_processor, config_manager, excel_processor, parameter_diff
+from core.cli_support import setup_cli_logging, collect_source_files
+
+LOG_FILENAME = 'diff_trace.log'
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="将检测文件与上次生成的 DFQ 文件对比，生成变更报告。")
+    parser.add_argument("paths", nargs="+", help="源文件或目录 (目录会递归查找 .xls/.xlsx/.csv/.tsv 文件)")
+    parser.add_argument("--output", default=config_manager.get_output_path(),
+                        help="已生成 DFQ 的输出目录 (按其中的清单查找每个零件/工站的上次输出，默认取 OutputPath)")
+    parser.add_argument("--mode", choices=[batch_processor.BATCH_MODE_PER_FILE, batch_processor.BATCH_MODE_PER_HEADER],
+                        default=batch_processor.BATCH_MODE_PER_HEADER, help="逐文件对比或按抬头分组对比")
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数 (默认取 CPU 核数)")
+    parser.add_argument("--report", default="", help="CSV 变更报告路径 (不指定时只输出日志)")
+    parser.add_argument("--include-unchanged", action="store_true", help="报告中也列出未变化的参数")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    setup_cli_logging(LOG_FILENAME)
+    if not args.output:
+        logging.error("必须指定输出目录 (--output) 或在 config.json 中设置 OutputPath。")
+        return 2
+    file_paths = collect_source_files(args.paths, excel_processor.SUPPORTED_EXTENSIONS)
+    if not file_paths:
+        logging.error("未找到任何源文件。")
+        return 2
+
+    results = batch_processor.run_batch_diff(
+        file_paths, args.output, config_manager.get_system_settings(), None, args.mode,
+        max_workers=args.workers, generation_options=batch_processor.build_generation_options(),
+        progress_callback=lambda done, total, result: logging.info(
+            f"[{done}/{total}] {(result.get('header') or {}).get('K1001', '')}: {result.get('message', '')}"))
+    changed_count = 0
+    for result in results:
+        counts = parameter_diff.count_by_status(result.get("entries", []))
+        if counts[parameter_diff.STATUS_ADDED] or counts[parameter_diff.STATUS_REMOVED] or \
+                counts[parameter_diff.STATUS_CHANGED]:
+            changed_count += 1
+    if args.report and not parameter_diff.write_change_report(args.report, results, args.include_unchanged):
+        return 1
+    failed_count = sum(1 for r in results if not r["success"])
+    logging.info(f"对比结束: 共 {len(results)} 个任务，{changed_count} 个有变化，{failed_count} 个无法对比。"
+                 + (f" 报告已写入 {args.report}" if args.report else ""))
+    return 1 if failed_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,17 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+# 测试直接导入项目根目录下的 core 包
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import table_layout  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_layout_cache(tmp_path, monkeypatch):
+    """布局识别缓存写到临时目录，不读写项目的 cache/。"""
+    monkeypatch.setattr(table_layout, "LAYOUT_CACHE_PATH", str(tmp_path / "table_layout_cache.json"))
+    monkeypatch.setattr(table_layout, "_layout_cache", None)
@@ -0,0 +1,72 @@
+# tests/test_reader_backends.py
+# 读取后端一致性：各后端读取内置边界样本得到的参数记录必须与参考实现 (pandas) 完全相同。
+import copy
+
+import pytest
+
+from core import config_manager, excel_processor, reader_backends, reader_conformance
+
+SHEET_SELECTIONS = [
+    pytest.param(None, id="default-sheets"),
+    pytest.param({"Mode": "all"}, id="all-sheets"),
+]
+LAYOUT_MODES = ["auto", "fixed"]
+# 除参考实现外的全部已注册后端 (未安装的在用例中跳过)
+OTHER_BACKENDS = sorted(name for name in reader_backends.backend_names()
+                        if name != reader_backends.REFERENCE_BACKEND)
+
+
+@pytest.fixture(scope="module")
+def sample_paths(tmp_path_factory):
+    return reader_conformance.build_conformance_workbooks(str(tmp_path_factory.mktemp("conformance")))
+
+
+def _read_reference(path, sheet_selection, layout_mode):
+    return excel_processor.read_single_excel_file(path, sheet_selection, reader_backends.REFERENCE_BACKEND,
+                                                  allow_fallback=False, layout_settings=_layout_settings(layout_mode))
+
+
+def _layout_settings(mode):
+    # 使用默认配置，结果不受本机 config.json 影响
+    settings = copy.deepcopy(config_manager.DEFAULT_CONFIG["TableLayout"])
+    settings["Mode"] = mode
+    return settings
+
+
+@pytest.mark.parametrize("layout_mode", LAYOUT_MODES)
+@pytest.mark.parametrize("sheet_selection", SHEET_SELECTIONS)
+def test_reference_backend_reads_samples(sample_paths, sheet_selection, layout_mode):
+    for path in sample_paths:
+        parameters, errors = _read_reference(path, sheet_selection, layout_mode)
+        assert not errors, path
+        assert parameters, path
+    # 参考实现与自身比较也应没有差异 (检查比较逻辑本身)
+    differences = reader_conformance.check_conformance(
+        sample_paths, sheet_selection, [reader_backends.REFERENCE_BACKEND], _layout_settings(layout_mode))
+    assert differences == {reader_backends.REFERENCE_BACKEND: []}
+
+
+def test_all_sheets_reads_every_parameter_sheet(sample_paths):
+    multi_sheet = next(p for p in sample_paths if p.endswith("multi_sheet.xlsx"))
+    first, _ = _read_reference(multi_sheet, None, "fixed")
+    every, _ = _read_reference(multi_sheet, {"Mode": "all"}, "fixed")
+    assert {p["source_sheet"] for p in first} == {"OP10"}
+    assert {"OP10", "OP20"} <= {p["source_sheet"] for p in every}
+
+
+def test_xls_samples_built_when_xlwt_installed(sample_paths):
+    pytest.importorskip("xlwt")
+    xlsx_stems = {p[:-len(".xlsx")] for p in sample_paths if p.endswith(".xlsx")}
+    assert {p[:-len(".xls")] for p in sample_paths if p.endswith(".xls")} == xlsx_stems
+
+
+@pytest.mark.parametrize("layout_mode", LAYOUT_MODES)
+@pytest.mark.parametrize("sheet_selection", SHEET_SELECTIONS)
+@pytest.mark.parametrize("backend_name", OTHER_BACKENDS)
+def test_backend_matches_reference(sample_paths, backend_name, sheet_selection, layout_mode):
+    backend = reader_backends.get_backend(backend_name)
+    if not backend.is_available():
+        pytest.skip(f"读取后端 '{backend_name}' 未安装")
+    differences = reader_conformance.check_conformance(sample_paths, sheet_selection, [backend_name],
+                                                       _layout_settings(layout_mode))
+    assert differences == {backend_name: []}
@@ -0,0 +1,37 @@
+# ui/header_multi_select_dialog_ui.py
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QListWidget,
+                             QPushButton, QDialogButtonBox)
+
+
+class UiHeaderMultiSelectDialog(object):
+    def setupUi(self, HeaderMultiSelectDialog: QDialog):
+        HeaderMultiSelectDialog.setObjectName("HeaderMultiSelectDialog")
+        HeaderMultiSelectDialog.setWindowTitle("多抬头生成")
+        HeaderMultiSelectDialog.setMinimumSize(600, 400)
+        HeaderMultiSelectDialog.setModal(True)
+
+        self.layout = QVBoxLayout(HeaderMultiSelectDialog)
+
+        self.lbl_hint = QLabel("勾选要生成 DFQ 文件的抬头预设 (参数列表相同，仅抬头不同):")
+        self.layout.addWidget(self.lbl_hint)
+
+        self.list_headers = QListWidget()
+        self.layout.addWidget(self.list_headers)
+
+        select_buttons_layout = QHBoxLayout()
+        self.btn_select_all = QPushButton("全选")
+        select_buttons_layout.addWidget(self.btn_select_all)
+        self.btn_select_none = QPushButton("全不选")
+        select_buttons_layout.addWidget(self.btn_select_none)
+        select_buttons_layout.addStretch()
+        self.layout.addLayout(select_buttons_layout)
+
+        self.button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        self.button_box.button(QDialogButtonBox.StandardButton.Ok).setText("生成")
+        self.button_box.button(QDialogButtonBox.StandardButton.Cancel).setText("取消")
+        self.layout.addWidget(self.button_box)
+
+        self.retranslateUi(HeaderMultiSelectDialog)
+
+    def retranslateUi(self, HeaderMultiSelectDialog):
+        pass
@@ -2,7 +2,7 @@
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QLineEdit, QPushButton, QListWidget, QComboBox, QTreeWidget,
                              QSplitter, QFrame, QSizePolicy, QAbstractItemView, QMessageBox,
-                             QFileDialog, QTreeWidgetItem, QCheckBox) # 新增 QCheckBox
+                             QFileDialog, QTreeWidgetItem, QCheckBox, QProgressBar) # 新增 QCheckBox
 from PyQt6.QtCore import Qt
 
 class UiMainWindow(object):
@@ -69,7 +69,26 @@ class UiMainWindow(object):
         self.btn_generate_dfq = QPushButton("生成 DFQ 文件")
         self.btn_generate_dfq.setStyleSheet("font-weight: bold; background-color: #4CAF50; color: white;")
         actions_layout.addWidget(self.btn_generate_dfq)
+        self.btn_generate_multi_header = QPushButton("多抬头生成...")
+        actions_layout.addWidget(self.btn_generate_multi_header)
         self.left_layout.addLayout(actions_layout)
+        generation_mode_layout = QHBoxLayout()
+        self.lbl_generation_mode = QLabel("生成模式:")
+        generation_mode_layout.addWidget(self.lbl_generation_mode)
+        self.cmb_generation_mode = QComboBox()
+        self.cmb_generation_mode.addItem("合并为一个 DFQ 文件", userData="merged")
+        self.cmb_generation_mode.addItem("每个 Excel 文件生成一个 DFQ", userData="per_file")
+        self.cmb_generation_mode.addItem("按抬头分组生成 DFQ", userData="per_header")
+        generation_mode_layout.addWidget(self.cmb_generation_mode)
+        self.left_layout.addLayout(generation_mode_layout)
+        self.chk_force_regenerate = QCheckBox("强制重新生成 (忽略重复内容检查)")
+        self.left_layout.addWidget(self.chk_force_regenerate)
+        self.chk_resume_batch = QCheckBox("断点续传 (跳过之前已成功转换且未变化的文件)")
+        self.chk_resume_batch.setToolTip("仅对逐文件/按抬头分组的批量生成有效")
+        self.left_layout.addWidget(self.chk_resume_batch)
+        self.progress_batch = QProgressBar()
+        self.progress_batch.setVisible(False) # 仅在批量生成时显示
+        self.left_layout.addWidget(self.progress_batch)
         self.left_layout.addStretch()
 
         self.right_pane = QWidget()
@@ -0,0 +1,75 @@
+# watch_main.py
+# 监视文件夹模式 (无界面)：python watch_main.py --root <源目录> [--output <输出目录>]
+import argparse
+import logging
+import signal
+import sys
+import time
+
+from core import batch_processor, config_manager
+from core.cli_support import setup_cli_logging
+from core.folder_watcher import FolderWatcher
+
+LOG_FILENAME = 'watch_trace.log'
+
+
+def parse_args(argv):
+    watch_settings = config_manager.get_watch_folder_settings()
+    parser = argparse.ArgumentParser(description="监视文件夹，自动将新的检测文件转换为 DFQ 文件。")
+    parser.add_argument("--root", default=watch_settings["Root"], help="要监视的源目录 (默认取 config.json 中的 WatchFolder.Root)")
+    parser.add_argument("--output", default=config_manager.get_output_path(), help="DFQ 输出目录 (默认取 OutputPath)")
+    parser.add_argument("--poll-interval", type=float, default=float(watch_settings["PollIntervalSeconds"]),
+                        help="轮询间隔 (秒)")
+    parser.add_argument("--stable-seconds", type=float, default=float(watch_settings["StableSeconds"]),
+                        help="文件大小与修改时间保持不变多久后才开始转换 (秒)")
+    parser.add_argument("--workers", type=int, default=int(watch_settings["MaxWorkers"]), help="转换工作进程数")
+    parser.add_argument("--max-failed-attempts", type=int, default=int(watch_settings["MaxFailedAttempts"]),
+                        help="转换失败且未变化的文件最多尝试的次数")
+    parser.add_argument("--retry-failed-after", type=float, default=float(watch_settings["RetryFailedAfterSeconds"]),
+                        help="转换失败的文件再次尝试前的等待时间 (秒)")
+    parser.add_argument("--process-existing", action="store_true", default=bool(watch_settings["ProcessExisting"]),
+                        help="首次监视时也转换目录中已有的文件 (默认只登记为基线，之后变化时才转换)")
+    parser.add_argument("--cold-rescan-seconds", type=float, default=float(watch_settings["ColdRescanSeconds"]),
+                        help="长时间未变化的目录每隔多久 (秒) 重新扫描一次其中的文件")
+    parser.add_argument("--once", action="store_true",
+                        help="只扫描并转换一次，包括已有的文件 (等待当前任务完成后退出)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    setup_cli_logging(LOG_FILENAME)
+    if not args.root or not args.output:
+        logging.error("必须指定源目录 (--root) 和输出目录 (--output)。")
+        return 2
+
+    generation_options = batch_processor.build_generation_options()
+    watcher = FolderWatcher(args.root, args.output, config_manager.get_system_settings(),
+                            poll_interval=args.poll_interval, stable_seconds=args.stable_seconds,
+                            max_workers=args.workers, generation_options=generation_options,
+                            max_failed_attempts=args.max_failed_attempts, retry_failed_after=args.retry_failed_after,
+                            process_existing=args.process_existing or args.once,
+                            cold_rescan_seconds=args.cold_rescan_seconds)
+    if args.once:
+        watcher.stable_seconds = 0
+        watcher.start()
+        try:
+            # 首次扫描登记候选，之后的扫描提交任务，直到没有候选文件和在途任务为止
+            watcher.poll_once()
+            while True:
+                watcher.poll_once()
+                if not watcher.has_pending_work():
+                    break
+                time.sleep(0.2)
+        finally:
+            watcher.shutdown()
+        return 0
+
+    signal.signal(signal.SIGINT, lambda *_: watcher.stop())
+    signal.signal(signal.SIGTERM, lambda *_: watcher.stop())
+    watcher.run_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())